@@ -0,0 +1,353 @@
+"""
+Benchmarks voor de zware paden: importeren (map en PDF), thumbnails, geometrie,
+tekenen, zoomen, opslaan, laden en export (PDF en afbeelding), met piekgeheugen.
+
+    python benchmarks/bench.py --out resultaten.json
+    python benchmarks/bench.py --quick --out nieuw.json --compare resultaten.json
+    xvfb-run python benchmarks/bench.py --gui --out gui.json
+
+Zonder --gui draait alles op de Tk-vrije kern (zitcore), ook op een server zonder
+scherm. Met --gui worden ook de echte SeatPlanner-methodes gemeten (vereist een
+display, bv. Xvfb). De PDF-rasterstap (pdf2image) wordt overgeslagen als poppler
+ontbreekt. Testdata wordt gegenereerd in --data (standaard een tijdelijke map).
+
+Per meting: mediaan en minimum over --repeat runs, en (tenzij --no-memory) het
+piekgeheugen van Python-allocaties (tracemalloc) in een extra run. De JSON kan
+met --compare vergeleken worden met een eerdere run (bv. van een vorige commit).
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fixtures import make_photo_folder, make_class_pdf, raster_pages, layout_for_seats, free_layout_for_seats
+
+from zitcore.config import plan_title, RASTER_SIZES
+from zitcore.layouts import page_size_for
+from zitcore.geometry import compute_geometry
+from zitcore.spatial import slot_index
+from zitcore.search import NameIndex
+from zitcore.photocheck import check_photos
+from zitcore.rasterexport import draw_static_layer
+from zitcore.imaging import list_folder_images, load_square_image, crop_pdf_photos
+from zitcore.arrange import auto_assign
+from zitcore.seating import make_student, save_seating_files, open_seating
+from zitcore.lazy import ImageDecoder
+
+# namen voor de zoekbenchmark
+SURNAMES = ["Janssens", "Peeters", "Maes", "Jacobs", "Mertens", "Willems", "Claes", "Goossens", "Wouters", "De Smet"]
+FIRST_NAMES = ["Noah", "Emma", "Arthur", "Olivia", "Louis", "Louise", "Jules", "Mila", "Adam", "Éloïse"]
+
+# verschil t.o.v. --compare vanaf waar een meting als trager/sneller gemeld wordt
+DEFAULT_THRESHOLD = 0.10
+
+class Bench:
+    def __init__(self, repeat, memory):
+        self.repeat = repeat
+        self.memory = memory
+        self.results = {}
+
+    def run(self, name, fn, setup=None):
+        """
+        Meet fn(state) `repeat` keer; setup() (niet gemeten) levert telkens een verse state.
+        """
+        runs = []
+        for _ in range(self.repeat):
+            state = setup() if setup else None
+            t0 = time.perf_counter()
+            fn(state)
+            runs.append(time.perf_counter() - t0)
+        result = {"median_s": statistics.median(runs), "min_s": min(runs), "runs": runs}
+        if self.memory:
+            state = setup() if setup else None
+            tracemalloc.start()
+            fn(state)
+            result["peak_kib"] = tracemalloc.get_traced_memory()[1] // 1024
+            tracemalloc.stop()
+        self.results[name] = result
+        mem = f"  piek {result['peak_kib']:>8} KiB" if "peak_kib" in result else ""
+        print(f"{name:<48} {result['median_s']*1000:>10.1f} ms{mem}", flush=True)
+
+    def skip(self, name, reason):
+        self.results[name] = {"skipped": reason}
+        print(f"{name:<48} overgeslagen: {reason}", flush=True)
+
+def students_from_folder(folder):
+    students = []
+    for f in list_folder_images(folder):
+        pil = load_square_image(os.path.join(folder, f))
+        students.append(make_student(os.path.splitext(f)[0], pil, source=f))
+    return students
+
+def core_cases(bench, data, counts, resolutions, seat_counts):
+    # geometrie voor klaslokalen van 20 tot 500 plaatsen
+    for seats in seat_counts:
+        cfg = layout_for_seats(seats)
+        bench.run(f"geometry[seats={seats}]", lambda _: compute_geometry(cfg, page_size_for(cfg)))
+        bench.run(f"geometry.zoom[seats={seats}]", lambda _: compute_geometry(cfg, page_size_for(cfg), 1.1))
+        free = free_layout_for_seats(seats)
+        bench.run(f"geometry.free[seats={seats}]", lambda _: compute_geometry(free, page_size_for(free)))
+        geometry = compute_geometry(free, page_size_for(free))
+        # vaste laag op het scherm (banken en stoelkaders als één afbeelding), bij elke nieuwe opstelling of zoom
+        bench.run(f"draw.static_layer[seats={seats}]", lambda _: draw_static_layer(geometry, 1.0))
+        points = [(s["cx"] + 7, s["cy"] - 5) for s in geometry["slots"]]
+        # neerzetten na slepen: dichtstbijzijnde stoel voor elke stoel één keer
+        bench.run(f"snap.free[seats={seats}]",
+                  lambda _: [slot_index(geometry).nearest(x, y) for x, y in points])
+        # zoeken terwijl je typt: index opbouwen en elk begin van een naam opzoeken
+        rng = random.Random(seats)
+        names = [f"{rng.choice(SURNAMES)}{rng.randrange(100)} {rng.choice(FIRST_NAMES)}" for _ in range(seats)]
+        bench.run(f"search.build[seats={seats}]", lambda _: NameIndex(names))
+        index = NameIndex(names)
+        queries = [names[0][:k] for k in range(1, len(names[0]) + 1)]
+        bench.run(f"search.typing[seats={seats}]", lambda _: [index.search(q) for q in queries])
+
+    for n in counts:
+        for px in resolutions:
+            folder = make_photo_folder(os.path.join(data, f"fotos_{n}_{px}"), n, px)
+            bench.run(f"import.folder[n={n},px={px}]", lambda _: students_from_folder(folder))
+
+        pdf = make_class_pdf(os.path.join(data, f"klaslijst_{n}.pdf"), n)
+        try:
+            from zitcore.pdfimport import convert_pdf_pages
+            convert_pdf_pages(pdf)
+        except Exception as e:
+            bench.skip(f"import.pdf_rasterize[n={n}]", f"{type(e).__name__}: {e}".splitlines()[0][:80])
+        else:
+            bench.run(f"import.pdf_rasterize[n={n}]", lambda _: convert_pdf_pages(pdf))
+        pages = raster_pages(n)
+        bench.run(f"import.pdf_crop[n={n}]", lambda _: crop_pdf_photos(pages, n))
+        crops = crop_pdf_photos(pages, n)
+        # controle op dubbele, lege en verschoven foto's (slaat over zonder numpy)
+        bench.run(f"import.check[n={n}]", lambda _: check_photos(crops, pdf=True))
+
+        # vanaf hier: de grootste resolutie, in een opstelling waar iedereen past
+        folder = os.path.join(data, f"fotos_{n}_{max(resolutions)}")
+        students = students_from_folder(folder)
+        cfg = layout_for_seats(max(n, 20))
+        geometry = compute_geometry(cfg, page_size_for(cfg))
+        auto_assign(students, len(geometry["base_slots"]))
+        vs = geometry["seat_size"]
+        bench.run(f"thumbs[n={n}]", lambda _: [s["pil"].resize((vs, vs)) for s in students])
+
+        meta = {"class": "bench", "room": "B0", "layout": "Benchmark", "custom_layout": cfg}
+        out = tempfile.mkdtemp(prefix="save_", dir=data)
+
+        def fresh_copy():
+            # nieuwe dicts zonder asset-naam: een eerste save codeert alles
+            return [make_student(s["name"], s["pil"], slot=s["slot"]) for s in students]
+
+        def first_save(copy):
+            path = os.path.join(out, "eerste.zit")
+            if os.path.exists(path):
+                os.unlink(path)
+            save_seating_files(path, meta, copy)
+        bench.run(f"save.zit_first[n={n}]", first_save, setup=fresh_copy)
+
+        zit = os.path.join(out, "verdeling.zit")
+        saved = fresh_copy()
+        save_seating_files(zit, meta, saved)
+
+        def resave(_):
+            saved[0]["slot"], saved[1]["slot"] = saved[1]["slot"], saved[0]["slot"]
+            save_seating_files(zit, meta, saved)
+        bench.run(f"save.zit_resave[n={n}]", resave)
+
+        def save_json(copy):
+            save_seating_files(os.path.join(out, "verdeling.json"), meta, copy)
+        bench.run(f"save.json_pack[n={n}]", save_json, setup=fresh_copy)
+
+        bench.run(f"load.open[n={n}]", lambda _: open_seating(zit))
+
+        def load_all(_):
+            data_, loaded, missing = open_seating(zit)
+            decoder = ImageDecoder()
+            decoder.ensure_all(loaded)
+            decoder.close()
+        bench.run(f"load.decode_all[n={n}]", load_all)
+
+        from zitcore.pdfexport import ExportImageCache, write_pdf
+        title = plan_title("bench", "B0")
+        pdf_out = os.path.join(out, "export.pdf")
+        bench.run(f"export.pdf[n={n}]",
+                  lambda cache: write_pdf(pdf_out, geometry, title, [[(s, s["slot"]) for s in students]], cache),
+                  setup=ExportImageCache)
+        warm = ExportImageCache()
+        write_pdf(pdf_out, geometry, title, [[(s, s["slot"]) for s in students]], warm)
+        bench.run(f"export.pdf_warm[n={n}]",
+                  lambda _: write_pdf(pdf_out, geometry, title, [[(s, s["slot"]) for s in students]], warm))
+
+        from zitcore.rasterexport import RasterCache, render_board, write_raster
+        placements = [(s, s["slot"]) for s in students]
+        for label, size in RASTER_SIZES.items():
+            raster = RasterCache()
+            render_board(geometry, title, placements, size, raster)
+            bench.run(f"export.raster_warm[n={n},{label}]", lambda _: render_board(geometry, title, placements, size, raster))
+            png_out = os.path.join(out, f"export_{label}.png")
+            bench.run(f"export.png[n={n},{label}]",
+                      lambda cache: write_raster(png_out, geometry, title, placements, size, cache), setup=RasterCache)
+        shutil.rmtree(out, ignore_errors=True)
+
+def gui_cases(bench, data, counts, resolutions):
+    """De echte SeatPlanner-methodes; dialogen worden vervangen door vaste antwoorden."""
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        bench.skip("gui", f"geen display ({e})".splitlines()[0][:80])
+        return
+    import zitplaatsen as app
+
+    answers = {}
+    app.filedialog.askdirectory = lambda **k: answers["dir"]
+    app.filedialog.asksaveasfilename = lambda **k: answers["save"]
+    app.filedialog.askopenfilename = lambda **k: answers["open"]
+    for name in ("showinfo", "showwarning", "showerror"):
+        setattr(app.messagebox, name, lambda *a, **k: None)
+    app.messagebox.askyesno = lambda *a, **k: True
+    app.messagebox.askyesnocancel = lambda *a, **k: False
+
+    planner = app.SeatPlanner(root)
+    planner.prompt_names_list = lambda count=None, default_list=None: list(default_list or [])
+    root.update()
+    planner.start_autosave()
+
+    def timed(fn):
+        def call(_):
+            fn()
+            root.update()
+        return call
+
+    for n in counts:
+        folder = os.path.join(data, f"fotos_{n}_{max(resolutions)}")
+        app.LAYOUTS["Benchmark"] = layout_for_seats(max(n, 20))
+        planner.var_layout.set("Benchmark")
+        planner.set_layout()
+
+        def clear_board():
+            planner.students = []
+            planner.history.clear()
+            planner.set_layout()
+        answers["dir"] = folder
+        bench.run(f"gui.load_from_folder[n={n}]", timed(planner.load_from_folder), setup=clear_board)
+        bench.run(f"gui.build_tk_thumbs[n={n}]", timed(planner.build_tk_thumbs))
+        bench.run(f"gui.compute_geometry_and_draw_static[n={n}]", timed(planner.compute_geometry_and_draw_static))
+        bench.run(f"gui.draw_students[n={n}]", timed(planner.draw_students))
+        bench.run(f"gui.zoom[n={n}]", timed(lambda: (planner.zoom(1.1), planner.zoom(1/1.1))))
+        answers["save"] = answers["open"] = os.path.join(data, f"gui_{n}.zit")
+        bench.run(f"gui.save_seating[n={n}]", timed(planner.save_seating))
+        bench.run(f"gui.load_seating[n={n}]",
+                  timed(lambda: (planner.load_seating(), planner.images.ensure_all(planner.students))))
+        answers["save"] = os.path.join(data, f"gui_{n}.pdf")
+        bench.run(f"gui.export_pdf[n={n}]", timed(planner.export_pdf))
+    if planner.journal is not None:
+        planner.journal.clear()
+    root.destroy()
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+def peak_rss_kib():
+    try:
+        import resource
+    except ImportError:   # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+def compare(results, base_path, threshold):
+    """Druk de verhouding nieuw/oud per meting af. Returned: aantal tragere metingen."""
+    with open(base_path, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    print(f"\nVergelijking met {base_path} (commit {base['meta'].get('commit')}):")
+    slower = 0
+    for name, new in results.items():
+        old = base["results"].get(name)
+        if not old or "median_s" not in old or "median_s" not in new:
+            continue
+        ratio = new["median_s"] / old["median_s"] if old["median_s"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag, slower = "TRAGER", slower + 1
+        elif ratio < 1 - threshold:
+            flag = "sneller"
+        print(f"{name:<48} {old['median_s']*1000:>9.1f} -> {new['median_s']*1000:>9.1f} ms  x{ratio:5.2f} {flag}")
+    return slower
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks voor zitplaatsen.")
+    parser.add_argument("--out", help="schrijf de resultaten als JSON")
+    parser.add_argument("--compare", help="vergelijk met een eerder resultaat (JSON)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relatief verschil dat als trager/sneller telt (standaard 0.10)")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exitcode 1 als iets trager werd")
+    parser.add_argument("--counts", default="30,120", help="aantallen leerlingen (komma's)")
+    parser.add_argument("--resolutions", default="300,1200", help="fotobreedtes in pixels (komma's)")
+    parser.add_argument("--seats", default="20,60,150,500", help="opstellingen: aantallen plaatsen (komma's)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="klein en snel: 30 leerlingen, 3 runs")
+    parser.add_argument("--no-memory", action="store_true", help="geen piekgeheugen meten")
+    parser.add_argument("--gui", action="store_true", help="meet ook de Tk-GUI (display nodig)")
+    parser.add_argument("--data", help="map voor de testdata (blijft bewaard, wordt hergebruikt)")
+    args = parser.parse_args(argv)
+
+    counts = [int(x) for x in args.counts.split(",")]
+    resolutions = [int(x) for x in args.resolutions.split(",")]
+    seat_counts = [int(x) for x in args.seats.split(",")]
+    if args.quick:
+        counts, resolutions, args.repeat = [30], [300], 3
+
+    data = args.data or tempfile.mkdtemp(prefix="zit_bench_")
+    os.makedirs(data, exist_ok=True)
+    # autosave/caches van de benchmark niet in het echte gebruikersprofiel
+    os.environ["ZITPLAATSEN_HOME"] = os.path.join(data, "home")
+    random.seed(0)
+
+    bench = Bench(args.repeat, not args.no_memory)
+    try:
+        core_cases(bench, data, counts, resolutions, seat_counts)
+        if args.gui:
+            gui_cases(bench, data, counts, resolutions)
+    finally:
+        if not args.data:
+            shutil.rmtree(data, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+            "peak_rss_kib": peak_rss_kib(),
+        },
+        "results": bench.results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResultaten: {args.out}")
+    if args.compare:
+        slower = compare(bench.results, args.compare, args.threshold)
+        if slower and args.fail_on_regression:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Synthetische testdata voor de benchmarks: fotomappen, Smartschool-achtige
+klaslijst-PDF's en opstellingen van 20 tot 500 plaatsen.
+Alles is deterministisch (vaste seed) zodat resultaten tussen commits vergelijkbaar zijn.
+"""
+import os
+import io
+import math
+import random
+
+from PIL import Image, ImageDraw
+
+from zitcore.config import A4, PDF_DPI
+from zitcore.imaging import PDF_PHOTOS_PER_PAGE, pdf_crop_box
+
+def synthetic_photo(i, px, rng):
+    """Portretachtige foto: kleurverloop met ruis, zodat coderen realistisch veel werk is."""
+    base = (rng.randrange(60, 200), rng.randrange(60, 200), rng.randrange(60, 200))
+    im = Image.new("RGB", (px, int(px * 4 / 3)), base)
+    draw = ImageDraw.Draw(im)
+    w, h = im.size
+    draw.ellipse((w * 0.25, h * 0.15, w * 0.75, h * 0.6), fill=(230, 190, 160))
+    draw.rectangle((w * 0.15, h * 0.65, w * 0.85, h), fill=(base[2], base[0], base[1]))
+    noise = Image.effect_noise((w, h), 24).convert("RGB")
+    return Image.blend(im, noise, 0.15)
+
+def make_photo_folder(folder, count, px, seed=1):
+    """Map met `count` JPG's van ongeveer px breed. Bestaande map met dezelfde inhoud wordt hergebruikt."""
+    os.makedirs(folder, exist_ok=True)
+    existing = sorted(f for f in os.listdir(folder) if f.endswith(".jpg"))
+    if len(existing) == count:
+        return folder
+    rng = random.Random(seed)
+    for i in range(count):
+        synthetic_photo(i, px, rng).save(os.path.join(folder, f"Leerling_{i+1:03d}.jpg"), quality=90)
+    return folder
+
+def page_pixels():
+    """A4 in pixels bij PDF_DPI (zo rastert pdf2image de klaslijst)."""
+    return int(round(A4[0] / 72 * PDF_DPI)), int(round(A4[1] / 72 * PDF_DPI))
+
+def raster_pages(count, seed=2):
+    """
+    Gerasterde klaslijstpagina's (zoals convert_pdf_pages ze teruggeeft), zonder
+    poppler: elke foto staat op de plaats waar crop_pdf_photos ze uitsnijdt.
+    """
+    rng = random.Random(seed)
+    size = page_pixels()
+    pages = []
+    for p in range(math.ceil(count / PDF_PHOTOS_PER_PAGE)):
+        page = Image.new("RGB", size, "white")
+        draw = ImageDraw.Draw(page)
+        for i in range(p * PDF_PHOTOS_PER_PAGE, min(count, (p + 1) * PDF_PHOTOS_PER_PAGE)):
+            x1, y1, x2, y2 = pdf_crop_box(i, size)
+            page.paste(synthetic_photo(i, x2 - x1, rng).resize((x2 - x1, y2 - y1)), (x1, y1))
+            draw.text((x1, y2 + 8), f"Leerling {i+1}", fill="black")
+        pages.append(page)
+    return pages
+
+def make_class_pdf(path, count, seed=2):
+    """Smartschool-achtige klaslijst-PDF (A4, 5×5 foto's per pagina) via reportlab."""
+    from reportlab.pdfgen import canvas as pdfcanvas
+    from reportlab.lib.utils import ImageReader
+
+    if os.path.isfile(path):
+        return path
+    W, H = A4
+    c = pdfcanvas.Canvas(path, pagesize=A4)
+    for page in raster_pages(count, seed):
+        buf = io.BytesIO()
+        page.save(buf, format="JPEG", quality=85)
+        c.drawImage(ImageReader(io.BytesIO(buf.getvalue())), 0, 0, width=W, height=H)
+        c.setFont("Helvetica", 8)
+        c.drawString(40, H - 30, "Klaslijst (synthetisch)")
+        c.showPage()
+    c.save()
+    return path
+
+def layout_for_seats(seats):
+    """Regelmatige opstelling met ongeveer `seats` plaatsen (2 stoelen per bank)."""
+    banks = max(1, round(math.sqrt(seats / 2 * 1.5)))
+    rows = max(1, math.ceil(seats / (2 * banks)))
+    return {"regular": True, "rows": rows, "banks": banks, "seats": 2,
+            "orientation": "landscape" if banks >= rows else "portrait"}
+
+def free_layout_for_seats(seats, seed=3):
+    """Vrije opstelling met ongeveer `seats` plaatsen: eilandjes van 4 stoelen, licht gedraaid."""
+    rng = random.Random(seed)
+    islands = max(1, math.ceil(seats / 4))
+    per_row = max(1, round(math.sqrt(islands * 2)))
+    banks = [{"x": (i % per_row) * 6.5, "y": (i // per_row) * 2.5, "seats": 4, "angle": rng.choice([0, 0, 10, -10])}
+             for i in range(islands)]
+    return {"free": True, "banks": banks, "orientation": "landscape"}
@@ -0,0 +1,8 @@
+"""
+zitcore — de Tk-vrije kern van zitplaatsen.
+
+Bevat alles wat geen venster nodig heeft: opstellingen, geometrie, uitsnijden van
+foto's, verdelingen, PDF-export en het lezen/schrijven van opgeslagen verdelingen.
+Zowel de GUI (zitplaatsen.py) als de command-line (python -m zitcore) gebruiken
+deze modules. Importeer hier nooit tkinter.
+"""
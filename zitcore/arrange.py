@@ -0,0 +1,106 @@
+import random
+
+# Soorten rotaties voor de bulk-export (sleutel -> label in de UI)
+ROTATION_MODES = {
+    "random": "Willekeurig",
+    "constrained": "Willekeurig, telkens andere plaats en buren",
+    "rotation": "Doorschuiven (rotatie)",
+}
+
+def generate_arrangements(current_slots, slot_banks, count, mode="random", seed=None, attempts=200):
+    """
+    Genereer `count` verdelingen van dezelfde leerlingen over dezelfde zitplaatsen.
+    - current_slots: huidige slot-index per leerling (None = geen plaats)
+    - slot_banks: bank-index per slot (bepaalt wie naast wie zit)
+    - mode: "random", "constrained" (vermijd zelfde plaats en zelfde bankgenoten
+      als in eerdere verdelingen) of "rotation" (iedereen schuift telkens op).
+    Returned: lijst van `count` lijsten met per leerling een slot-index (of None).
+    Met dezelfde seed krijg je steeds dezelfde reeks verdelingen.
+    """
+    rng = random.Random(seed)
+    n = len(current_slots)
+    n_slots = len(slot_banks)
+    seated = min(n, n_slots)
+
+    def random_arrangement():
+        order = list(range(n))
+        rng.shuffle(order)
+        slots = rng.sample(range(n_slots), seated)
+        arrangement = [None]*n
+        for i, slot in zip(order, slots):
+            arrangement[i] = slot
+        return arrangement
+
+    def bank_pairs(arrangement):
+        by_bank = {}
+        for i, slot in enumerate(arrangement):
+            if slot is not None:
+                by_bank.setdefault(slot_banks[slot], []).append(i)
+        pairs = set()
+        for members in by_bank.values():
+            for a in range(len(members)):
+                for b in range(a+1, len(members)):
+                    pairs.add((min(members[a], members[b]), max(members[a], members[b])))
+        return pairs
+
+    arrangements = []
+    if mode == "rotation":
+        # vertrek van de huidige verdeling; leerlingen zonder plaats krijgen eerst een vrije plaats
+        start = [s if isinstance(s, int) and s < n_slots else None for s in current_slots]
+        free = [i for i in range(n_slots) if i not in set(start)]
+        for i in range(n):
+            if start[i] is None and free:
+                start[i] = free.pop(0)
+        step = max(1, n_slots // max(1, count))
+        for k in range(count):
+            arrangements.append([None if s is None else (s + k*step) % n_slots for s in start])
+    elif mode == "constrained":
+        seen_pairs = set()
+        previous = list(current_slots)
+        for _ in range(count):
+            best, best_score = None, None
+            for _ in range(max(1, attempts)):
+                cand = random_arrangement()
+                pairs = bank_pairs(cand)
+                score = (sum(1 for i in range(n) if cand[i] is not None and cand[i] == previous[i])
+                         + len(pairs & seen_pairs))
+                if best is None or score < best_score:
+                    best, best_score = cand, score
+                    if score == 0:
+                        break
+            arrangements.append(best)
+            seen_pairs |= bank_pairs(best)
+            previous = best
+    else:
+        for _ in range(count):
+            arrangements.append(random_arrangement())
+    return arrangements
+
+def parse_seed(text):
+    """Seed uit invoertekst: cijfers worden een int (zodat GUI en CLI dezelfde reeks geven)."""
+    if text is None:
+        return None
+    text = str(text).strip()
+    if not text:
+        return None
+    return int(text) if text.lstrip("-").isdigit() else text
+
+def valid_slot(slot, n_slots):
+    return slot is not None and isinstance(slot, int) and slot < n_slots
+
+def auto_assign(students, n_slots):
+    """Geef leerlingen zonder (geldige) plaats de eerste vrije plaatsen, in volgorde."""
+    used = set(s["slot"] for s in students if valid_slot(s["slot"], n_slots))
+    free = [i for i in range(n_slots) if i not in used]
+    for s in students:
+        if not valid_slot(s["slot"], n_slots):
+            if free:
+                s["slot"] = free.pop(0)
+            else:
+                s["slot"] = None
+
+def shuffle_students(students, n_slots, rng=random):
+    """Schud de volgorde van de leerlingen (in place) en zet ze op plaats 0, 1, 2, ..."""
+    rng.shuffle(students)
+    for i, s in enumerate(students):
+        s["slot"] = i if i < n_slots else None
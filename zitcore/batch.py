@@ -0,0 +1,273 @@
+"""
+Batch-export van veel opgeslagen verdelingen tegelijk, verdeeld over een procespool.
+
+Elke worker leest één verdeling (foto's rechtstreeks uit de assets-zip), codeert de
+foto's één keer als JPEG en schrijft er een PDF van (of, met ext=".png"/".webp",
+een afbeelding op de gevraagde resolutie, zie zitcore.rasterexport). De worker geeft een kleine
+page_spec terug (namen, slots, JPEG-bytes), waarmee het hoofdproces desgewenst een
+gebundelde PDF (booklet) samenstelt zonder iets opnieuw te laden of te coderen.
+
+Batch-import doet het omgekeerde voor Smartschool-klaslijsten: elke worker rastert
+één PDF, leest aantal en namen (zie zitcore.classlist), snijdt de foto's uit en
+bewaart een verdeling per klas in de standaardopstelling voor dat aantal.
+"""
+import os
+import sys
+import glob
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .seating import is_seating_file
+
+def find_seating_files(inputs, skipped=None):
+    """
+    Zet mappen, globpatronen en losse bestanden om naar een gesorteerde lijst van
+    verdelingen. Mappen en globs leveren enkel bestanden met bijhorende assets op;
+    een oude .json naast een .zit met dezelfde naam (de herbewaarde versie) valt weg
+    en komt in de lijst skipped (als die meegegeven is).
+    """
+    found = []
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = glob.glob(os.path.join(item, "*.zit")) + glob.glob(os.path.join(item, "*.json"))
+        elif any(ch in item for ch in "*?["):
+            candidates = glob.glob(item)
+        else:
+            found.append(item)
+            continue
+        zits = {os.path.splitext(os.path.abspath(p))[0].lower() for p in candidates if p.lower().endswith(".zit")}
+        for p in sorted(p for p in candidates if is_seating_file(p)):
+            if p.lower().endswith(".json") and os.path.splitext(os.path.abspath(p))[0].lower() in zits:
+                if skipped is not None:
+                    skipped.append(p)
+                continue
+            found.append(p)
+    # dubbels weg, volgorde behouden
+    seen = set()
+    return [p for p in found if not (os.path.abspath(p) in seen or seen.add(os.path.abspath(p)))]
+
+def unique_output_paths(paths, out_dir=None, ext=".pdf"):
+    """
+    Uitvoerpad per verdeling: in out_dir, of naast de verdeling zelf. a/3A.zit en b/3A.zit
+    (of 3A.zit en 3A.json) zouden anders allebei 3A.pdf schrijven, eventueel tegelijk;
+    latere krijgen ' (2)', ' (3)', ... (hoofdletterongevoelig, zoals bestandsnamen op
+    Windows). Returned: {pad: uitvoerpad}.
+    """
+    outs, taken = {}, set()
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        folder = out_dir or os.path.dirname(path)
+        out = os.path.join(folder, stem + ext)
+        k = 1
+        while os.path.abspath(out).lower() in taken:
+            k += 1
+            out = os.path.join(folder, f"{stem} ({k}){ext}")
+        taken.add(os.path.abspath(out).lower())
+        outs[path] = out
+    return outs
+
+def export_one(path, out_dir=None, want_spec=False, ext=".pdf", size=None, outs=None):
+    """
+    Worker: exporteer één verdeling naar PDF, of naar PNG/WebP (ext) van size pixels
+    (outs: {pad: uitvoerpad} uit unique_output_paths, anders naar de bestandsnaam).
+    Returned: dict(path, out, seconds, pages, missing, error, spec). Fouten worden
+    niet opgeworpen maar teruggegeven, zodat één kapot bestand de batch niet stopt.
+    """
+    t0 = time.perf_counter()
+    result = {"path": path, "out": None, "seconds": 0.0, "missing": [], "error": None, "spec": None}
+    try:
+        from .config import plan_title
+        from .layouts import LAYOUTS, page_size_for
+        from .geometry import compute_geometry
+        from .seating import load_seating_files, resolve_layout
+
+        data, students, missing = load_seating_files(path)
+        cfg = LAYOUTS[resolve_layout(data)]
+        geometry = compute_geometry(cfg, page_size_for(cfg))
+        title = plan_title(data.get("class", ""), data.get("room", ""))
+        placements = [(s, s["slot"]) for s in students]
+
+        out = (outs or {}).get(path) or unique_output_paths([path], out_dir, ext)[path]
+        spec = None
+        if ext == ".pdf":
+            from .pdfexport import ExportImageCache, page_spec, write_pages
+            spec = page_spec(geometry, title, placements, ExportImageCache())
+            write_pages(out, [spec])
+        else:
+            from .rasterexport import RASTER_SIZES, write_raster
+            write_raster(out, geometry, title, placements, size or RASTER_SIZES["1080p"])
+        result.update(out=out, missing=missing, spec=spec if want_spec else None)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - t0
+    return result
+
+def batch_export(paths, out_dir=None, booklet=None, jobs=None, report=None, ext=".pdf", size=None):
+    """
+    Exporteer alle verdelingen in `paths` parallel (jobs processen, standaard alle cores).
+    booklet: optioneel pad voor één gebundelde PDF met alle verdelingen in volgorde.
+    ext: ".pdf", of ".png"/".webp" voor afbeeldingen van size (breedte, hoogte) pixels.
+    report: callable(result) die per afgewerkt bestand aangeroepen wordt.
+    Returned: lijst resultaten (zie export_one), in de volgorde van paths.
+    """
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    if booklet and ext != ".pdf":
+        raise ValueError("Een bundel kan enkel als PDF.")
+    want_spec = bool(booklet)
+    outs = unique_output_paths(paths, out_dir, ext)
+    results = _run_all(export_one, paths, (out_dir, want_spec, ext, size, outs), jobs, report,
+                       {"out": None, "missing": [], "spec": None})
+
+    if booklet:
+        from .pdfexport import write_pages
+        specs = [r["spec"] for r in results if r and r["spec"]]
+        if specs:
+            write_pages(booklet, specs)
+    return results
+
+def _run_all(worker, paths, args, jobs, report, failed):
+    """
+    worker(path, *args) voor elk pad, parallel over jobs processen (1 = in dit proces).
+    failed: extra velden voor het resultaat van een gecrashte worker.
+    Returned: resultaten in de volgorde van paths.
+    """
+    results = [None]*len(paths)
+    if jobs == 1 or len(paths) <= 1:
+        for i, p in enumerate(paths):
+            results[i] = worker(p, *args)
+            if report: report(results[i])
+        return results
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {pool.submit(worker, p, *args): i for i, p in enumerate(paths)}
+        for fut in as_completed(futures):
+            i = futures[fut]
+            try:
+                results[i] = fut.result()
+            except Exception as e:  # bv. een gecrashte worker
+                results[i] = dict(failed, path=paths[i], seconds=0.0, error=f"{type(e).__name__}: {e}")
+            if report: report(results[i])
+    return results
+
+def find_class_pdfs(inputs):
+    """Mappen, globpatronen en losse bestanden -> gesorteerde lijst van PDF's (zonder dubbels)."""
+    found = []
+    for item in inputs:
+        if os.path.isdir(item):
+            found.extend(sorted(glob.glob(os.path.join(item, "*.pdf")) + glob.glob(os.path.join(item, "*.PDF"))))
+        elif any(ch in item for ch in "*?["):
+            found.extend(sorted(glob.glob(item)))
+        else:
+            found.append(item)
+    seen = set()
+    return [p for p in found if not (os.path.abspath(p) in seen or seen.add(os.path.abspath(p)))]
+
+def unique_class_names(paths):
+    """
+    Klasnaam per PDF (zie classlist.class_name_from_path), uniek binnen de batch: 'Klaslijst 3A.pdf'
+    en '3A.pdf' zouden anders allebei 3A.zit (of 3A_fotos.zip) schrijven, eventueel tegelijk.
+    Latere PDF's met dezelfde naam krijgen ' (2)', ' (3)', ... (hoofdletterongevoelig,
+    zoals bestandsnamen op Windows). Returned: {pad: klasnaam}.
+    """
+    from .classlist import class_name_from_path
+    from .seating import safe_filename
+    names, taken = {}, set()
+    for path in paths:
+        base = name = class_name_from_path(path)
+        k = 1
+        while safe_filename(name).lower() in taken:
+            k += 1
+            name = f"{base} ({k})"
+        taken.add(safe_filename(name).lower())
+        names[path] = name
+    return names
+
+def import_one(pdf_path, out_dir, room="lokaal", extension=".zit", class_names=None):
+    """
+    Worker: één klaslijst-PDF -> één opgeslagen verdeling in out_dir, genoemd naar de klas
+    (class_names: {pad: klasnaam} uit unique_class_names, anders uit de bestandsnaam).
+    Returned: dict(path, out, seconds, count, names, layout, error). Fouten worden
+    teruggegeven, niet opgeworpen.
+    """
+    t0 = time.perf_counter()
+    result = {"path": pdf_path, "out": None, "seconds": 0.0, "count": 0, "names": 0, "layout": None,
+              "warnings": [], "error": None}
+    try:
+        from .layouts import LAYOUTS, default_layout_for, page_size_for
+        from .geometry import compute_geometry
+        from .imaging import crop_pdf_photos
+        from .arrange import auto_assign
+        from .pdfimport import convert_pdf_pages
+        from .classlist import read_words, analyze_class_list, class_name_from_path
+        from .seating import make_student, save_seating_files, safe_filename
+        from .pdfexport import fit_pdf_font_size
+        from .photocheck import check_photos, describe_problems
+
+        pages = convert_pdf_pages(pdf_path)
+        count, names, long_names = analyze_class_list(pages, read_words(pdf_path))
+        if not count:
+            raise ValueError("Geen foto's gevonden op de klaslijst.")
+        photos = crop_pdf_photos(pages, count, long_names)
+        del pages
+        report = check_photos(photos, pdf=True)
+        if report:
+            result["warnings"] = describe_problems(report, names)
+
+        class_name = (class_names or {}).get(pdf_path) or class_name_from_path(pdf_path)
+        if class_name != class_name_from_path(pdf_path):
+            result["warnings"].append(f"een andere klaslijst heet ook {class_name_from_path(pdf_path)}: bewaard als {class_name}")
+        layout_name = default_layout_for(count)
+        cfg = LAYOUTS[layout_name]
+        geometry = compute_geometry(cfg, page_size_for(cfg))
+        students = []
+        for i, pil in enumerate(photos):
+            name = names[i] if i < len(names) and names[i] else f"leerling_{i+1}"
+            students.append(make_student(name, pil, source=pdf_path, pdf_index=i,
+                                         font_size=fit_pdf_font_size(name, geometry["seat_size"]*0.95)))
+        auto_assign(students, len(geometry["base_slots"]))
+
+        out = os.path.join(out_dir, safe_filename(class_name) + extension)
+        meta = {"class": class_name, "room": room, "layout": layout_name,
+                "pdf_multiline_rows": {pdf_path: long_names}}
+        # één proces per PDF: binnen de worker niet nog eens parallel coderen
+        save_seating_files(out, meta, students, placeholder_size=geometry["seat_size"], workers=1)
+        result.update(out=out, count=count, names=sum(1 for n in names if n), layout=layout_name)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - t0
+    return result
+
+def batch_import(paths, out_dir, room="lokaal", extension=".zit", jobs=None, report=None):
+    """
+    Importeer alle klaslijsten in `paths` parallel (jobs processen, standaard alle cores)
+    naar verdelingen in out_dir. report: callable(result) per afgewerkte PDF.
+    Returned: lijst resultaten (zie import_one), in de volgorde van paths.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    # uitvoernamen vooraf vastleggen: parallelle workers mogen niet naar hetzelfde bestand schrijven
+    class_names = unique_class_names(paths)
+    return _run_all(import_one, paths, (out_dir, room, extension, class_names), jobs, report,
+                    {"out": None, "count": 0, "names": 0, "layout": None, "warnings": []})
+
+def print_import_report(result, stream=None):
+    stream = stream or sys.stdout
+    name = os.path.basename(result["path"])
+    if result["error"]:
+        print(f"FOUT {result['seconds']:7.2f}s  {name}: {result['error']}", file=stream)
+    else:
+        names = "" if result["names"] == result["count"] else f", {result['names']} namen gevonden"
+        print(f"OK   {result['seconds']:7.2f}s  {name} -> {result['out']} ({result['count']} leerlingen{names}; {result['layout']})",
+              file=stream)
+        for line in result.get("warnings", ()):
+            print(f"     controleer: {line}", file=stream)
+    stream.flush()
+
+def print_report(result, stream=None):
+    stream = stream or sys.stdout
+    name = os.path.basename(result["path"])
+    if result["error"]:
+        print(f"FOUT {result['seconds']:7.2f}s  {name}: {result['error']}", file=stream)
+    else:
+        extra = f"  ({len(result['missing'])} foto('s) ontbreken)" if result["missing"] else ""
+        print(f"OK   {result['seconds']:7.2f}s  {name} -> {result['out']}{extra}", file=stream)
+    stream.flush()
@@ -0,0 +1,113 @@
+"""
+Een Smartschool-klaslijst automatisch lezen: hoeveel leerlingen, hun namen en
+welke rijen lange namen (over twee regels) hebben.
+
+De namen komen uit de tekstlaag van de PDF via `pdftotext -bbox` (poppler, dat
+ook pdf2image gebruikt): elk woord met zijn kader. Een woord hoort bij de foto
+waaronder het staat. Staan de namen onder een foto op twee regels, dan schuift
+de rest van de pagina naar beneden (zie pdf_crop_box). Zonder tekstlaag tellen
+we de foto's op de gerasterde pagina's: het eerste lege vak is het einde.
+"""
+import os
+import re
+import html
+import shutil
+import subprocess
+
+from PIL import ImageStat
+
+from .config import PDF_COLS, PDF_ROWS, PDF_H_SPACING, PDF_V_SPACING, PDF_LONG_NAME_SHIFT
+from .imaging import PDF_PHOTOS_PER_PAGE, pdf_crop_box
+from .pdfimport import ensure_poppler
+from .trace import traced
+
+_PAGE_RE = re.compile(r'<page\s+width="([\d.]+)"\s+height="([\d.]+)"\s*>(.*?)</page>', re.S)
+_WORD_RE = re.compile(r'<word\s+xMin="([\d.]+)"\s+yMin="([\d.]+)"\s+xMax="([\d.]+)"\s+yMax="([\d.]+)"\s*>(.*?)</word>', re.S)
+
+# een vak is leeg als de grijswaarden bijna niet variëren en bijna wit zijn
+BLANK_STDDEV = 4
+BLANK_MEAN = 245
+
+def parse_bbox_html(text):
+    """
+    Uitvoer van `pdftotext -bbox` -> per pagina (breedte, hoogte, woorden) in punten;
+    een woord is (tekst, x0, y0, x1, y1) met y van boven naar beneden.
+    """
+    pages = []
+    for m in _PAGE_RE.finditer(text):
+        words = [(html.unescape(w[4]).strip(), float(w[0]), float(w[1]), float(w[2]), float(w[3]))
+                 for w in _WORD_RE.findall(m.group(3))]
+        pages.append((float(m.group(1)), float(m.group(2)), [w for w in words if w[0]]))
+    return pages
+
+@traced("pdf.text")
+def read_words(pdf_path, timeout=60):
+    """Woorden met hun kader per pagina (zie parse_bbox_html), of None zonder pdftotext."""
+    ensure_poppler()
+    exe = shutil.which("pdftotext")
+    if not exe:
+        return None
+    try:
+        out = subprocess.run([exe, "-bbox", "-enc", "UTF-8", pdf_path, "-"], capture_output=True,
+                             timeout=timeout, check=True).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return parse_bbox_html(out.decode("utf-8", errors="replace"))
+
+def is_blank(page_img, box):
+    stat = ImageStat.Stat(page_img.crop(box).convert("L"))
+    return stat.stddev[0] < BLANK_STDDEV and stat.mean[0] > BLANK_MEAN
+
+def _lines(words):
+    """Groepeer woorden per regel (op hun bovenkant) en geef de regels als tekst, van boven naar beneden."""
+    lines = []
+    for w in sorted(words, key=lambda w: (w[2], w[1])):
+        height = w[4] - w[2]
+        if lines and abs(lines[-1][0] - w[2]) <= height / 2:
+            lines[-1][1].append(w)
+        else:
+            lines.append((w[2], [w]))
+    return [" ".join(x[0] for x in sorted(ws, key=lambda x: x[1])) for _, ws in lines]
+
+@traced("pdf.names")
+def analyze_class_list(pages, words=None):
+    """
+    pages: gerasterde pagina's (convert_pdf_pages); words: read_words() of None.
+    Returned: (count, names, multiline_rows_per_page) — names is leeg zonder tekstlaag,
+    multiline_rows_per_page in het formaat van crop_pdf_photos.
+    """
+    names = []
+    multiline = []
+    count = 0
+    for p, page in enumerate(pages):
+        flags = [False] * (PDF_ROWS - 1)
+        multiline.append(flags)
+        page_words = None
+        if words and p < len(words):
+            width_pt, _, page_words = words[p]
+            scale = page.size[0] / width_pt   # punten -> pixels van de gerasterde pagina
+        gray = page.convert("L")
+        for r in range(PDF_ROWS):
+            for c in range(PDF_COLS):
+                i = p * PDF_PHOTOS_PER_PAGE + r * PDF_COLS + c
+                box = pdf_crop_box(i, page.size, multiline)
+                if is_blank(gray, box):
+                    return count, names[:count], multiline
+                count += 1
+                if page_words is None:
+                    continue
+                x1, y1, x2, y2 = box
+                zone = (x1 - PDF_H_SPACING / 2, y2, x2 + PDF_H_SPACING / 2, y2 + PDF_V_SPACING + PDF_LONG_NAME_SHIFT)
+                cell = [w for w in page_words
+                        if zone[0] <= (w[1] + w[3]) / 2 * scale < zone[2] and zone[1] <= (w[2] + w[4]) / 2 * scale < zone[3]]
+                lines = _lines(cell)
+                names.append(" ".join(lines))
+                if len(lines) > 1 and r < PDF_ROWS - 1:
+                    flags[r] = True
+    return count, names[:count], multiline
+
+def class_name_from_path(pdf_path):
+    """Klasnaam uit de bestandsnaam: 'Klaslijst 3A.pdf' -> '3A', '5 WEWI.pdf' -> '5 WEWI'."""
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    stem = re.sub(r"^(klaslijst|klas|fotolijst)[\s_-]*", "", stem, flags=re.I)
+    return stem.replace("_", " ").strip() or "klas"
@@ -0,0 +1,311 @@
+"""
+Command-line gebruik zonder venster, bv. op een server of in een geplande taak:
+
+    zitplaatsen export --pdf klaslijst.pdf --names namen.txt --layout "Labo" --out plan.pdf
+    zitplaatsen export --folder fotos/ --layout "Lang type" --class 3A --room B12 --out plan.pdf
+    zitplaatsen render verdeling.zit --out plan.pdf
+    zitplaatsen render verdeling.zit --out bord.png --size 4K
+    zitplaatsen batch-export verdelingen/ --out-dir pdf/ --booklet alles.pdf --jobs 4
+    zitplaatsen batch-export verdelingen/ --out-dir beeld/ --format webp --size 1080p
+    zitplaatsen batch-import klaslijsten/ --out-dir verdelingen/ --jobs 4
+    zitplaatsen layouts --search b12
+    zitplaatsen --library //server/opstellingen export --folder fotos/ --layout "B12" --out plan.pdf
+
+Zware modules (PIL, reportlab, pdf2image) worden pas per commando geïmporteerd,
+en tkinter nooit.
+"""
+import os
+import sys
+import argparse
+import random
+
+from .config import plan_title, RASTER_SIZES
+from .layouts import LAYOUTS, find_layout, parse_pattern_text, page_size_for, read_layout_file
+from .arrange import ROTATION_MODES
+
+def _read_names(path):
+    with open(path, "r", encoding="utf-8-sig") as f:
+        return [line.strip() for line in f if line.strip()]
+
+def _parse_long_names(values, count):
+    """
+    --long-names PAGINA:RIJ[,RIJ...] (1-gebaseerd, herhaalbaar) -> per pagina een lijst
+    booleans, in het formaat dat crop_pdf_photos verwacht.
+    """
+    from .imaging import pdf_rows_to_query
+    result = [[False]*n for n in pdf_rows_to_query(count)]
+    for spec in values or []:
+        page_txt, _, rows_txt = spec.partition(":")
+        if not page_txt.strip().isdigit() or not rows_txt.strip():
+            raise ValueError(f"Ongeldige --long-names '{spec}' (verwacht bv. 1:2,4)")
+        page = int(page_txt) - 1
+        for r in rows_txt.split(","):
+            r = r.strip()
+            if not r.isdigit():
+                raise ValueError(f"Ongeldige rij in --long-names '{spec}'")
+            row = int(r) - 1
+            if 0 <= page < len(result) and 0 <= row < len(result[page]):
+                result[page][row] = True
+    return result
+
+def _layout_from_args(args):
+    """Returned: (layout_name, cfg). Een --pattern of --layout-file wordt de 'Eigen opstelling'."""
+    if args.layout_file:
+        _, cfg = read_layout_file(args.layout_file)
+        if args.orientation:
+            cfg = dict(cfg, orientation=args.orientation)
+        LAYOUTS["Eigen opstelling"] = cfg
+        return "Eigen opstelling", cfg
+    if args.pattern:
+        cfg = {"regular": False, "pattern": parse_pattern_text(args.pattern),
+               "orientation": args.orientation or "landscape", "center_first_row": True}
+        LAYOUTS["Eigen opstelling"] = cfg
+        return "Eigen opstelling", cfg
+    name = find_layout(args.layout) if args.layout else next(iter(LAYOUTS))
+    cfg = LAYOUTS[name]
+    if args.orientation and args.orientation != cfg.get("orientation"):
+        cfg = dict(cfg, orientation=args.orientation)
+    return name, cfg
+
+def _placements_pages(students, geometry, args):
+    """Eén pagina met de huidige verdeling, of --rotations K geseede verdelingen."""
+    from .arrange import generate_arrangements, parse_seed
+    if not args.rotations:
+        return [[(s, s["slot"]) for s in students]], None
+    arrangements = generate_arrangements([s["slot"] for s in students],
+                                         [slot["bank"] for slot in geometry["base_slots"]],
+                                         args.rotations, mode=args.mode, seed=parse_seed(args.seed))
+    labels = [f"Verdeling {k+1}/{len(arrangements)}" for k in range(len(arrangements))]
+    return [list(zip(students, a)) for a in arrangements], labels
+
+def _write_plan(out, geometry, title, pages, labels, args):
+    """
+    Schrijf de pagina's naar out: een PDF, of per verdeling een PNG/WebP (volgens de
+    extensie) van --size pixels. Returned: een korte beschrijving van wat bewaard is.
+    """
+    from .rasterexport import is_raster_path, parse_raster_size, write_raster, numbered_paths, RasterCache
+    if not is_raster_path(out):
+        from .pdfexport import write_pdf
+        write_pdf(out, geometry, title, pages, page_labels=labels)
+        return f"PDF opgeslagen: {out}"
+    size, cache = parse_raster_size(args.size), RasterCache()
+    paths = numbered_paths(out, len(pages))
+    for k, (fpath, placements) in enumerate(zip(paths, pages)):
+        write_raster(fpath, geometry, f"{title} · {labels[k]}" if labels else title, placements, size, cache)
+    return f"Afbeelding opgeslagen: {paths[0]}" if len(paths) == 1 else f"{len(paths)} afbeeldingen opgeslagen: {paths[0]} ..."
+
+def cmd_export(args):
+    from .imaging import list_folder_images, load_square_image, crop_pdf_photos
+    from .geometry import compute_geometry
+    from .arrange import auto_assign, shuffle_students, parse_seed
+    from .seating import make_student, save_seating_files
+    from .pdfexport import fit_pdf_font_size
+
+    names = _read_names(args.names) if args.names else []
+    layout_name, cfg = _layout_from_args(args)
+    geometry = compute_geometry(cfg, page_size_for(cfg))
+
+    photos = []  # (default_name, pil, source, pdf_index)
+    if args.pdf:
+        from .pdfimport import convert_pdf_pages
+        count = args.count or len(names)
+        if not count:
+            raise ValueError("Geef --count of een --names bestand om het aantal leerlingen te kennen.")
+        long_names = _parse_long_names(args.long_names, count)
+        pages = convert_pdf_pages(args.pdf)
+        for i, pil in enumerate(crop_pdf_photos(pages, count, long_names)):
+            photos.append((f"leerling_{i+1}", pil, args.pdf, i))
+        multiline_rows = {args.pdf: long_names}
+    else:
+        for f in list_folder_images(args.folder):
+            path = os.path.join(args.folder, f)
+            try:
+                pil = load_square_image(path)
+            except Exception as e:
+                print(f"Overgeslagen: {f} ({e})", file=sys.stderr)
+                continue
+            photos.append((os.path.splitext(f)[0], pil, path, None))
+        multiline_rows = {}
+    if not photos:
+        raise ValueError("Geen foto's gevonden.")
+    from .photocheck import check_photos, describe_problems
+    report = check_photos([p[1] for p in photos], pdf=bool(args.pdf))
+    if report:
+        labels = [names[i] if i < len(names) else p[0] for i, p in enumerate(photos)]
+        for line in describe_problems(report, labels, limit=None):
+            print(f"Waarschuwing: {line}", file=sys.stderr)
+
+    students = []
+    for i, (default_name, pil, source, pdf_index) in enumerate(photos):
+        name = names[i] if i < len(names) else default_name
+        font_size = fit_pdf_font_size(name, geometry["seat_size"]*0.95)
+        students.append(make_student(name, pil, source=source, pdf_index=pdf_index, font_size=font_size))
+    if args.shuffle:
+        shuffle_students(students, len(geometry["base_slots"]), rng=random.Random(parse_seed(args.seed)))
+    else:
+        auto_assign(students, len(geometry["base_slots"]))
+
+    title = plan_title(args.class_name, args.room)
+    pages, labels = _placements_pages(students, geometry, args)
+    msg = _write_plan(args.out, geometry, title, pages, labels, args)
+    print(f"{msg} ({len(students)} leerlingen, {len(pages)*max(1, len(geometry['tiles']))} pagina('s))")
+
+    if args.save:
+        meta = {"class": args.class_name, "room": args.room, "layout": layout_name,
+                "custom_layout": LAYOUTS.get("Eigen opstelling"), "pdf_multiline_rows": multiline_rows}
+        save_seating_files(args.save, meta, students, placeholder_size=geometry["seat_size"])
+        print(f"Verdeling opgeslagen: {args.save}")
+    return 0
+
+def cmd_render(args):
+    from .geometry import compute_geometry
+    from .seating import load_seating_files, resolve_layout
+
+    data, students, missing = load_seating_files(args.seating)
+    for fname in missing:
+        print(f"Ontbrekende afbeelding vervangen door placeholder: {fname}", file=sys.stderr)
+    cfg = LAYOUTS[resolve_layout(data)]
+    geometry = compute_geometry(cfg, page_size_for(cfg))
+    out = args.out or os.path.splitext(args.seating)[0] + ".pdf"
+    title = plan_title(data.get("class", ""), data.get("room", ""))
+    pages, labels = _placements_pages(students, geometry, args)
+    print(_write_plan(out, geometry, title, pages, labels, args))
+    return 0
+
+def cmd_batch_export(args):
+    import time
+    from .batch import find_seating_files, batch_export, print_report
+    from .rasterexport import parse_raster_size
+
+    ext = "." + args.format
+    size = parse_raster_size(args.size) if ext != ".pdf" else None
+    if args.booklet and ext != ".pdf":
+        raise ValueError("--booklet kan enkel met --format pdf.")
+    skipped = []
+    paths = find_seating_files(args.inputs, skipped)
+    for p in skipped:
+        print(f"Overgeslagen: {p} (er staat een .zit met dezelfde naam naast)", file=sys.stderr)
+    if not paths:
+        raise ValueError("Geen opgeslagen verdelingen gevonden.")
+    print(f"{len(paths)} verdeling(en) exporteren...")
+    t0 = time.perf_counter()
+    results = batch_export(paths, out_dir=args.out_dir, booklet=args.booklet, jobs=args.jobs, report=print_report,
+                           ext=ext, size=size)
+    failed = [r for r in results if r["error"]]
+    print(f"Klaar in {time.perf_counter() - t0:.2f}s: {len(results) - len(failed)} gelukt, {len(failed)} mislukt.")
+    if args.booklet and len(failed) < len(results):
+        print(f"Bundel opgeslagen: {args.booklet}")
+    return 1 if failed else 0
+
+def cmd_batch_import(args):
+    import time
+    from .batch import find_class_pdfs, batch_import, print_import_report
+
+    paths = find_class_pdfs(args.inputs)
+    if not paths:
+        raise ValueError("Geen klaslijsten (PDF) gevonden.")
+    print(f"{len(paths)} klaslijst(en) importeren...")
+    t0 = time.perf_counter()
+    extension = ".zit" if args.format == "zit" else ".json"
+    results = batch_import(paths, args.out_dir, room=args.room, extension=extension, jobs=args.jobs,
+                           report=print_import_report)
+    failed = [r for r in results if r["error"]]
+    print(f"Klaar in {time.perf_counter() - t0:.2f}s: {len(results) - len(failed)} gelukt, {len(failed)} mislukt.")
+    return 1 if failed else 0
+
+def cmd_layouts(args):
+    if args.json:
+        # als vrije opstelling, om als vertrekpunt te bewerken (zie --layout-file)
+        import json
+        from .layouts import compile_layout, layout_to_json
+        name = find_layout(args.json)
+        print(json.dumps(dict(name=name, **layout_to_json(compile_layout(LAYOUTS[name]))), ensure_ascii=False, indent=2))
+        return 0
+    from .library import catalog, search_layouts
+    rows = catalog(LAYOUTS.library)
+    if args.search:
+        rows = search_layouts(rows, args.search)
+    for row in rows:
+        room = f", {row['room']}" if row["room"] else ""
+        print(f"{row['name']}  [{row['orientation']}, {row['seats']} plaatsen{room}]")
+    if LAYOUTS.library is not None:
+        print(f"Bibliotheek: {LAYOUTS.library.folder} ({len(LAYOUTS.library)} opstellingen)", file=sys.stderr)
+        for fname, err in LAYOUTS.library.errors:
+            print(f"  overgeslagen: {fname}: {err}", file=sys.stderr)
+    return 0
+
+def _add_rotation_args(p):
+    p.add_argument("--rotations", type=int, metavar="K", help="schrijf K geseede verdelingen als pagina's")
+    p.add_argument("--mode", choices=list(ROTATION_MODES), default="constrained", help="soort verdeling bij --rotations")
+    p.add_argument("--seed", help="seed voor --shuffle/--rotations (zelfde seed = zelfde verdeling)")
+
+def _add_size_arg(p):
+    p.add_argument("--size", default="1080p", help=f"resolutie van een afbeelding: {', '.join(RASTER_SIZES)} of BxH (standaard 1080p)")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="zitplaatsen", description="Zitplaatsen zonder venster: importeren, verdelen en exporteren.")
+    parser.add_argument("--library", metavar="MAP", help="map met gedeelde opstellingen (standaard: ZITPLAATSEN_LAYOUTS)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("export", help="foto's importeren (PDF of map) en als PDF exporteren")
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("--pdf", help="Smartschool-klaslijst (PDF)")
+    src.add_argument("--folder", help="map met jpg/png-foto's")
+    p.add_argument("--names", help="tekstbestand met één naam per regel")
+    p.add_argument("--count", type=int, help="aantal leerlingen in de PDF (standaard: aantal namen)")
+    p.add_argument("--long-names", action="append", metavar="PAGINA:RIJ,...",
+                   help="rijen met namen over twee regels, bv. 1:2,4 (herhaalbaar)")
+    lay = p.add_mutually_exclusive_group()
+    lay.add_argument("--layout", help="naam (of begin van de naam) van de opstelling")
+    lay.add_argument("--pattern", help="eigen patroon, bv. '4;3,3,3;3,3,3'")
+    lay.add_argument("--layout-file", help="opstelling uit een JSON-bestand (ook vrij: banken met coördinaten)")
+    p.add_argument("--orientation", choices=["portrait", "landscape"])
+    p.add_argument("--class", dest="class_name", default="klas")
+    p.add_argument("--room", default="lokaal")
+    p.add_argument("--shuffle", action="store_true", help="leerlingen willekeurig verdelen")
+    _add_rotation_args(p)
+    p.add_argument("--out", required=True, help="doel-PDF, of .png/.webp voor een afbeelding")
+    _add_size_arg(p)
+    p.add_argument("--save", help="bewaar ook de verdeling (.zit, of .json + fotopakket)")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("render", help="opgeslagen verdeling (.zit of .json) als PDF exporteren")
+    p.add_argument("seating")
+    p.add_argument("--out", help="doel-PDF of .png/.webp (standaard een PDF naast de verdeling)")
+    _add_size_arg(p)
+    _add_rotation_args(p)
+    p.set_defaults(func=cmd_render)
+
+    p = sub.add_parser("batch-export", help="veel opgeslagen verdelingen parallel als PDF of afbeelding exporteren")
+    p.add_argument("inputs", nargs="+", help="mappen, globpatronen (bv. 'lokalen/*.zit') of bestanden")
+    p.add_argument("--out-dir", help="map voor de PDF's of afbeeldingen (standaard naast elke verdeling)")
+    p.add_argument("--format", choices=["pdf", "png", "webp"], default="pdf")
+    _add_size_arg(p)
+    p.add_argument("--booklet", help="bundel alle verdelingen ook in één PDF")
+    p.add_argument("--jobs", type=int, help="aantal processen (standaard: alle cores)")
+    p.set_defaults(func=cmd_batch_export)
+
+    p = sub.add_parser("batch-import", help="veel Smartschool-klaslijsten parallel importeren, één verdeling per klas")
+    p.add_argument("inputs", nargs="+", help="mappen, globpatronen (bv. 'klaslijsten/*.pdf') of bestanden")
+    p.add_argument("--out-dir", required=True, help="map voor de verdelingen (genoemd naar de klas)")
+    p.add_argument("--room", default="lokaal")
+    p.add_argument("--format", choices=["zit", "json"], default="zit", help="één .zit-bestand, of .json + fotopakket")
+    p.add_argument("--jobs", type=int, help="aantal processen (standaard: alle cores)")
+    p.set_defaults(func=cmd_batch_import)
+
+    p = sub.add_parser("layouts", help="beschikbare opstellingen tonen")
+    p.add_argument("--json", metavar="OPSTELLING", help="toon deze opstelling als vrije opstelling (JSON)")
+    p.add_argument("--search", metavar="TEKST", help="enkel opstellingen met deze woorden in naam of lokaal")
+    p.set_defaults(func=cmd_layouts)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        from .library import open_library
+        open_library(args.library)
+        return args.func(args)
+    except (OSError, ValueError, KeyError) as e:
+        msg = e.args[0] if isinstance(e, KeyError) and e.args else e
+        print(f"Fout: {msg}", file=sys.stderr)
+        return 1
@@ -0,0 +1,107 @@
+import os
+import sys
+
+# ---------- helper resource path (PyInstaller safe) ----------
+def resource_path(rel_path):
+    if hasattr(sys, "_MEIPASS"):
+        return os.path.join(sys._MEIPASS, rel_path)
+    return os.path.join(os.path.abspath("."), rel_path)
+
+# ---------- map voor gebruikersdata (autosave, caches) ----------
+def user_data_dir(*parts):
+    """
+    Schrijfbare map per gebruiker: %APPDATA%\\Zitplaatsen, ~/Library/Application Support/Zitplaatsen
+    of ~/.local/share/zitplaatsen. ZITPLAATSEN_HOME overschrijft dit (bv. voor een USB-stick).
+    """
+    base = os.environ.get("ZITPLAATSEN_HOME")
+    if not base:
+        if sys.platform.startswith("win"):
+            base = os.path.join(os.environ.get("APPDATA") or os.path.expanduser("~"), "Zitplaatsen")
+        elif sys.platform == "darwin":
+            base = os.path.expanduser("~/Library/Application Support/Zitplaatsen")
+        else:
+            base = os.path.join(os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share"), "zitplaatsen")
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+# A4 in punten (zelfde waarden als reportlab.lib.pagesizes, zonder reportlab te importeren)
+A4 = (595.2755905511812, 841.8897637795277)
+A3 = (841.8897637795277, 1190.5511811023621)
+
+def portrait(pagesize):
+    w, h = pagesize
+    return (w, h) if w <= h else (h, w)
+
+def landscape(pagesize):
+    w, h = pagesize
+    return (w, h) if w >= h else (h, w)
+
+# =========================
+# PDF CROP-PARAMETERS (jouw exacte waarden)
+# =========================
+PDF_COLS = 5
+PDF_PHOTO_W = 236
+PDF_PHOTO_H = 236
+PDF_MARGIN_LEFT = 140
+PDF_MARGIN_TOP = 319
+PDF_H_SPACING = 40
+PDF_V_SPACING = 88
+PDF_DPI = 200  # hogere dpi = scherpere crop
+PDF_ROWS = 5                # vaste layout: 5x5 -> 25 foto's per pagina
+PDF_SECOND_PAGE_TOP = 263   # tweede pagina start hoger dan PDF_MARGIN_TOP
+PDF_LONG_NAME_SHIFT = 33    # extra y-offset per rij met namen over twee regels
+
+# Foto's in geëxporteerde PDF's: schaal t.o.v. de stoelgrootte en JPEG-kwaliteit (1-95)
+PDF_EXPORT_OVERSAMPLE = 2
+PDF_JPEG_QUALITY = 85
+
+# Export als afbeelding (projectie, ELO): beschikbare resoluties, WebP-kwaliteit en
+# PNG-compressie (1 = snel, 9 = klein)
+RASTER_SIZES = {"1080p": (1920, 1080), "4K": (3840, 2160)}
+RASTER_WEBP_QUALITY = 90
+RASTER_PNG_COMPRESS = 1
+
+# Geheugenbudget voor foto's en caches in MB (ZITPLAATSEN_MEMORY_MB overschrijft, 0 = geen limiet)
+MEMORY_BUDGET_MB = 512
+# Gedecodeerde foto's en thumbnails van niet-actieve klassen (tabbladen) samen, in MB
+# (ZITPLAATSEN_WORKSPACE_MB overschrijft); daarboven worden de minst recent gebruikte ontladen
+WORKSPACE_BUDGET_MB = 256
+
+# Map met gedeelde opstellingen (JSON per lokaal, bv. op de netwerkschijf); leeg = eigen map
+# in de gebruikersdata. ZITPLAATSEN_LAYOUTS overschrijft.
+LAYOUT_LIBRARY_DIR = ""
+
+# =========================
+# UI/Render instellingen
+# =========================
+SEAT_MIN = 60
+SEAT_MAX = 130
+CAPTION_GAP = 8
+INNER_PAD_X = 8
+INNER_PAD_TOP = 8
+INNER_PAD_BOTTOM = 12
+SEAT_SPACING = 8
+ROW_SPACING = 28
+BANK_SPACING = 24
+
+PAGE_MARGIN_LR = 28
+PAGE_MARGIN_TOP_PORTRAIT = 28   # kleinere top marge bij portret
+PAGE_MARGIN_TOP_LANDSCAPE = 56  # oorspronkelijke waarde voor liggend
+PAGE_MARGIN_BOTTOM = 24
+
+# Past een opstelling zelfs op A3 niet (bij SEAT_MIN), dan wordt ze over meerdere
+# A4-pagina's verdeeld; aangrenzende pagina's overlappen zoveel punten (± 1 cm)
+TILE_OVERLAP = 28
+
+# Titeldetails (gebruikelijk voor zowel UI als PDF zodat spacing overeenkomt)
+TITLE_Y = 28
+TITLE_GAP_AFTER = 8
+
+FONT_MAX = 12
+FONT_MIN = 7
+
+PLACEHOLDER_COLOR = (240, 240, 240)
+
+def plan_title(class_name, room):
+    return f"Klas {class_name} — Lokaal {room}"
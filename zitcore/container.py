@@ -0,0 +1,124 @@
+"""
+Eén-bestandsformaat voor verdelingen (.zit).
+
+Een .zit is een gewone zip: eerst manifest.json (dezelfde inhoud als de JSON van
+het oude formaat), daarna de foto's onder hun inhoudshash, ongecomprimeerd
+(ZIP_STORED). Via de centrale directory ligt de positie van elke foto vast, zodat
+één foto rechtstreeks uit een mmap gelezen kan worden zonder de rest te lezen of
+iets uit te pakken.
+"""
+import os
+import json
+import struct
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from .fileio import atomic_write, open_mapped
+from .trace import span
+
+ZIT_EXTENSION = ".zit"
+MANIFEST_NAME = "manifest.json"
+
+_LOCAL_HEADER = struct.Struct("<4s5H3L2H")   # vaste deel van een lokale zip-header (30 bytes)
+
+def is_container(path):
+    return path.lower().endswith(ZIT_EXTENSION)
+
+class SeatingContainer:
+    """
+    Lees-toegang tot een .zit (of een fotopakket, dezelfde zip-opbouw). Gebruik als context
+    manager; sluit vóór het bestand overschreven wordt (Windows laat geen gemapt bestand vervangen).
+    """
+    def __init__(self, path):
+        self.path = path
+        self._mapped = open_mapped(path)
+        self._map = self._mapped.map   # None als mmap niet lukt: dan gewoon via het bestand
+        try:
+            self._zip = zipfile.ZipFile(self._mapped.file, "r")
+        except Exception:
+            self.close()
+            raise
+        self._infos = {info.filename: info for info in self._zip.infolist()}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if getattr(self, "_zip", None) is not None:
+            self._zip.close()
+            self._zip = None
+        self._map = None
+        self._mapped.close()
+
+    def names(self):
+        return set(self._infos)
+
+    def manifest(self):
+        return json.loads(self.read(MANIFEST_NAME).decode("utf-8"))
+
+    def _data_offset(self, info):
+        header = _LOCAL_HEADER.unpack_from(self._map, info.header_offset)
+        if header[0] != b"PK\x03\x04":
+            raise zipfile.BadZipFile(f"Ongeldige header voor {info.filename}")
+        name_len, extra_len = header[-2], header[-1]
+        return info.header_offset + _LOCAL_HEADER.size + name_len + extra_len
+
+    def read(self, name):
+        """Bytes van één lid; een ongecomprimeerd lid komt rechtstreeks uit de mmap."""
+        info = self._infos[name]
+        if self._map is not None and info.compress_type == zipfile.ZIP_STORED:
+            start = self._data_offset(info)
+            return self._map[start:start + info.file_size]
+        return self._zip.read(info)
+
+def read_container_assets(path, names):
+    """{naam: bytes} voor de gevraagde foto's die in de container zitten."""
+    with SeatingContainer(path) as box:
+        present = box.names()
+        return {name: box.read(name) for name in names if name in present}
+
+def save_container(fpath, data, students, placeholder_size=100, workers=None):
+    """
+    Bewaar een verdeling als één .zit. data: de manifest-dict zonder studentenlijst
+    (zie seating.seating_manifest). Foto's die al in het bestaande bestand zitten
+    worden ongewijzigd overgenomen; enkel nieuwe foto's worden gecodeerd.
+    Het bestand wordt atomisch vervangen. Returned: fpath.
+    """
+    from .seating import encode_asset, seating_manifest, zip_member
+
+    kept = {}
+    if os.path.isfile(fpath):
+        try:
+            with SeatingContainer(fpath) as old:
+                wanted = {s.get("asset") for s in students}
+                kept = {name: old.read(name) for name in old.names() & wanted}
+        except (OSError, zipfile.BadZipFile):
+            kept = {}   # onleesbaar oud bestand: gewoon alles opnieuw schrijven
+
+    assets = dict(kept)
+    todo = [s for s in students if s.get("asset") not in kept]
+    # PIL geeft de GIL vrij tijdens het coderen: threads volstaan
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for s, (name, blob) in zip(todo, pool.map(lambda s: encode_asset(s, placeholder_size), todo)):
+            s["asset"] = name
+            assets.setdefault(name, blob)
+
+    manifest = seating_manifest(data, students)
+
+    def write_zit(f):
+        with zipfile.ZipFile(f, "w") as zf:
+            zf.writestr(zip_member(MANIFEST_NAME),
+                        json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8"))
+            for s in students:
+                name = s["asset"]
+                if name in assets:
+                    zinfo = zip_member(name)
+                    zinfo.compress_type = zipfile.ZIP_STORED
+                    zf.writestr(zinfo, assets.pop(name))
+
+    with span("save.zip", new=len(todo)):
+        atomic_write(fpath, write_zit)
+    return fpath
@@ -0,0 +1,142 @@
+"""
+Eén plek voor bestandstoegang op OneDrive/SharePoint/netwerkmappen.
+
+Bestanden in een gesynchroniseerde map zijn soms even vergrendeld (de sync-client
+of Word/Acrobat heeft ze open) of nog een online placeholder die eerst
+gedownload moet worden. In plaats van bij een fout een tijdelijke kopie te maken
+(wat bij een vergrendeld bestand meestal ook faalt en anders dubbel kopieert)
+proberen we dezelfde operatie opnieuw met een oplopende wachttijd.
+
+Een bestand wordt één keer gelezen; de bytes gaan naar alle gebruikers (JSON,
+zip, pdf2image). Voor willekeurige toegang (.zit) is er open_mapped (mmap).
+Elke poging wordt gemeten; io_timings() geeft de recente metingen (en als meten
+aan staat verschijnen ze ook als io.*-spans in zitcore.trace).
+"""
+import os
+import time
+import mmap
+import errno
+import tempfile
+from collections import deque
+
+from .trace import span
+
+# hoeveel keer een vergrendeld bestand opnieuw geprobeerd wordt, en de eerste wachttijd (verdubbelt)
+IO_RETRIES = 6
+IO_BACKOFF = 0.05
+
+# Windows-foutcodes: 32/33 = bestand in gebruik/vergrendeld, 362/383/395/396 = cloud-bestand (OneDrive) nog niet beschikbaar
+_TRANSIENT_WINERRORS = {32, 33, 362, 383, 395, 396}
+_TRANSIENT_ERRNOS = {errno.EBUSY, errno.EAGAIN, getattr(errno, "ETXTBSY", errno.EBUSY)}
+# Windows meldt een vergrendeld bestand soms als EACCES; op POSIX is dat een echte weigering
+if os.name == "nt":
+    _TRANSIENT_ERRNOS.add(errno.EACCES)
+
+_timings = deque(maxlen=200)
+
+def io_timings():
+    """Recente pogingen: lijst van dict(op, path, attempt, seconds, error)."""
+    return list(_timings)
+
+def is_transient(e):
+    """Fout die waarschijnlijk vanzelf verdwijnt (vergrendeling, sync-client bezig)?"""
+    if isinstance(e, (FileNotFoundError, IsADirectoryError, NotADirectoryError)):
+        return False
+    if getattr(e, "winerror", None) in _TRANSIENT_WINERRORS:
+        return True
+    return isinstance(e, OSError) and e.errno in _TRANSIENT_ERRNOS
+
+def retry(op, path, fn, *args, retries=None, backoff=None):
+    """
+    Voer fn(*args) uit; probeer opnieuw bij een tijdelijke fout (zie is_transient).
+    op/path dienen enkel voor de metingen. Raise de laatste fout als alles faalt.
+    """
+    retries = IO_RETRIES if retries is None else retries
+    delay = IO_BACKOFF if backoff is None else backoff
+    for attempt in range(1, retries + 1):
+        t0 = time.perf_counter()
+        try:
+            with span("io." + op, path=path, attempt=attempt):
+                result = fn(*args)
+        except OSError as e:
+            _timings.append({"op": op, "path": path, "attempt": attempt,
+                             "seconds": time.perf_counter() - t0, "error": f"{type(e).__name__}: {e}"})
+            if attempt == retries or not is_transient(e):
+                raise
+            time.sleep(delay)
+            delay *= 2
+            continue
+        _timings.append({"op": op, "path": path, "attempt": attempt,
+                         "seconds": time.perf_counter() - t0, "error": None})
+        return result
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+def read_bytes(path):
+    """Lees een volledig bestand in één keer (met retry)."""
+    return retry("read", path, _read, path)
+
+def read_text(path, encoding="utf-8"):
+    return read_bytes(path).decode(encoding)
+
+class MappedFile:
+    """Alleen-lezen mmap van een bestand (of gewoon het bestand als mmap niet lukt, bv. leeg bestand)."""
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            self.map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+def open_mapped(path):
+    """Open een bestand voor willekeurige toegang (met retry). Sluit het na gebruik."""
+    return retry("open", path, MappedFile, path)
+
+def atomic_write(path, write_fn):
+    """
+    Schrijf via een tijdelijk bestand in dezelfde map en vervang daarna in één stap
+    (os.replace, met retry als de sync-client het doel even vasthoudt). Een crash of
+    fout halverwege laat het oude bestand intact.
+    write_fn(f) krijgt een binair bestandsobject (lezen en schrijven).
+    """
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix="." + os.path.basename(path) + ".", suffix=".tmp", dir=folder)
+    try:
+        t0 = time.perf_counter()
+        with os.fdopen(fd, "w+b") as f, span("io.write", path=path):
+            write_fn(f)
+            f.flush()
+            os.fsync(f.fileno())
+        _timings.append({"op": "write", "path": path, "attempt": 1,
+                         "seconds": time.perf_counter() - t0, "error": None})
+        # mkstemp maakt het bestand enkel leesbaar voor de eigenaar: neem de rechten
+        # van het bestaande bestand over (of de gewone standaard bij een nieuw bestand)
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except OSError:
+            umask = os.umask(0)
+            os.umask(umask)
+            mode = 0o666 & ~umask
+        os.chmod(tmp, mode)
+        retry("replace", path, os.replace, tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,396 @@
+import math
+
+from .config import (
+    A4, A3, portrait, landscape,
+    SEAT_MIN, SEAT_MAX, CAPTION_GAP, INNER_PAD_X, INNER_PAD_TOP, INNER_PAD_BOTTOM,
+    SEAT_SPACING, ROW_SPACING, BANK_SPACING,
+    PAGE_MARGIN_LR, PAGE_MARGIN_TOP_PORTRAIT, PAGE_MARGIN_TOP_LANDSCAPE, PAGE_MARGIN_BOTTOM,
+    TITLE_Y, TITLE_GAP_AFTER, TILE_OVERLAP,
+)
+from .spatial import GridIndex, slot_rect
+from .trace import traced
+
+FONT_EST = 14   # geschatte hoogte van het naamlabel onder een foto
+MIN_EDGE = 12   # zoveel witte rand (punten) moet er minstens rond de opstelling blijven
+
+def _rows(cfg):
+    """(aantal rijen, banken per rij, seats_lookup(r, c)) voor een reguliere of onregelmatige opstelling."""
+    if cfg.get("regular", True):
+        rows = cfg["rows"]
+        return rows, [cfg["banks"]]*rows, lambda r,c: cfg["seats"]
+    pattern = cfg["pattern"]
+    return len(pattern), [len(row) for row in pattern], lambda r,c: pattern[r][c]
+
+def _top_margin(cfg):
+    # pick top margin based on orientation (this fixes extra whitespace in portrait)
+    return PAGE_MARGIN_TOP_PORTRAIT if cfg.get("orientation", "portrait") == "portrait" else PAGE_MARGIN_TOP_LANDSCAPE
+
+def _seat_fit(cfg, W, H):
+    """Grootste stoel (breedte, hoogte apart) waarmee de opstelling op een blad W×H past."""
+    regular = cfg.get("regular", True)
+    rows, banks_per_row, seats_lookup = _rows(cfg)
+    max_banks = max(banks_per_row) if banks_per_row else 0
+
+    max_seats_in_widest_row = 0
+    for r in range(rows):
+        seats_list = [seats_lookup(r, c) for c in range(banks_per_row[r])]
+        max_seats_in_widest_row = max(max_seats_in_widest_row, max(seats_list) if seats_list else 0)
+
+    avail_w = W - PAGE_MARGIN_LR*2 - (max_banks-1)*BANK_SPACING
+    seats_per_bank_for_width = cfg["seats"] if regular else (max_seats_in_widest_row or 1)
+    seat_by_w = (avail_w / max(max_banks,1) - 2*INNER_PAD_X - (seats_per_bank_for_width-1)*SEAT_SPACING) / max(seats_per_bank_for_width,1)
+
+    avail_h = H - _top_margin(cfg) - PAGE_MARGIN_BOTTOM - (rows-1)*ROW_SPACING
+    seat_by_h = avail_h/max(rows,1) - (INNER_PAD_TOP + CAPTION_GAP + FONT_EST + INNER_PAD_BOTTOM)
+    return seat_by_w, seat_by_h
+
+def _free_banks(cfg, seat_size):
+    """
+    Banken van een vrije opstelling in punten, voor stoelen van seat_size.
+    Een bank {"x", "y", "seats", "angle"} staat met haar linkerbovenhoek op (x, y)
+    stoelbreedtes en is angle graden (wijzerzin) gedraaid rond haar midden; de
+    stoelen erin liggen zoals in een gewone bank. Losse stoelen zijn banken van één.
+    Returned: [(hoekpunten [(x, y)]*4, middelpunten van de stoelen [(cx, cy)])].
+    """
+    bank_h = int(INNER_PAD_TOP + seat_size + CAPTION_GAP + FONT_EST + INNER_PAD_BOTTOM)
+    result = []
+    for bank in cfg["banks"]:
+        n = bank.get("seats", 1)
+        w = int(2*INNER_PAD_X + n*seat_size + (n-1)*SEAT_SPACING)
+        x0, y0 = bank["x"]*seat_size, bank["y"]*seat_size
+        mx, my = x0 + w/2, y0 + bank_h/2
+        a = math.radians(bank.get("angle", 0) or 0)
+        cos_a, sin_a = math.cos(a), math.sin(a)
+        def turn(x, y):
+            return (mx + (x - mx)*cos_a - (y - my)*sin_a, my + (x - mx)*sin_a + (y - my)*cos_a)
+        corners = [turn(x0, y0), turn(x0 + w, y0), turn(x0 + w, y0 + bank_h), turn(x0, y0 + bank_h)]
+        centers = [turn(x0 + INNER_PAD_X + k*(seat_size + SEAT_SPACING) + seat_size/2, y0 + INNER_PAD_TOP + seat_size/2)
+                   for k in range(n)]
+        result.append((corners, centers))
+    return result
+
+def _free_bounds(banks, seat_size):
+    """Omhullende (x0, y0, x1, y1) van banken en stoelen, met de naam rechtop onder elke foto."""
+    xs, ys = [], []
+    half = seat_size/2
+    for corners, centers in banks:
+        xs.extend(x for x, _ in corners)
+        ys.extend(y for _, y in corners)
+        for cx, cy in centers:
+            xs += [cx - half, cx + half]
+            ys += [cy - half, cy + half + CAPTION_GAP + FONT_EST]
+    return (min(xs), min(ys), max(xs), max(ys)) if xs else (0, 0, 0, 0)
+
+def _free_seat_size(cfg, W, H):
+    """Grootste stoel (SEAT_MIN..SEAT_MAX, in hele punten) waarmee de vrije opstelling op W×H past."""
+    top = max(_top_margin(cfg), TITLE_Y + TITLE_GAP_AFTER)
+    avail_w, avail_h = W - 2*PAGE_MARGIN_LR, H - top - PAGE_MARGIN_BOTTOM
+    def fits(s):
+        x0, y0, x1, y1 = _free_bounds(_free_banks(cfg, s), s)
+        return x1 - x0 <= avail_w and y1 - y0 <= avail_h
+    lo, hi = SEAT_MIN, SEAT_MAX
+    if not fits(lo):
+        return SEAT_MIN
+    while lo < hi:   # bisectie: de omhullende groeit met de stoelgrootte
+        mid = (lo + hi + 1) // 2
+        lo, hi = (mid, hi) if fits(mid) else (lo, mid - 1)
+    return lo
+
+def _content_size(cfg, seat_size):
+    """Breedte van de breedste rij en hoogte van alle rijen samen, in punten."""
+    if cfg.get("free"):
+        x0, y0, x1, y1 = _free_bounds(_free_banks(cfg, seat_size), seat_size)
+        return x1 - x0, y1 - y0
+    rows, banks_per_row, seats_lookup = _rows(cfg)
+    widest = 0
+    for r in range(rows):
+        row_w = sum(int(2*INNER_PAD_X + s*seat_size + (s-1)*SEAT_SPACING)
+                    for s in (seats_lookup(r, c) for c in range(banks_per_row[r])))
+        widest = max(widest, row_w + (banks_per_row[r]-1)*BANK_SPACING)
+    bank_h = int(INNER_PAD_TOP + seat_size + CAPTION_GAP + FONT_EST + INNER_PAD_BOTTOM)
+    return widest, rows*bank_h + max(0, rows-1)*ROW_SPACING
+
+def _fits(cfg, W, H):
+    """
+    Past de opstelling met stoelen van SEAT_MIN op een blad W×H? Ze mag in de
+    marges lopen (zoals de brede opstellingen al deden) tot op MIN_EDGE van de rand.
+    """
+    content_w, content_h = _content_size(cfg, SEAT_MIN)
+    top = max(_top_margin(cfg), TITLE_Y + TITLE_GAP_AFTER)
+    return content_w <= W - 2*MIN_EDGE and content_h <= H - top - MIN_EDGE
+
+def page_plan(cfg, page_size):
+    """
+    Waar komt de opstelling terecht (stoelen minstens SEAT_MIN)?
+    Returned: (page_size, sheet_size). Past ze op page_size, dan zijn beide gelijk;
+    anders A3 in dezelfde oriëntatie; past ze daar ook niet, dan een groot blad
+    (sheet_size) dat in stukken van page_size geprint wordt (zie tile_sheet).
+    """
+    if _fits(cfg, *page_size):
+        return page_size, page_size
+    W, H = page_size
+    a3 = portrait(A3) if W <= H else landscape(A3)
+    if a3[0] > W and _fits(cfg, *a3):
+        return a3, a3
+    content_w, content_h = _content_size(cfg, SEAT_MIN)
+    top = max(_top_margin(cfg), TITLE_Y + TITLE_GAP_AFTER)
+    return page_size, (max(W, content_w + 2*PAGE_MARGIN_LR), max(H, top + content_h + PAGE_MARGIN_BOTTOM))
+
+def tile_sheet(cfg, sheet_size, page_size, overlap=(TILE_OVERLAP, TILE_OVERLAP)):
+    """
+    Verdeel het bedrukte deel van een groot blad in stukken die elk op één pagina
+    passen; naburige stukken overlappen (overlap_x, overlap_y) punten. Alles wat niet
+    groter is dan de overlap staat zo op minstens één pagina in zijn geheel.
+    Returned: [{row, col, x0, y0, x1, y1, offset}] in bladpunten, rij per rij;
+    offset = (x, y) waar het stuk op de pagina begint.
+    """
+    overlap_x, overlap_y = overlap
+    SW, SH = sheet_size
+    W, H = page_size
+    top = max(_top_margin(cfg), TITLE_Y + TITLE_GAP_AFTER)
+    pw, ph = W - 2*PAGE_MARGIN_LR, H - top - PAGE_MARGIN_BOTTOM
+    cw, ch = SW - 2*PAGE_MARGIN_LR, SH - top - PAGE_MARGIN_BOTTOM
+    cols = max(1, math.ceil((cw - overlap_x) / (pw - overlap_x)))
+    rows = max(1, math.ceil((ch - overlap_y) / (ph - overlap_y)))
+    tiles = []
+    for r in range(rows):
+        y0 = top + r*(ph - overlap_y)
+        for c in range(cols):
+            x0 = PAGE_MARGIN_LR + c*(pw - overlap_x)
+            tiles.append({"row": r, "col": c, "x0": x0, "y0": y0,
+                          "x1": min(x0 + pw, SW - PAGE_MARGIN_LR), "y1": min(y0 + ph, SH - PAGE_MARGIN_BOTTOM),
+                          "offset": (PAGE_MARGIN_LR, top)})
+    return tiles
+
+def _assign_tiles(tiles, bank_rects, base_slots, caption_h):
+    """Geef elk stuk de stoelen (met naam eronder) die (deels) op dat stuk vallen; stukken zonder banken vallen weg."""
+    banks = GridIndex(bank_rects)
+    seats = GridIndex([slot_rect(s, caption_h) for s in base_slots])
+    kept = []
+    for tile in tiles:
+        area = (tile["x0"], tile["y0"], tile["x1"], tile["y1"])
+        if banks.query_rect(*area):
+            tile["slots"] = seats.query_rect(*area)
+            kept.append(tile)
+    return kept
+
+def _with_tiles(cfg, geometry):
+    """Vul geometry["tiles"] in als het blad groter is dan de pagina."""
+    page_size, sheet_size, seat_size = geometry["page_size"], geometry["sheet_size"], geometry["seat_size"]
+    geometry["tiles"] = []
+    if sheet_size != page_size:
+        # een stoel met zijn naam staat zo altijd op minstens één pagina volledig
+        caption_h = CAPTION_GAP + FONT_EST
+        overlap = (max(TILE_OVERLAP, seat_size + SEAT_SPACING), max(TILE_OVERLAP, seat_size + caption_h + INNER_PAD_BOTTOM))
+        geometry["tiles"] = _assign_tiles(tile_sheet(cfg, sheet_size, page_size, overlap),
+                                          geometry["base_bank_rects"], geometry["base_slots"], caption_h)
+    return geometry
+
+def _free_geometry(cfg, page_size, sheet_size, zoom_level):
+    """compute_geometry voor een vrije opstelling (cfg["free"]): gecentreerd op het blad, op schaal voor het scherm."""
+    W, H = sheet_size
+    seat_size = SEAT_MIN if sheet_size != page_size else _free_seat_size(cfg, W, H)
+    banks = _free_banks(cfg, seat_size)
+    bx0, by0, bx1, by1 = _free_bounds(banks, seat_size)
+    top = max(_top_margin(cfg), TITLE_Y + TITLE_GAP_AFTER)
+    dx = PAGE_MARGIN_LR + max(0, (W - 2*PAGE_MARGIN_LR - (bx1 - bx0))/2) - bx0
+    dy = top + max(0, (H - top - PAGE_MARGIN_BOTTOM - (by1 - by0))/2) - by0
+
+    base_slots, base_bank_rects, base_bank_polys = [], [], []
+    slots, bank_rects, bank_polys = [], [], []
+    vs = max(4, int(seat_size * zoom_level))
+    for b, (corners, centers) in enumerate(banks):
+        poly = [(x + dx, y + dy) for x, y in corners]
+        base_bank_polys.append(poly)
+        base_bank_rects.append((min(x for x, _ in poly), min(y for _, y in poly),
+                                max(x for x, _ in poly), max(y for _, y in poly)))
+        disp = [(int(x*zoom_level), int(y*zoom_level)) for x, y in poly]
+        bank_polys.append(disp)
+        bank_rects.append((min(x for x, _ in disp), min(y for _, y in disp),
+                           max(x for x, _ in disp), max(y for _, y in disp)))
+        for cx, cy in centers:
+            cx, cy = cx + dx, cy + dy
+            base_slots.append({"x": cx - seat_size/2, "y": cy - seat_size/2, "w": seat_size, "h": seat_size,
+                               "cx": cx, "cy": cy, "bank": b})
+            sx, sy = int(cx*zoom_level - vs/2), int(cy*zoom_level - vs/2)
+            slots.append({"x": sx, "y": sy, "w": vs, "h": vs, "cx": sx + vs/2, "cy": sy + vs/2, "bank": b})
+
+    return _with_tiles(cfg, {
+        "page_size": page_size,
+        "sheet_size": sheet_size,
+        "seat_size": seat_size,
+        "base_slots": base_slots,
+        "base_bank_rects": base_bank_rects,
+        "base_bank_polys": base_bank_polys,
+        "slots": slots,
+        "bank_rects": bank_rects,
+        "bank_polys": bank_polys,
+    })
+
+@traced("geometry")
+def compute_geometry(cfg, page_size, zoom_level=1.0):
+    """
+    Compute both base (export) geometry based on logical seat_size,
+    and display geometry according to zoom_level.
+
+    Extra: limit the portrait-start-Y so it never becomes much lower than
+    the equivalent centered start-Y for the same layout in landscape.
+    That keeps the title-to-first-bank spacing comparable.
+
+    Past de opstelling niet op page_size, dan kiest page_plan A3 of een groot blad
+    dat over meerdere pagina's verdeeld wordt (tiles); canvas en export gebruiken
+    allebei deze ene berekening.
+
+    Returned: dict met
+      page_size        paginaformaat van de export (A4 of A3)
+      sheet_size       het hele blad met de opstelling (groter dan page_size bij tiles)
+      tiles            [] of stukken van het blad, één per pagina (zie tile_sheet), met
+                       de stoelen (slots) die erop vallen
+      seat_size        logische stoelgrootte (export)
+      base_slots       [{x,y,w,h,cx,cy,bank}] in bladpunten
+      base_bank_rects  [(x0,y0,x1,y1)] in bladpunten (bij gedraaide banken de omhullende)
+      base_bank_polys  None, of bij een vrije opstelling per bank de 4 hoekpunten
+      slots            idem, op schermschaal (zoom_level)
+      bank_rects       idem, op schermschaal
+      bank_polys       idem, op schermschaal
+
+    Naast rijen × banken × stoelen ("regular") en een patroon per rij ("pattern")
+    bestaat een vrije opstelling ("free"): banken met eigen coördinaten en hoek
+    (zie _free_banks en zitcore.layouts.parse_layout).
+    """
+    base_slots, base_bank_rects = [], []
+    slots, bank_rects = [], []
+
+    page_size, sheet_size = page_plan(cfg, page_size)
+    if cfg.get("free"):
+        return _free_geometry(cfg, page_size, sheet_size, zoom_level)
+    W, H = sheet_size
+    regular = cfg.get("regular", True)
+    paper = A3 if max(page_size) > max(A4) + 1 else A4
+
+    page_margin_top = _top_margin(cfg)
+    rows, banks_per_row, seats_lookup = _rows(cfg)
+
+    seat_by_w, seat_by_h = _seat_fit(cfg, W, H)
+
+    # base logical seat_size used for export
+    seat_size = int(max(SEAT_MIN, min(SEAT_MAX, seat_by_w, seat_by_h)))
+    if sheet_size != page_size:
+        seat_size = SEAT_MIN
+
+    font_est = FONT_EST
+    def bank_w_base(seats):
+        return int(2*INNER_PAD_X + seats*seat_size + (seats-1)*SEAT_SPACING)
+    bank_h_base = int(INNER_PAD_TOP + seat_size + CAPTION_GAP + font_est + INNER_PAD_BOTTOM)
+
+    # Build base geometry
+    # centered y as before
+    centered_y_base = page_margin_top + max(0, (H - page_margin_top - PAGE_MARGIN_BOTTOM - (rows*bank_h_base + (rows-1)*ROW_SPACING))//2)
+    y_base = centered_y_base
+
+    # also compute what the centered start Y would be for the SAME layout in landscape A4 (of A3)
+    # (this allows us to cap portrait-start so it won't be much lower than landscape)
+    try:
+        _, landscape_H = landscape(paper)
+        alt_page_margin_top = PAGE_MARGIN_TOP_LANDSCAPE
+        alt_centered = alt_page_margin_top + max(0, (landscape_H - alt_page_margin_top - PAGE_MARGIN_BOTTOM - (rows*bank_h_base + (rows-1)*ROW_SPACING))//2)
+        # allow a small slack so portrait can be a bit lower if needed
+        max_allowed_y_base = alt_centered + 6
+        # cap y_base so it doesn't drop far below the landscape equivalent
+        if y_base > max_allowed_y_base:
+            y_base = max_allowed_y_base
+    except Exception:
+        # if anything goes wrong, keep original centered value
+        pass
+
+    # ensure banks don't start so low that there's an excessive gap below the title
+    min_allowed = TITLE_Y + TITLE_GAP_AFTER
+    if y_base < min_allowed:
+        y_base = min_allowed
+
+    for r in range(rows):
+        row_banks = banks_per_row[r]
+        if regular:
+            row_bank_widths = [bank_w_base(cfg["seats"]) for _ in range(row_banks)]
+        else:
+            row_bank_widths = [bank_w_base(seats_lookup(r, c)) for c in range(row_banks)]
+        row_total_w = sum(row_bank_widths) + (row_banks-1)*BANK_SPACING
+        x_base = PAGE_MARGIN_LR + (W - 2*PAGE_MARGIN_LR - row_total_w)//2
+        for b in range(row_banks):
+            seats = seats_lookup(r,b) if not regular else cfg["seats"]
+            bw = row_bank_widths[b]
+            x0b, y0b = x_base, y_base
+            x1b, y1b = x0b + bw, y0b + bank_h_base
+            base_bank_rects.append((x0b, y0b, x1b, y1b))
+            sx = x0b + INNER_PAD_X
+            sy = y0b + INNER_PAD_TOP
+            for s in range(seats):
+                base_slots.append({
+                    "x": sx, "y": sy, "w": seat_size, "h": seat_size,
+                    "cx": sx + seat_size/2, "cy": sy + seat_size/2,
+                    "bank": len(base_bank_rects) - 1
+                })
+                sx += seat_size + SEAT_SPACING
+            x_base += bw + BANK_SPACING
+        y_base += bank_h_base + ROW_SPACING
+
+    # Build visual geometry using zoom_level
+    vs = max(4, int(seat_size * zoom_level))
+    def bank_w_disp(seats):
+        return int(2*INNER_PAD_X + seats*vs + (seats-1)*SEAT_SPACING)
+    bank_h_disp = int(INNER_PAD_TOP + vs + CAPTION_GAP + font_est + INNER_PAD_BOTTOM)
+
+    # compute displayed y starting point using the same page_margin_top (scaled)
+    centered_y_disp = page_margin_top*zoom_level + max(0, int((H*zoom_level - (page_margin_top*zoom_level + PAGE_MARGIN_BOTTOM*zoom_level) - (rows*bank_h_disp + (rows-1)*int(ROW_SPACING*zoom_level)))//2))
+    y_disp = centered_y_disp
+
+    # compute landscape-equivalent display start and cap similarly
+    try:
+        _, landscape_H = landscape(paper)
+        alt_centered_disp = PAGE_MARGIN_TOP_LANDSCAPE*zoom_level + max(0, int((landscape_H*zoom_level - (PAGE_MARGIN_TOP_LANDSCAPE*zoom_level + PAGE_MARGIN_BOTTOM*zoom_level) - (rows*bank_h_disp + (rows-1)*int(ROW_SPACING*zoom_level)))//2))
+        max_allowed_y_disp = alt_centered_disp + (6 * zoom_level)
+        if y_disp > max_allowed_y_disp:
+            y_disp = int(max_allowed_y_disp)
+    except Exception:
+        pass
+
+    if y_disp < TITLE_Y*zoom_level + TITLE_GAP_AFTER:
+        y_disp = TITLE_Y*zoom_level + TITLE_GAP_AFTER
+
+    for r in range(rows):
+        row_banks = banks_per_row[r]
+        if regular:
+            row_bank_widths = [bank_w_disp(cfg["seats"]) for _ in range(row_banks)]
+        else:
+            row_bank_widths = [bank_w_disp(seats_lookup(r, c)) for c in range(row_banks)]
+        row_total_w = sum(row_bank_widths) + (row_banks-1)*int(BANK_SPACING*zoom_level)
+        x_disp = int(PAGE_MARGIN_LR*zoom_level + (W*zoom_level - 2*PAGE_MARGIN_LR*zoom_level - row_total_w)//2)
+        for b in range(row_banks):
+            seats = seats_lookup(r,b) if not regular else cfg["seats"]
+            bw = row_bank_widths[b]
+            x0, y0 = x_disp, int(y_disp)
+            x1, y1 = x0 + bw, y0 + bank_h_disp
+            bank_rects.append((x0, y0, x1, y1))
+            sx = x0 + INNER_PAD_X
+            sy = y0 + INNER_PAD_TOP
+            for s in range(seats):
+                slots.append({
+                    "x": sx, "y": sy, "w": vs, "h": vs,
+                    "cx": sx + vs/2, "cy": sy + vs/2,
+                    "bank": len(bank_rects) - 1
+                })
+                sx += vs + int(SEAT_SPACING*zoom_level)
+            x_disp += bw + int(BANK_SPACING*zoom_level)
+        y_disp += bank_h_disp + int(ROW_SPACING*zoom_level)
+
+    return _with_tiles(cfg, {
+        "page_size": page_size,
+        "sheet_size": sheet_size,
+        "seat_size": seat_size,
+        "base_slots": base_slots,
+        "base_bank_rects": base_bank_rects,
+        "base_bank_polys": None,
+        "slots": slots,
+        "bank_rects": bank_rects,
+        "bank_polys": None,
+    })
@@ -0,0 +1,222 @@
+"""
+Ongedaan maken / opnieuw uitvoeren met kleine commando's in plaats van snapshots.
+
+Elk commando onthoudt enkel wat veranderde: een verplaatsing de oude en nieuwe
+slot van (hoogstens) twee leerlingen, een naamswijziging de oude en nieuwe naam.
+Verwijderde leerlingen (met hun foto) blijven bewaard zolang hun commando in de
+geschiedenis staat; dat aantal is begrensd (pool_size), daarna vallen de oudste
+stappen weg. De jongste stap blijft altijd, ook als ze alleen al meer leerlingen
+bewaart (bv. een reset van een examenbord).
+
+Commando's werken op een "board": een object met een lijst `students` en (enkel
+voor LayoutCommand) een methode apply_layout(name, custom_layout).
+Na undo/redo vertelt cmd.redraw wat de GUI moet hertekenen:
+"positions", "labels" of "all".
+"""
+import time
+
+# zoveel verwijderde leerlingen worden hoogstens bijgehouden om terug te zetten
+REMOVED_POOL_SIZE = 120
+# opeenvolgende verplaatsingen van dezelfde leerling binnen dit venster worden één stap
+MERGE_SECONDS = 2.0
+
+class Command:
+    redraw = "all"
+    held = 0   # aantal leerlingen dat dit commando in leven houdt
+
+    def undo(self, board):
+        raise NotImplementedError
+
+    def redo(self, board):
+        raise NotImplementedError
+
+    def merge(self, newer):
+        """Neem een jonger commando op in dit commando; True als dat gelukt is."""
+        return False
+
+    def empty(self):
+        """True als het commando (na merge) niets meer verandert."""
+        return False
+
+class MoveCommand(Command):
+    """Slotwijzigingen: [(leerling, oude slot, nieuwe slot)] — een drag is er één of twee."""
+    redraw = "positions"
+
+    def __init__(self, changes, key=None, when=None):
+        self.changes = list(changes)
+        self.key = key
+        self.when = time.monotonic() if when is None else when
+
+    def undo(self, board):
+        for s, old, new in self.changes:
+            s["slot"] = old
+
+    def redo(self, board):
+        for s, old, new in self.changes:
+            s["slot"] = new
+
+    def merge(self, newer):
+        if not isinstance(newer, MoveCommand) or self.key is None or newer.key is not self.key:
+            return False
+        if newer.when - self.when > MERGE_SECONDS:
+            return False
+        # per leerling: oudste "oud" behouden, jongste "nieuw" overnemen
+        for s, old, new in newer.changes:
+            for i, (s0, old0, new0) in enumerate(self.changes):
+                if s0 is s:
+                    self.changes[i] = (s0, old0, new)
+                    break
+            else:
+                self.changes.append((s, old, new))
+        self.changes = [c for c in self.changes if c[1] != c[2]]
+        self.when = newer.when
+        return True
+
+    def empty(self):
+        return not self.changes
+
+class RenameCommand(Command):
+    """Naam (en lettergrootte) van één leerling: old/new = (naam, font_size)."""
+    redraw = "labels"
+
+    def __init__(self, student, old, new):
+        self.student, self.old, self.new = student, old, new
+
+    def undo(self, board):
+        self.student["name"], self.student["font_size"] = self.old
+
+    def redo(self, board):
+        self.student["name"], self.student["font_size"] = self.new
+
+class RemoveCommand(Command):
+    """Leerlingen verwijderd: entries = [(index in de lijst, leerling)]."""
+
+    def __init__(self, entries):
+        self.entries = sorted(entries, key=lambda e: e[0])
+        self.held = len(self.entries)
+
+    def _put_back(self, board):
+        taken = {s["slot"] for s in board.students}
+        for index, s in self.entries:
+            if s["slot"] in taken:
+                s["slot"] = None   # plaats intussen bezet: auto_assign zoekt een vrije
+            taken.add(s["slot"])
+            board.students.insert(min(index, len(board.students)), s)
+
+    def _take_out(self, board):
+        gone = {id(s) for _, s in self.entries}
+        board.students[:] = [s for s in board.students if id(s) not in gone]
+
+    def undo(self, board):
+        self._put_back(board)
+
+    def redo(self, board):
+        self._take_out(board)
+
+class AddCommand(RemoveCommand):
+    """Leerlingen toegevoegd (import): het omgekeerde van RemoveCommand."""
+
+    def __init__(self, entries):
+        super().__init__(entries)
+        # in de undo-stapel staan de leerlingen op het bord: niets extra in leven gehouden
+        self.held = 0
+
+    def undo(self, board):
+        self._take_out(board)
+
+    def redo(self, board):
+        self._put_back(board)
+
+class OrderCommand(Command):
+    """Volgorde en slots van alle leerlingen (shuffle): before/after = [(leerling, slot)]."""
+
+    def __init__(self, before, after):
+        self.before, self.after = before, after
+
+    @staticmethod
+    def _restore(board, entries):
+        board.students[:] = [s for s, _ in entries]
+        for s, slot in entries:
+            s["slot"] = slot
+
+    def undo(self, board):
+        self._restore(board, self.before)
+
+    def redo(self, board):
+        self._restore(board, self.after)
+
+class LayoutCommand(Command):
+    """Andere opstelling: before/after = (naam, eigen opstelling); changes zoals bij MoveCommand."""
+
+    def __init__(self, before, after, changes):
+        self.before, self.after, self.changes = before, after, changes
+
+    def undo(self, board):
+        board.apply_layout(*self.before)
+        for s, old, new in self.changes:
+            s["slot"] = old
+
+    def redo(self, board):
+        board.apply_layout(*self.after)
+        for s, old, new in self.changes:
+            s["slot"] = new
+
+def slot_changes(students, before):
+    """[(leerling, oud, nieuw)] voor leerlingen waarvan de slot verschilt van before[id(s)]."""
+    return [(s, before[id(s)], s["slot"]) for s in students
+            if id(s) in before and before[id(s)] != s["slot"]]
+
+class History:
+    def __init__(self, max_steps=200, pool_size=REMOVED_POOL_SIZE):
+        self.max_steps = max_steps
+        self.pool_size = pool_size
+        self._undo = []
+        self._redo = []
+
+    def push(self, cmd):
+        """Registreer een commando dat al uitgevoerd is."""
+        self._redo.clear()
+        if self._undo and self._undo[-1].merge(cmd):
+            if self._undo[-1].empty():
+                self._undo.pop()   # bv. weggesleept en meteen teruggezet: geen stap
+            return
+        self._undo.append(cmd)
+        self._trim()
+
+    def _trim(self):
+        held = sum(c.held for c in self._undo)
+        # de jongste stap nooit: die moet ongedaan gemaakt kunnen worden
+        while len(self._undo) > 1 and (len(self._undo) > self.max_steps or held > self.pool_size):
+            held -= self._undo.pop(0).held
+
+    def undo(self, board):
+        if not self._undo:
+            return None
+        cmd = self._undo.pop()
+        cmd.undo(board)
+        self._redo.append(cmd)
+        return cmd
+
+    def redo(self, board):
+        if not self._redo:
+            return None
+        cmd = self._redo.pop()
+        cmd.redo(board)
+        self._undo.append(cmd)
+        return cmd
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def clear(self):
+        self._undo.clear()
+        self._redo.clear()
+
+    def held_students(self):
+        """Verwijderde (of na undo weer weggenomen) leerlingen die de geschiedenis in leven houdt."""
+        for cmd in self._undo + self._redo:
+            for _, s in getattr(cmd, "entries", ()):
+                yield s
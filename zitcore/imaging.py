@@ -0,0 +1,131 @@
+import os
+
+from PIL import Image
+
+from .config import (
+    PDF_COLS, PDF_ROWS, PDF_PHOTO_W, PDF_PHOTO_H, PDF_MARGIN_LEFT, PDF_MARGIN_TOP,
+    PDF_H_SPACING, PDF_V_SPACING, PDF_SECOND_PAGE_TOP, PDF_LONG_NAME_SHIFT,
+    PLACEHOLDER_COLOR,
+)
+from .trace import traced
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+PDF_PHOTOS_PER_PAGE = PDF_COLS * PDF_ROWS  # 25
+
+def crop_square(pil_img):
+    w,h = pil_img.size
+    side = min(w,h)
+    L = (w - side)//2
+    T = (h - side)//2
+    return pil_img.crop((L,T,L+side,T+side))
+
+def placeholder_image(size):
+    """Neutrale grijze vervanger voor een ontbrekende foto."""
+    return Image.new("RGB", (size, size), PLACEHOLDER_COLOR)
+
+def list_folder_images(folder):
+    """Gesorteerde lijst van jpg/png-bestandsnamen in folder."""
+    files = [f for f in os.listdir(folder) if f.lower().endswith(IMAGE_EXTENSIONS)]
+    files.sort()
+    return files
+
+@traced("import.photo")
+def load_square_image(path):
+    """Open een foto als RGB en snij ze vierkant bij. Raise bij onleesbaar bestand."""
+    im = Image.open(path).convert("RGB")
+    return crop_square(im)
+
+def pdf_rows_to_query(count):
+    """
+    Per PDF-pagina: hoeveel rijen kunnen lange namen (over twee regels) hebben die de
+    rijen eronder verschuiven. Dat is het aantal aanwezige rijen min de laatste.
+    Returned: lijst met per pagina een aantal (0..PDF_ROWS-1).
+    """
+    pages_needed = (count + PDF_PHOTOS_PER_PAGE - 1) // PDF_PHOTOS_PER_PAGE
+    result = []
+    for p in range(pages_needed):
+        items_on_page = count - p * PDF_PHOTOS_PER_PAGE
+        items_on_page = min(PDF_PHOTOS_PER_PAGE, max(0,items_on_page))
+        rows_present = (items_on_page + PDF_COLS - 1) // PDF_COLS  # 0..5
+        result.append(max(0, rows_present - 1))
+    return result
+
+def pdf_crop_box(i, page_size, multiline_rows_per_page=None):
+    """
+    Uitsnijkader (x1, y1, x2, y2) in pixels voor foto i (0-gebaseerd) op zijn pagina.
+    multiline_rows_per_page: per pagina een lijst booleans; elke aangevinkte eerdere
+    rij schuift de foto PDF_LONG_NAME_SHIFT pixels naar beneden.
+    """
+    # bepaal van welke PDF-pagina dit item komt en de rij/kolom binnen die pagina
+    page_index = i // PDF_PHOTOS_PER_PAGE
+    idx_in_page = i % PDF_PHOTOS_PER_PAGE
+    r = idx_in_page // PDF_COLS
+    c = idx_in_page % PDF_COLS
+
+    # bepaal page-specifieke top offset (pagina 0 = PDF_MARGIN_TOP, pagina 1 = PDF_MARGIN_TOP + delta_top, ...)
+    delta_top = PDF_SECOND_PAGE_TOP - PDF_MARGIN_TOP
+    if page_index == 0:
+        page_margin_top_for_this_page = PDF_MARGIN_TOP
+    else:
+        page_margin_top_for_this_page = PDF_MARGIN_TOP + page_index * delta_top
+
+    # bereken cumulatieve extra shift voor deze rij: elke aangevinkte eerdere rij → +33 px
+    extra_shift = 0
+    if multiline_rows_per_page and page_index < len(multiline_rows_per_page):
+        page_checks = multiline_rows_per_page[page_index]
+        extra_shift = sum(1 for j in range(0, r) if j < len(page_checks) and page_checks[j]) * PDF_LONG_NAME_SHIFT
+
+    x1 = PDF_MARGIN_LEFT + c * (PDF_PHOTO_W + PDF_H_SPACING)
+    y1 = page_margin_top_for_this_page + r * (PDF_PHOTO_H + PDF_V_SPACING) + extra_shift
+    x2 = x1 + PDF_PHOTO_W
+    y2 = y1 + PDF_PHOTO_H
+
+    # safety: clamp crop inside page bounds and add a small padding to avoid cutting edges
+    Wp, Hp = page_size
+    pad = 2
+    x1c = max(0, min(Wp, int(round(x1)) - pad))
+    y1c = max(0, min(Hp, int(round(y1)) - pad))
+    x2c = max(0, min(Wp, int(round(x2)) + pad))
+    y2c = max(0, min(Hp, int(round(y2)) + pad))
+    return (x1c, y1c, x2c, y2c)
+
+@traced("pdf.crop")
+def crop_pdf_photos(pages, count, multiline_rows_per_page=None):
+    """
+    Snij `count` vierkante foto's uit de gerasterde pagina's van een Smartschool-klaslijst.
+    Returned: lijst van PIL-afbeeldingen. Raise ValueError als er pagina's ontbreken.
+    Er is telkens maar één RGB-kopie van een pagina tegelijk (de foto's staan per pagina).
+    """
+    if count > len(pages) * PDF_PHOTOS_PER_PAGE:
+        raise ValueError(f"PDF heeft niet genoeg pagina's voor {count} leerlingen (ontbreekt pagina {len(pages)+1}).")
+    photos = []
+    page_index, page_img = None, None
+    for i in range(count):
+        if i // PDF_PHOTOS_PER_PAGE != page_index:
+            page_index = i // PDF_PHOTOS_PER_PAGE
+            page = pages[page_index]
+            page_img = None   # vorige pagina vrijgeven vóór de volgende geconverteerd wordt
+            page_img = page if page.mode == "RGB" else page.convert("RGB")
+        crop = page_img.crop(pdf_crop_box(i, page_img.size, multiline_rows_per_page))
+        photos.append(crop_square(crop))
+    return photos
+
+def icon_raster(src, size, cache_dir):
+    """
+    Pad naar een PNG van src op size×size pixels, eenmalig gerenderd in cache_dir.
+    Bij de volgende starts kan Tk dat bestand rechtstreeks laden (geen PIL, geen resize).
+    De cache wordt vernieuwd als het bronbestand nieuwer is.
+    """
+    stem = os.path.splitext(os.path.basename(src))[0]
+    cached = os.path.join(cache_dir, f"{stem}_{size}.png")
+    try:
+        if os.path.getmtime(cached) >= os.path.getmtime(src):
+            return cached
+    except OSError:
+        pass
+    im = Image.open(src).convert("RGBA").resize((size, size), Image.LANCZOS)
+    tmp = cached + ".tmp"
+    im.save(tmp, format="PNG")
+    os.replace(tmp, cached)
+    return cached
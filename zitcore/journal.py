@@ -0,0 +1,333 @@
+"""
+Autosave-journaal: na elke wijziging op het bord komen enkel de verschillen als
+JSON-regels achteraan journal.jsonl (import, move, rename, delete, order, layout,
+meta). Regels worden gebufferd en in batches ge-fsynct (zie flush).
+Foto's worden bij import één keer onder hun inhoudshash in fotos/ gezet; het
+journaal zelf bevat enkel namen en slots en blijft dus klein. Het coderen van die
+foto's gebeurt op de achtergrond: record() (op de Tk-thread) schrijft de import
+meteen, flush() voegt de namen van de intussen bewaarde foto's toe ("asset").
+Af en toe wordt alles samengevat in snapshot.json en begint het journaal opnieuw.
+Na een crash bouwt load() de toestand terug op uit snapshot + journaal.
+Elke open klas (tabblad) heeft een eigen journaal: de eerste in autosave/, de
+volgende in autosave/klas-<n>/ (zie extra_journal_dirs).
+"""
+import os
+import json
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import FONT_MAX, user_data_dir
+from .fileio import atomic_write
+from .seating import encode_asset, students_from_data
+
+# na zoveel journaalregels wordt een snapshot geschreven en het journaal geleegd
+COMPACT_AFTER = 200
+
+META_KEYS = ("class", "room", "pdf_multiline_rows")
+LAYOUT_KEYS = ("layout", "custom_layout")
+STUDENT_KEYS = ("name", "slot", "font_size", "source", "pdf_index", "asset")
+
+# submappen van autosave/ voor de journalen van extra tabbladen
+TAB_DIR_PREFIX = "klas-"
+
+# gedeeld door alle journalen (tabbladen); pas aangemaakt bij de eerste nieuwe foto
+_encoder = None
+
+def _encode_pool():
+    global _encoder
+    if _encoder is None:
+        _encoder = ThreadPoolExecutor(thread_name_prefix="journal-foto")
+    return _encoder
+
+def _write_photo(photo_dir, photo):
+    """Worker: codeer een foto ({"pending", "pil"}) en zet ze in photo_dir. Returned: de naam."""
+    name, data = encode_asset(photo)
+    path = os.path.join(photo_dir, name)
+    if not os.path.isfile(path):
+        atomic_write(path, lambda f: f.write(data))
+    return name
+
+def extra_journal_dirs():
+    """Autosave-mappen van extra tabbladen, in de volgorde waarin ze aangemaakt werden."""
+    base = user_data_dir("autosave")
+    numbers = sorted(int(name[len(TAB_DIR_PREFIX):]) for name in os.listdir(base)
+                     if name.startswith(TAB_DIR_PREFIX) and name[len(TAB_DIR_PREFIX):].isdigit())
+    return [os.path.join(base, f"{TAB_DIR_PREFIX}{n}") for n in numbers]
+
+def new_journal_dir():
+    """Nieuwe (lege) autosave-map voor een extra tabblad."""
+    existing = extra_journal_dirs()
+    last = int(os.path.basename(existing[-1])[len(TAB_DIR_PREFIX):]) if existing else 0
+    return user_data_dir("autosave", f"{TAB_DIR_PREFIX}{last + 1}")
+
+def _plain(value):
+    """Losse kopie in JSON-vorm (de GUI past o.a. pdf_multiline_rows ter plaatse aan)."""
+    return json.loads(json.dumps(value))
+
+def empty_state():
+    return {"meta": {k: None for k in META_KEYS + LAYOUT_KEYS}, "students": {}, "order": [], "next_uid": 1}
+
+def apply_op(state, op):
+    """
+    Voer één journaalregel uit op een toestand (gebruikt bij opnemen én bij herstellen).
+    Een regel twee keer uitvoeren mag: crasht compact() tussen de snapshot en het leegmaken
+    van het journaal, dan worden de regels opnieuw op de snapshot (die ze al bevat) gezet.
+    """
+    kind = op.get("op")
+    if kind in ("meta", "layout"):
+        state["meta"].update(op.get("values", {}))
+    elif kind == "import":
+        for entry in op["students"]:
+            uid = entry["uid"]
+            state["next_uid"] = max(state["next_uid"], uid + 1)
+            if uid in state["students"]:
+                continue
+            state["students"][uid] = {k: entry.get(k) for k in STUDENT_KEYS}
+            state["order"].append(uid)
+    elif kind == "delete":
+        gone = set(op["uids"])
+        for uid in gone:
+            state["students"].pop(uid, None)
+        state["order"] = [u for u in state["order"] if u not in gone]
+    elif kind == "move":
+        for uid, slot in op["slots"]:
+            if uid in state["students"]:
+                state["students"][uid]["slot"] = slot
+    elif kind == "rename":
+        if op["uid"] in state["students"]:
+            state["students"][op["uid"]].update(name=op["name"], font_size=op.get("font_size", FONT_MAX))
+    elif kind == "order":
+        # dubbels en onbekende uids weg; leerlingen die in de regel ontbreken achteraan houden
+        order = list(dict.fromkeys(u for u in op["uids"] if u in state["students"]))
+        listed = set(order)
+        state["order"] = order + [u for u in state["order"] if u not in listed and u in state["students"]]
+    elif kind == "asset":
+        for uid, name in op["assets"]:
+            if uid in state["students"]:
+                state["students"][uid]["asset"] = name
+
+class Journal:
+    def __init__(self, folder=None):
+        self.folder = folder or user_data_dir("autosave")
+        os.makedirs(self.folder, exist_ok=True)
+        self.photo_dir = os.path.join(self.folder, "fotos")
+        self.journal_path = os.path.join(self.folder, "journal.jsonl")
+        self.snapshot_path = os.path.join(self.folder, "snapshot.json")
+        self.state = empty_state()
+        self.pending_ops = 0    # regels sinds de laatste snapshot
+        self._file = None
+        self._unsynced = False
+        self._encoding = []     # [(future, uid, leerling)]: foto's die nog gecodeerd worden
+
+    # ---------- herstellen ----------
+    def has_session(self):
+        """Is er een vorige sessie met leerlingen achtergebleven (crash of geforceerd afsluiten)?"""
+        try:
+            state = self.load()
+        except Exception:
+            return False
+        return bool(state["students"])
+
+    def load(self):
+        """Lees snapshot + journaal. Een half geschreven laatste regel wordt genegeerd."""
+        state = empty_state()
+        if os.path.isfile(self.snapshot_path):
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snap = json.load(f)
+            state["meta"].update(snap.get("meta", {}))
+            state["next_uid"] = snap.get("next_uid", 1)
+            for entry in snap.get("students", []):
+                state["students"][entry["uid"]] = {k: entry.get(k) for k in STUDENT_KEYS}
+                state["order"].append(entry["uid"])
+        ops = 0
+        if os.path.isfile(self.journal_path):
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        op = json.loads(line)
+                    except ValueError:
+                        break
+                    apply_op(state, op)
+                    ops += 1
+        self.state, self.pending_ops = state, ops
+        return state
+
+    def restore_students(self, placeholder_size=100):
+        """
+        Leerlingen (met uid) uit de geladen toestand; foto's blijven gecodeerd tot ze
+        nodig zijn (zie zitcore.lazy). Returned: (students, missing_images).
+        """
+        metas, assets = [], {}
+        for uid in self.state["order"]:
+            entry = dict(self.state["students"][uid])
+            asset = entry.get("asset")
+            metas.append(dict(entry, img_filename=asset))
+            path = os.path.join(self.photo_dir, asset) if asset else None
+            if path and os.path.isfile(path):
+                with open(path, "rb") as f:
+                    assets[asset] = f.read()
+        students, missing = students_from_data({"students": metas, "asset_names": "sha256"}, assets, placeholder_size)
+        for uid, s in zip(self.state["order"], students):
+            s["uid"] = uid
+        return students, missing
+
+    # ---------- opnemen ----------
+    def record(self, meta, students):
+        """
+        Vergelijk de huidige toestand met de vorige en schrijf enkel de verschillen.
+        Foto's van nieuwe leerlingen worden op de achtergrond gecodeerd (zie flush).
+        Returned: aantal nieuwe regels (0 = niets veranderd).
+        """
+        state = self.state
+        ops = []
+        meta = _plain({k: meta.get(k) for k in META_KEYS + LAYOUT_KEYS})
+        values = {k: meta[k] for k in LAYOUT_KEYS if meta[k] != state["meta"].get(k)}
+        if values:
+            ops.append({"op": "layout", "values": values})
+        values = {k: meta[k] for k in META_KEYS if meta[k] != state["meta"].get(k)}
+        if values:
+            ops.append({"op": "meta", "values": values})
+
+        current = {}
+        new = []
+        for s in students:
+            if s.get("uid") not in state["students"] or s["uid"] in current:
+                s["uid"] = state["next_uid"]
+                state["next_uid"] += 1
+                new.append(s)
+            current[s["uid"]] = s
+        gone = [uid for uid in state["order"] if uid not in current]
+        if gone:
+            ops.append({"op": "delete", "uids": gone})
+        if new:
+            self._store_photos(new)
+            ops.append({"op": "import", "students": [dict({k: s.get(k) for k in STUDENT_KEYS}, uid=s["uid"]) for s in new]})
+
+        moves = []
+        for uid, s in current.items():
+            old = state["students"].get(uid)
+            if old is None:
+                continue
+            if old["name"] != s["name"] or old["font_size"] != s.get("font_size"):
+                ops.append({"op": "rename", "uid": uid, "name": s["name"], "font_size": s.get("font_size")})
+            if old["slot"] != s["slot"]:
+                moves.append([uid, s["slot"]])
+        if moves:
+            ops.append({"op": "move", "slots": moves})
+        order = [s["uid"] for s in students]
+        kept = [u for u in state["order"] if u in current] + [s["uid"] for s in new]
+        if order != kept:
+            ops.append({"op": "order", "uids": order})
+
+        self._write_ops(ops)
+        return len(ops)
+
+    def _write_ops(self, ops):
+        if not ops:
+            return
+        if self._file is None:
+            self._file = open(self.journal_path, "a", encoding="utf-8")
+        for op in ops:
+            apply_op(self.state, op)
+            self._file.write(json.dumps(op, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self.pending_ops += len(ops)
+        self._unsynced = True
+
+    def _store_photos(self, students):
+        """
+        Laat de foto's van nieuwe leerlingen op de achtergrond coderen en in fotos/ zetten
+        (enkel als die inhoud er nog niet staat). De worker krijgt een momentopname van
+        pending/pil, zodat de GUI de leerling intussen gewoon kan aanpassen.
+        """
+        os.makedirs(self.photo_dir, exist_ok=True)
+        for s in students:
+            if s.get("asset") and os.path.isfile(os.path.join(self.photo_dir, s["asset"])):
+                continue
+            photo = {"pending": s.get("pending"), "pil": s.get("pil")}
+            self._encoding.append((_encode_pool().submit(_write_photo, self.photo_dir, photo), s["uid"], s))
+
+    def busy(self):
+        """Worden er nog foto's gecodeerd (of wachten ze op flush)?"""
+        return bool(self._encoding)
+
+    def _collect_photos(self, wait=False):
+        """Namen van de bewaarde foto's in het journaal zetten; wait: ook op de rest wachten."""
+        done, assets = [], []
+        for entry in self._encoding:
+            fut, uid, s = entry
+            if not (wait or fut.done()):
+                continue
+            done.append(entry)
+            name = fut.result()   # een schrijffout (bv. schijf vol) komt zo bij de GUI terecht
+            s["asset"] = name
+            if uid in self.state["students"]:
+                assets.append([uid, name])
+        self._encoding = [e for e in self._encoding if e not in done]
+        if assets:
+            self._write_ops([{"op": "asset", "assets": assets}])
+
+    def flush(self):
+        """
+        Voeg de intussen bewaarde foto's toe, schrijf gebufferde regels weg en fsync
+        (één keer per batch). Compacteert indien nodig.
+        """
+        self._collect_photos()
+        if self._file is not None and self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = False
+        if self.pending_ops >= COMPACT_AFTER:
+            self.compact()
+
+    def compact(self):
+        """Vat de toestand samen in snapshot.json, begin een leeg journaal en ruim ongebruikte foto's op."""
+        state = self.state
+        snap = {"meta": state["meta"], "next_uid": state["next_uid"],
+                "students": [dict(state["students"][uid], uid=uid) for uid in state["order"]]}
+        atomic_write(self.snapshot_path,
+                     lambda f: f.write(json.dumps(snap, ensure_ascii=False).encode("utf-8")))
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        # pas na een geslaagde snapshot mag het journaal weg
+        open(self.journal_path, "w").close()
+        self.pending_ops = 0
+        self._unsynced = False
+        used = {s.get("asset") for s in state["students"].values()}
+        # foto's die nog gecodeerd worden staan nog niet in de toestand: dan later opruimen
+        if os.path.isdir(self.photo_dir) and not self._encoding:
+            for name in os.listdir(self.photo_dir):
+                if name not in used:
+                    try:
+                        os.unlink(os.path.join(self.photo_dir, name))
+                    except OSError:
+                        pass
+
+    def clear(self):
+        """
+        Vergeet de sessie (na normaal afsluiten, een gesloten tabblad of als herstel
+        geweigerd wordt). De map van een extra tabblad verdwijnt helemaal.
+        """
+        # niet meer in een verwijderde map laten schrijven: wachtende workers annuleren, lopende afwachten
+        for fut, _, _ in self._encoding:
+            if not fut.cancel():
+                fut.exception()
+        self._encoding = []
+        self.close()
+        for path in (self.journal_path, self.snapshot_path):
+            if os.path.isfile(path):
+                os.unlink(path)
+        shutil.rmtree(self.photo_dir, ignore_errors=True)
+        if os.path.basename(os.path.normpath(self.folder)).startswith(TAB_DIR_PREFIX):
+            shutil.rmtree(self.folder, ignore_errors=True)
+        self.state = empty_state()
+        self.pending_ops = 0
+
+    def close(self):
+        if self._encoding:
+            self._collect_photos(wait=True)
+        if self._file is not None:
+            self.flush()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
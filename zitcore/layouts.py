@@ -0,0 +1,240 @@
+import os
+import json
+
+from .config import A4, portrait, landscape
+from .fileio import read_text, atomic_write
+
+class LayoutCatalog(dict):
+    """
+    De ingebouwde opstellingen, aangevuld met een bibliotheek (zitcore.library) als
+    die gekoppeld is: `naam in LAYOUTS` kent ook de bibliotheek en LAYOUTS[naam]
+    leest een bibliotheekopstelling pas in als ze gevraagd wordt. Ingebouwde namen
+    gaan voor; itereren geeft enkel wat al geladen is.
+    """
+    library = None
+
+    def __missing__(self, name):
+        if self.library is None or name not in self.library:
+            raise KeyError(name)
+        cfg = self[name] = self.library.load(name)
+        return cfg
+
+    def __contains__(self, name):
+        return dict.__contains__(self, name) or (self.library is not None and name in self.library)
+
+    def get(self, name, default=None):
+        try:
+            return self[name]
+        except KeyError:
+            return default
+
+    def names(self):
+        """Alle namen: ingebouwd en bibliotheek (die laatste zonder ze in te lezen)."""
+        names = list(self)
+        if self.library is not None:
+            names += [n for n in self.library.entries if not dict.__contains__(self, n)]
+        return names
+
+    def is_builtin(self, name):
+        return name in BUILTIN_LAYOUTS
+
+# =========================
+# Layouts definitie (incl. default Eigen opstelling)
+# =========================
+LAYOUTS = LayoutCatalog({
+    "Lang type — 5 rijen × 3 banken × 2 stoelen": {
+        "regular": True, "rows": 5, "banks": 3, "seats": 2, "orientation": "portrait"
+    },
+    "Breed type — 4 rijen × 4 banken × 2 stoelen": {
+        "regular": True, "rows": 4, "banks": 4, "seats": 2, "orientation": "landscape"
+    },
+    "Kleine klas — 3 rijen × 4 banken × 2 stoelen": {
+        "regular": True, "rows": 3, "banks": 4, "seats": 2, "orientation": "landscape"
+    },
+    "Grote klas — 6 rijen × 3 banken × 2 stoelen": {
+        "regular": True, "rows": 6, "banks": 3, "seats": 2, "orientation": "portrait"
+    },
+    "Labo — 4 rijen × 2 banken × 4 stoelen": {
+        "regular": True, "rows": 4, "banks": 2, "seats": 4, "orientation": "landscape"
+    },
+    "Lokaal X — 3 rijen × (3-2-2-3 stoelen)": {
+        "regular": False,
+        "pattern": [[3,2,2,3], [3,2,2,3], [3,2,2,3], [3,2,2,3]],
+        "orientation": "landscape",
+        "center_first_row": True
+    },
+    "Lokaal Y — 3 rijen × 3 banken × 3 stoelen + rij met 4 stoelen": {
+        "regular": False,
+        "pattern": [[4], [3,3,3], [3,3,3], [3,3,3]],
+        "orientation": "landscape",
+        "center_first_row": True
+    },
+    "Lokaal Z — 3 rijen × 5 banken × 2 stoelen": {
+        "regular": True, "rows": 3, "banks": 5, "seats": 2, "orientation": "landscape"
+    },
+    "Eigen opstelling": {
+        "regular": True, "rows": 4, "banks": 3, "seats": 2, "orientation": "portrait"
+    }
+})
+BUILTIN_LAYOUTS = frozenset(LAYOUTS)
+
+def parse_pattern_text(raw: str):
+    if raw is None:
+        raise ValueError("Leeg patroon")
+    s = raw.strip()
+    if not s:
+        raise ValueError("Leeg patroon")
+    s = s.replace("], [", ";").replace("],[", ";").replace("][", ";")
+    s = s.replace("[", "").replace("]", "")
+    s = s.replace("\n", ";")
+    parts = [p.strip() for p in s.split(";") if p.strip()]
+    pattern = []
+    for p in parts:
+        nums = [x.strip() for x in p.split(",") if x.strip()]
+        if not nums:
+            raise ValueError("Lege rij in patroon")
+        row = []
+        for n in nums:
+            if not n.isdigit():
+                raise ValueError(f"Niet-numerieke waarde in patroon: '{n}'")
+            v = int(n)
+            if v <= 0:
+                raise ValueError("Alle aantallen moeten > 0 zijn")
+            row.append(v)
+        pattern.append(row)
+    return pattern
+
+def page_size_for(cfg):
+    """Paginaformaat (A4 staand of liggend) voor een opstelling."""
+    return portrait(A4) if cfg.get("orientation", "portrait") == "portrait" else landscape(A4)
+
+def find_layout(query, layouts=None):
+    """
+    Zoek een opstelling op naam: eerst exact, dan hoofdletterongevoelig op begin
+    van de naam (bv. "Labo"), en tot slot als deel van de naam.
+    Returned: de volledige naam, of raise KeyError (ook bij meerdere kandidaten).
+    """
+    layouts = LAYOUTS if layouts is None else layouts
+    if query in layouts:
+        return query
+    names = layouts.names() if isinstance(layouts, LayoutCatalog) else list(layouts)
+    q = query.strip().rstrip(".").strip().lower()
+    for match in (lambda n: n.lower().startswith(q), lambda n: q in n.lower()):
+        hits = [n for n in names if match(n)]
+        if len(hits) == 1:
+            return hits[0]
+        if len(hits) > 1:
+            raise KeyError(f"Opstelling '{query}' is niet eenduidig: " + "; ".join(hits))
+    raise KeyError(f"Onbekende opstelling: '{query}'")
+
+def layout_capacity(cfg):
+    """Aantal plaatsen in een opstelling."""
+    if cfg.get("free"):
+        return sum(b.get("seats", 1) for b in cfg["banks"])
+    if cfg.get("regular"):
+        return cfg["rows"] * cfg["banks"] * cfg["seats"]
+    return sum(sum(row) for row in cfg.get("pattern", []))
+
+def default_layout_for(count, layouts=None):
+    """
+    Kleinste opstelling waarin `count` leerlingen passen ("Eigen opstelling" telt niet
+    mee); past niemand, dan de grootste. Returned: de naam.
+    """
+    layouts = LAYOUTS if layouts is None else layouts
+    options = [(layout_capacity(cfg), n) for n, cfg in layouts.items() if n != "Eigen opstelling"]
+    fitting = [o for o in options if o[0] >= count]
+    return min(fitting)[1] if fitting else max(options)[1]
+
+def _number(value, what):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{what} moet een getal zijn, niet {value!r}")
+    return value
+
+def parse_layout(data):
+    """
+    Opstelling uit JSON (dict) -> cfg zoals in LAYOUTS. Drie soorten:
+      {"rows": 4, "banks": 3, "seats": 2}                      rijen × banken × stoelen
+      {"pattern": [[3,2,2,3], [4]]}                             stoelen per bank, rij per rij
+      {"banks": [{"x": 0, "y": 0, "seats": 2, "angle": 0}],     vrij: banken met coördinaten
+       "seats": [{"x": 9, "y": 0}]}                             (in stoelbreedtes) en hoek; losse stoelen
+    Telkens met optioneel "orientation": "portrait" of "landscape".
+    Raise ValueError met een leesbare uitleg bij een ongeldige opstelling.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Een opstelling moet een JSON-object zijn")
+    orientation = data.get("orientation", "portrait")
+    if orientation not in ("portrait", "landscape"):
+        raise ValueError(f"Ongeldige oriëntatie: {orientation!r}")
+    if isinstance(data.get("banks"), list) or isinstance(data.get("seats"), list):
+        banks = []
+        for k, bank in enumerate(list(data.get("banks") or []) + [dict(s, seats=1) for s in data.get("seats") or []]):
+            if not isinstance(bank, dict):
+                raise ValueError(f"Bank {k+1} moet een object zijn met x en y")
+            seats = bank.get("seats", 1)
+            if isinstance(seats, bool) or not isinstance(seats, int) or seats <= 0:
+                raise ValueError(f"Bank {k+1}: aantal stoelen moet een positief geheel getal zijn")
+            banks.append({"x": _number(bank.get("x"), f"Bank {k+1}: x"), "y": _number(bank.get("y"), f"Bank {k+1}: y"),
+                          "seats": seats, "angle": _number(bank.get("angle", 0), f"Bank {k+1}: angle")})
+        if not banks:
+            raise ValueError("Een vrije opstelling heeft minstens één bank of stoel nodig")
+        return {"free": True, "banks": banks, "orientation": orientation}
+    if "pattern" in data:
+        pattern = data["pattern"]
+        if isinstance(pattern, str):
+            pattern = parse_pattern_text(pattern)
+        if not pattern or not all(isinstance(row, list) and row and
+                                  all(isinstance(n, int) and not isinstance(n, bool) and n > 0 for n in row) for row in pattern):
+            raise ValueError("Een patroon is een lijst rijen met per bank een positief aantal stoelen")
+        return {"regular": False, "pattern": pattern, "orientation": orientation, "center_first_row": True}
+    try:
+        rows, banks, seats = (int(data[k]) for k in ("rows", "banks", "seats"))
+    except (KeyError, TypeError, ValueError):
+        raise ValueError("Onbekende opstelling: verwacht rows/banks/seats, pattern of een lijst banks met coördinaten")
+    if min(rows, banks, seats) <= 0:
+        raise ValueError("Rijen, banken en stoelen moeten > 0 zijn")
+    return {"regular": True, "rows": rows, "banks": banks, "seats": seats, "orientation": orientation}
+
+def compile_layout(cfg):
+    """
+    Zet een opstelling om naar een vrije opstelling (banken met coördinaten) die er
+    hetzelfde uitziet: een vertrekpunt om er bv. een U-vorm of eilandjes van te maken.
+    """
+    from .geometry import compute_geometry
+    if cfg.get("free"):
+        return dict(cfg)
+    geometry = compute_geometry(cfg, page_size_for(cfg))
+    size = geometry["seat_size"]
+    counts = [0]*len(geometry["base_bank_rects"])
+    for slot in geometry["base_slots"]:
+        counts[slot["bank"]] += 1
+    x_min = min(r[0] for r in geometry["base_bank_rects"])
+    y_min = min(r[1] for r in geometry["base_bank_rects"])
+    banks = [{"x": round((x0 - x_min) / size, 3), "y": round((y0 - y_min) / size, 3), "seats": n, "angle": 0}
+             for (x0, y0, _, _), n in zip(geometry["base_bank_rects"], counts)]
+    return {"free": True, "banks": banks, "orientation": cfg.get("orientation", "portrait")}
+
+def layout_to_json(cfg):
+    """Omgekeerde van parse_layout: cfg -> dict om als JSON te bewaren."""
+    if cfg.get("free"):
+        return {"orientation": cfg.get("orientation", "portrait"), "banks": cfg["banks"]}
+    if not cfg.get("regular", True):
+        return {"orientation": cfg.get("orientation", "portrait"), "pattern": cfg["pattern"]}
+    return {"rows": cfg["rows"], "banks": cfg["banks"], "seats": cfg["seats"], "orientation": cfg.get("orientation", "portrait")}
+
+def read_layout_file(path):
+    """Lees een opstelling uit een JSON-bestand. Returned: (naam, cfg); naam uit "name" of de bestandsnaam."""
+    try:
+        data = json.loads(read_text(path))
+    except json.JSONDecodeError as e:
+        raise ValueError(f"{os.path.basename(path)} is geen geldige JSON: {e}")
+    name = data.get("name") if isinstance(data, dict) else None
+    return name or os.path.splitext(os.path.basename(path))[0], parse_layout(data)
+
+def write_layout_file(path, name, cfg, room=""):
+    """Bewaar een opstelling als JSON (leesbaar met read_layout_file); room: lokaal, voor de bibliotheek."""
+    data = dict(name=name, **layout_to_json(cfg))
+    if room:
+        data["room"] = room
+    text = json.dumps(data, ensure_ascii=False, indent=2)
+    atomic_write(path, lambda f: f.write(text.encode("utf-8")))
+    return path
@@ -0,0 +1,83 @@
+"""
+Uitgesteld decoderen van foto's.
+
+Een geladen verdeling houdt per leerling eerst enkel de gecodeerde bytes bij
+(student["pending"], student["pil"] is dan None). ImageDecoder decodeert die in
+een threadpool zodra ze nodig zijn: de GUI vraagt eerst de zichtbare leerlingen
+aan, export en opslaan vragen alles.
+"""
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from .imaging import placeholder_image
+from .trace import traced
+
+@traced("decode")
+def decode_image(data):
+    """Decodeer foto-bytes naar een RGB-afbeelding (raise bij onleesbare data)."""
+    return Image.open(io.BytesIO(data)).convert("RGB")
+
+class ImageDecoder:
+    def __init__(self, workers=None, placeholder_size=100):
+        self.placeholder_size = placeholder_size
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="decode")
+        self._futures = {}   # id(student) -> (student, future)
+
+    def _decode(self, data):
+        try:
+            return decode_image(data)
+        except Exception:
+            return placeholder_image(self.placeholder_size)
+
+    def request(self, students):
+        """Start het decoderen (op de achtergrond) van deze leerlingen, in volgorde."""
+        for s in students:
+            if s.get("pil") is None and s.get("pending") is not None and id(s) not in self._futures:
+                self._futures[id(s)] = (s, self._pool.submit(self._decode, s["pending"]))
+
+    def ensure(self, s):
+        """Geef de afbeelding van s; wacht of decodeer meteen als dat nog niet gebeurd is."""
+        if s.get("pil") is None:
+            entry = self._futures.pop(id(s), None)
+            if entry is not None:
+                s["pil"] = entry[1].result()
+            elif s.get("pending") is not None:
+                s["pil"] = self._decode(s["pending"])
+            else:
+                s["pil"] = placeholder_image(self.placeholder_size)
+        return s["pil"]
+
+    def ensure_all(self, students):
+        """Decodeer alles wat nog ontbreekt, parallel."""
+        self.request(students)
+        for s in students:
+            self.ensure(s)
+
+    def collect(self):
+        """
+        Zet afgewerkte achtergrond-decodes in de leerling-dicts (aan te roepen vanuit
+        de thread die de leerlingen beheert). Returned: lijst van leerlingen die klaar zijn.
+        """
+        done = []
+        for key, (s, fut) in list(self._futures.items()):
+            if fut.done():
+                del self._futures[key]
+                if s.get("pil") is None:
+                    s["pil"] = fut.result()
+                    done.append(s)
+        return done
+
+    def busy(self):
+        return bool(self._futures)
+
+    def close(self):
+        self.forget()
+        self._pool.shutdown(wait=False)
+
+    def forget(self):
+        """Vergeet lopende aanvragen (bv. na het laden van een andere verdeling)."""
+        for _, fut in self._futures.values():
+            fut.cancel()
+        self._futures.clear()
@@ -0,0 +1,158 @@
+"""
+Gedeelde bibliotheek van opstellingen: een map met één JSON-bestand per lokaal
+(bv. op de netwerkschijf van de school), in het formaat van zitcore.layouts.parse_layout,
+met daarbij "name" en eventueel "room".
+
+Bij het opstarten wordt enkel index.json gelezen (per bestand: naam, lokaal, aantal
+plaatsen, oriëntatie) en de map overlopen op gewijzigde bestanden (enkel stat);
+alleen nieuwe of gewijzigde bestanden worden ingelezen, daarna wordt de index
+bijgewerkt (als de map schrijfbaar is). De volledige opstelling wordt pas gelezen
+wanneer ze gekozen wordt (load), de geometrie pas wanneer ze getekend wordt.
+"""
+import os
+import json
+
+from .config import LAYOUT_LIBRARY_DIR, user_data_dir
+from .fileio import read_text, atomic_write
+from .layouts import LAYOUTS, BUILTIN_LAYOUTS, layout_capacity, parse_layout, write_layout_file
+from .seating import safe_filename
+
+LIBRARY_ENV = "ZITPLAATSEN_LAYOUTS"
+INDEX_NAME = "index.json"
+INDEX_VERSION = 1
+
+def library_dir():
+    """Map van de bibliotheek: ZITPLAATSEN_LAYOUTS, LAYOUT_LIBRARY_DIR of een map in de gebruikersdata."""
+    folder = os.environ.get(LIBRARY_ENV, "").strip() or LAYOUT_LIBRARY_DIR
+    return folder or user_data_dir("opstellingen")
+
+def _entry(fname, stat, name, cfg, room):
+    return {"name": name, "room": room or "", "seats": layout_capacity(cfg),
+            "orientation": cfg.get("orientation", "portrait"), "free": bool(cfg.get("free")),
+            "file": fname, "mtime": stat.st_mtime_ns, "size": stat.st_size}
+
+class LayoutLibrary:
+    def __init__(self, folder):
+        self.folder = folder
+        self.entries = {}    # naam -> indexregel
+        self.errors = []     # [(bestand, fout)] van bestanden die niet gelezen konden worden
+        self._loaded = {}    # naam -> cfg, enkel voor gekozen opstellingen
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _read_index(self):
+        try:
+            data = json.loads(read_text(os.path.join(self.folder, INDEX_NAME)))
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+            return {}
+        return {e["file"]: e for e in data.get("layouts", []) if isinstance(e, dict) and "file" in e}
+
+    def _write_index(self):
+        data = {"version": INDEX_VERSION, "layouts": sorted(self.entries.values(), key=lambda e: e["file"])}
+        text = json.dumps(data, ensure_ascii=False, indent=1)
+        try:
+            atomic_write(os.path.join(self.folder, INDEX_NAME), lambda f: f.write(text.encode("utf-8")))
+        except OSError:
+            pass   # bv. een alleen-lezen netwerkmap: volgende keer opnieuw inlezen
+
+    def refresh(self):
+        """Lees de index en werk ze bij voor nieuwe, gewijzigde en verwijderde bestanden. Returned: self."""
+        cached = self._read_index()
+        entries, errors, changed = {}, [], False
+        try:
+            files = sorted((e for e in os.scandir(self.folder)
+                            if e.is_file() and e.name.lower().endswith(".json") and e.name != INDEX_NAME),
+                           key=lambda e: e.name)
+        except OSError:
+            files = []
+        for item in files:
+            stat = item.stat()
+            entry = cached.pop(item.name, None)
+            if entry is None or entry.get("mtime") != stat.st_mtime_ns or entry.get("size") != stat.st_size:
+                try:
+                    name, cfg, room = self._read_file(item.path)
+                except (OSError, ValueError) as e:
+                    errors.append((item.name, str(e)))
+                    continue
+                entry = _entry(item.name, stat, name, cfg, room)
+                self._loaded.pop(entry["name"], None)
+                if entry["name"] not in BUILTIN_LAYOUTS:
+                    dict.pop(LAYOUTS, entry["name"], None)   # eerder geladen, nu gewijzigd
+                changed = True
+            name = entry["name"]
+            if name in entries or name in BUILTIN_LAYOUTS:
+                name = entry["name"] = f"{name} ({os.path.splitext(item.name)[0]})"
+            entries[name] = entry
+        if cached:
+            changed = True   # bestanden verdwenen
+        self.entries, self.errors = entries, errors
+        if changed:
+            self._write_index()
+        return self
+
+    def _read_file(self, path):
+        """Zoals layouts.read_layout_file, maar ook met het lokaal. Returned: (naam, cfg, lokaal)."""
+        try:
+            data = json.loads(read_text(path))
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{os.path.basename(path)} is geen geldige JSON: {e}")
+        cfg = parse_layout(data)
+        name = data.get("name") or os.path.splitext(os.path.basename(path))[0]
+        return name, cfg, str(data.get("room") or "")
+
+    def load(self, name):
+        """Volledige opstelling (cfg) van een bibliotheeknaam; één keer ingelezen."""
+        cfg = self._loaded.get(name)
+        if cfg is None:
+            entry = self.entries[name]
+            _, cfg, _ = self._read_file(os.path.join(self.folder, entry["file"]))
+            self._loaded[name] = cfg
+        return cfg
+
+    def save(self, name, cfg, room=""):
+        """Bewaar een opstelling als nieuw bestand in de bibliotheek (of overschrijf die met dezelfde naam)."""
+        entry = self.entries.get(name)
+        fname = entry["file"] if entry else (safe_filename(name) or "opstelling") + ".json"
+        path = os.path.join(self.folder, fname)
+        write_layout_file(path, name, cfg, room=room)
+        self.entries[name] = _entry(fname, os.stat(path), name, cfg, room)
+        self._loaded[name] = cfg
+        self._write_index()
+        return path
+
+def catalog(library=None):
+    """Alle kiesbare opstellingen als indexregels: eerst de ingebouwde, dan de bibliotheek (op naam)."""
+    rows = [{"name": name, "room": "", "seats": layout_capacity(cfg), "orientation": cfg.get("orientation", "portrait"),
+             "free": bool(cfg.get("free")), "file": None}
+            for name, cfg in dict.items(LAYOUTS)
+            if library is None or name not in library.entries]   # ingebouwd of uit een geopende verdeling
+    if library is not None:
+        rows += sorted(library.entries.values(), key=lambda e: e["name"].lower())
+    return rows
+
+def search_layouts(rows, query):
+    """
+    Filter indexregels: elk woord van query moet voorkomen in naam, lokaal of aantal
+    plaatsen (hoofdletterongevoelig). Namen die met het eerste woord beginnen eerst.
+    """
+    terms = query.lower().split()
+    if not terms:
+        return list(rows)
+    hits = []
+    for row in rows:
+        text = f"{row['name']} {row['room']} {row['seats']}".lower()
+        if all(t in text for t in terms):
+            hits.append(row)
+    return sorted(hits, key=lambda r: not (r["name"].lower().startswith(terms[0]) or r["room"].lower().startswith(terms[0])))
+
+def open_library(folder=None):
+    """Bibliotheek in folder (standaard library_dir()), ingelezen en gekoppeld aan LAYOUTS."""
+    library = LayoutLibrary(folder or library_dir()).refresh()
+    LAYOUTS.library = library
+    return library
@@ -0,0 +1,136 @@
+"""
+Geheugenboekhouding voor foto's en caches, met een budget.
+
+Per leerling tellen we het origineel (student["pil"], gedecodeerd), de gecodeerde
+bytes (student["pending"]) en de thumbnail op het scherm (student["tk"]). Caches
+(bv. de JPEG-cache van de PDF-export) tellen mee via hun nbytes().
+
+Loopt het totaal boven het budget, dan maakt enforce_budget() eerst de caches leeg
+en verkleint daarna de grootste originelen tot ORIGINAL_MAX_PX: groter hebben
+export (SEAT_MAX × oversample) en de grootste zoom nooit nodig, dus op het scherm
+en in de PDF verandert er niets. Enkel een nieuw opgeslagen foto is dan kleiner.
+"""
+import os
+
+from PIL import Image
+
+from .config import MEMORY_BUDGET_MB, SEAT_MAX, PDF_EXPORT_OVERSAMPLE
+
+MEMORY_ENV = "ZITPLAATSEN_MEMORY_MB"
+ORIGINAL_MAX_PX = SEAT_MAX * PDF_EXPORT_OVERSAMPLE
+
+MB = 1024 * 1024
+
+def memory_budget():
+    """Budget in bytes (ZITPLAATSEN_MEMORY_MB of MEMORY_BUDGET_MB); 0 = geen limiet."""
+    try:
+        mb = float(os.environ.get(MEMORY_ENV, MEMORY_BUDGET_MB))
+    except ValueError:
+        mb = MEMORY_BUDGET_MB
+    return max(0, int(mb * MB))
+
+def image_nbytes(pil):
+    if pil is None:
+        return 0
+    w, h = pil.size
+    return w * h * len(pil.getbands())
+
+def photo_nbytes(photo):
+    """Tk bewaart een PhotoImage als 32-bit pixels."""
+    try:
+        return photo.width() * photo.height() * 4
+    except Exception:
+        return 0
+
+def student_nbytes(s, shared=()):
+    """{"original", "encoded", "thumb"} in bytes. Thumbnails in `shared` (ids) tellen niet mee."""
+    tk_img = s.get("tk")
+    return {
+        "original": image_nbytes(s.get("pil")),
+        "encoded": len(s.get("pending") or b""),
+        "thumb": photo_nbytes(tk_img) if tk_img is not None and id(tk_img) not in shared else 0,
+    }
+
+def memory_report(students, held=(), caches=None, shared=None):
+    """
+    Geheugengebruik van een sessie.
+    students: de leerlingen op het bord; held: leerlingen die enkel nog in de
+    ongedaan-maken-geschiedenis staan; caches: {naam: object met nbytes() of int};
+    shared: {naam: gedeelde afbeelding} (bv. de placeholder), één keer geteld.
+    Returned: {"students": [{name, original, encoded, thumb, total}], grootste eerst,
+    "totals": {original, encoded, thumb, undo, caches: {naam: bytes}}, "total": bytes}.
+    """
+    shared = shared or {}
+    shared_ids = {id(img) for img in shared.values() if img is not None}
+    rows = []
+    totals = {"original": 0, "encoded": 0, "thumb": 0, "undo": 0}
+    for s in students:
+        row = student_nbytes(s, shared_ids)
+        for key, n in row.items():
+            totals[key] += n
+        row["total"] = sum(row.values())
+        row["name"] = s.get("name")
+        rows.append(row)
+    on_board = {id(s) for s in students}
+    seen = set()
+    for s in held:
+        if id(s) in on_board or id(s) in seen:
+            continue
+        seen.add(id(s))
+        n = student_nbytes(s, shared_ids)
+        totals["undo"] += n["original"] + n["encoded"]
+    cache_sizes = {}
+    for name, cache in (caches or {}).items():
+        if cache is not None:
+            cache_sizes[name] = cache if isinstance(cache, int) else cache.nbytes()
+    for name, img in shared.items():
+        if img is not None:
+            cache_sizes[name] = cache_sizes.get(name, 0) + photo_nbytes(img)
+    totals["caches"] = cache_sizes
+    rows.sort(key=lambda r: -r["total"])
+    total = totals["original"] + totals["encoded"] + totals["thumb"] + totals["undo"] + sum(cache_sizes.values())
+    return {"students": rows, "totals": totals, "total": total}
+
+def downscale_original(s, max_px=ORIGINAL_MAX_PX):
+    """Verklein s["pil"] tot hoogstens max_px breed/hoog. Returned: vrijgekomen bytes."""
+    pil = s.get("pil")
+    if pil is None or max(pil.size) <= max_px:
+        return 0
+    before = image_nbytes(pil)
+    smaller = pil.copy()
+    smaller.thumbnail((max_px, max_px), Image.LANCZOS)
+    s["pil"] = smaller
+    return before - image_nbytes(smaller)
+
+def enforce_budget(students, budget, held=(), caches=None, shared=None, max_px=ORIGINAL_MAX_PX):
+    """
+    Breng het geheugengebruik (zie memory_report) onder `budget` bytes: eerst de
+    caches leegmaken (in volgorde, met clear()), daarna de grootste originelen
+    verkleinen (op het bord en in de geschiedenis). Budget 0: niets doen.
+    Returned: {"before", "after", "evicted": [cachenamen], "downscaled": [leerlingen]}.
+    """
+    usage = memory_report(students, held, caches, shared)["total"]
+    result = {"before": usage, "after": usage, "evicted": [], "downscaled": []}
+    if not budget or usage <= budget:
+        return result
+    for name, cache in (caches or {}).items():
+        if usage <= budget:
+            break
+        if cache is None or isinstance(cache, int):
+            continue
+        freed = cache.nbytes()
+        if freed:
+            cache.clear()
+            usage -= freed
+            result["evicted"].append(name)
+    if usage > budget:
+        candidates = {id(s): s for s in list(students) + list(held)}
+        for s in sorted(candidates.values(), key=lambda s: -image_nbytes(s.get("pil"))):
+            if usage <= budget:
+                break
+            freed = downscale_original(s, max_px)
+            if freed:
+                usage -= freed
+                result["downscaled"].append(s)
+    result["after"] = usage
+    return result
@@ -0,0 +1,257 @@
+import io
+import hashlib
+import weakref
+from collections import OrderedDict
+
+from PIL import Image
+from reportlab.pdfgen import canvas as pdfcanvas
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.lib.utils import ImageReader
+
+from .config import (
+    PDF_EXPORT_OVERSAMPLE, PDF_JPEG_QUALITY, CAPTION_GAP, PAGE_MARGIN_LR, PAGE_MARGIN_BOTTOM, TITLE_Y,
+    FONT_MAX, FONT_MIN,
+)
+from .trace import traced
+
+class ExportImageCache:
+    """
+    Sessiecache van foto's zoals ze in een geëxporteerde PDF terechtkomen.
+    Sleutel: (leerlingafbeelding, doelgrootte in pixels). Elke foto wordt per sessie
+    maar één keer geschaald en als JPEG gecodeerd; her-exporteren, extra pagina's en
+    extra documenten hergebruiken dezelfde bytes.
+    Elke entry krijgt ook een digest van de JPEG-bytes: identieke inhoud (zoals de
+    grijze placeholders) wordt zo per document maar één keer ingebed.
+    """
+    def __init__(self, quality=PDF_JPEG_QUALITY, max_entries=1024):
+        self.quality = quality
+        self.max_entries = max_entries
+        # (id(pil), px, quality) -> (weakref naar pil, digest, jpeg bytes)
+        self._entries = OrderedDict()
+
+    def get(self, pil_img, px):
+        key = (id(pil_img), px, self.quality)
+        entry = self._entries.get(key)
+        # id() kan hergebruikt worden na garbage collection: controleer via de weakref
+        if entry is not None and entry[0]() is pil_img:
+            self._entries.move_to_end(key)
+            return entry[1], entry[2]
+        thumb = pil_img.convert("RGB").resize((px, px), Image.LANCZOS)
+        buf = io.BytesIO()
+        thumb.save(buf, format="JPEG", quality=self.quality, optimize=True)
+        data = buf.getvalue()
+        digest = hashlib.sha1(data).hexdigest()
+        self._entries[key] = (weakref.ref(pil_img), digest, data)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return digest, data
+
+    def clear(self):
+        self._entries.clear()
+
+    def nbytes(self):
+        return sum(len(entry[2]) for entry in self._entries.values())
+
+def fit_pdf_font_size(text, max_width):
+    """Grootste lettergrootte (FONT_MIN..FONT_MAX) waarbij text in max_width punten past."""
+    size = FONT_MAX
+    while size > FONT_MIN and stringWidth(text, "Helvetica-Bold", size) > max_width:
+        size -= 1
+    return size
+
+def static_form(c, geometry, name="static_room"):
+    """
+    Leg banken en stoelplaatsen één keer vast als form-XObject.
+    Elke pagina tekent daarna enkel nog een verwijzing (doForm).
+    Het form beslaat het hele blad (sheet_size); bij tiles toont elke pagina er een stuk van.
+    """
+    W, H = geometry["sheet_size"]
+    c.beginForm(name, 0, 0, W, H)
+    # Banken (use base bank rects)
+    c.setLineWidth(1)
+    if geometry.get("base_bank_polys"):
+        # vrije opstelling: banken kunnen gedraaid staan
+        for poly in geometry["base_bank_polys"]:
+            path = c.beginPath()
+            path.moveTo(poly[0][0], H - poly[0][1])
+            for x, y in poly[1:]:
+                path.lineTo(x, H - y)
+            path.close()
+            c.drawPath(path, stroke=1, fill=0)
+    else:
+        for (x0,y0,x1,y1) in geometry["base_bank_rects"]:
+            c.rect(x0, H - y1, x1-x0, y1-y0, stroke=1, fill=0)
+    # Stoel placeholders (dotted)
+    c.setDash(2,2)
+    for slot in geometry["base_slots"]:
+        x,y,w,h = slot["x"], slot["y"], slot["w"], slot["h"]
+        c.rect(x, H-(y+h), w, h, stroke=1, fill=0)
+    c.setDash()
+    c.endForm()
+    return name
+
+def photo_form(c, pil_img, px, forms, image_cache):
+    """
+    Geef de naam van het form-XObject met deze foto.
+    De JPEG komt uit de sessiecache en wordt per document maar één keer
+    ingebed (DCT, zonder hercodering); volgende pagina's en leerlingen met
+    identieke foto verwijzen naar hetzelfde object.
+    """
+    digest, data = image_cache.get(pil_img, px)
+    return jpeg_form(c, digest, data, forms)
+
+def jpeg_form(c, digest, data, forms):
+    """Form-XObject voor reeds gecodeerde JPEG-bytes; per document één keer ingebed."""
+    if digest in forms:
+        return forms[digest]
+    name = f"photo_{digest[:16]}"
+    c.beginForm(name, 0, 0, 1, 1)
+    c.drawImage(ImageReader(io.BytesIO(data)), 0, 0, width=1, height=1)
+    c.endForm()
+    forms[digest] = name
+    return name
+
+def draw_title(c, title, page_label=None):
+    W, H = c._pagesize
+    # Titel (gebruik TITLE_Y zodat UI/PDF overeenkomen)
+    c.setFont("Helvetica-Bold", 20)
+    c.drawCentredString(W/2, H - TITLE_Y, title)
+    if page_label:
+        c.setFont("Helvetica", 10)
+        c.drawRightString(W - PAGE_MARGIN_LR, H - TITLE_Y, page_label)
+
+def draw_page(c, geometry, title, placements, forms, static, image_cache, page_label=None):
+    """
+    Teken één verdeling: titel, statische opstelling en (leerling, slot)-paren.
+    Is de opstelling in stukken verdeeld (geometry["tiles"]), dan wordt dat één
+    pagina per stuk, met markeringen waar het volgende stuk aansluit.
+    """
+    tiles = geometry.get("tiles")
+    if not tiles:
+        draw_title(c, title, page_label)
+        draw_room(c, geometry, placements, forms, static, image_cache)
+        c.showPage()
+        return
+    W, H = c._pagesize
+    SH = geometry["sheet_size"][1]
+    for k, tile in enumerate(tiles):
+        part = f"deel {k+1}/{len(tiles)}"
+        draw_title(c, title, f"{page_label} · {part}" if page_label else part)
+        ox, oy = tile["offset"]
+        w, h = tile["x1"] - tile["x0"], tile["y1"] - tile["y0"]
+        on_tile = set(tile["slots"])
+        c.saveState()
+        clip = c.beginPath()
+        clip.rect(ox, H - oy - h, w, h)
+        c.clipPath(clip, stroke=0, fill=0)
+        # bladpunten -> paginapunten: het stuk begint op de pagina bij (ox, oy)
+        c.translate(ox - tile["x0"], H - oy + tile["y0"] - SH)
+        draw_room(c, geometry, [(s, i) for s, i in placements if i in on_tile], forms, static, image_cache)
+        c.restoreState()
+        draw_tile_marks(c, tiles, tile)
+        c.showPage()
+
+def draw_tile_marks(c, tiles, tile):
+    """Stippellijnen waar een naburig stuk begint (de overlap) en onderaan welke delen aansluiten."""
+    W, H = c._pagesize
+    ox, oy = tile["offset"]
+    w, h = tile["x1"] - tile["x0"], tile["y1"] - tile["y0"]
+    index = {(t["row"], t["col"]): k for k, t in enumerate(tiles)}
+    neighbours = []
+    c.saveState()
+    c.setDash(4, 3)
+    c.setStrokeGray(0.5)
+    for side, dr, dc in (("links", 0, -1), ("rechts", 0, 1), ("boven", -1, 0), ("onder", 1, 0)):
+        k = index.get((tile["row"] + dr, tile["col"] + dc))
+        if k is None:
+            continue
+        neighbours.append(f"{side}: deel {k+1}")
+        other = tiles[k]
+        if side == "links":
+            x = ox + other["x1"] - tile["x0"]
+            c.line(x, H - oy, x, H - oy - h)
+        elif side == "rechts":
+            x = ox + other["x0"] - tile["x0"]
+            c.line(x, H - oy, x, H - oy - h)
+        elif side == "boven":
+            y = H - oy - (other["y1"] - tile["y0"])
+            c.line(ox, y, ox + w, y)
+        else:
+            y = H - oy - (other["y0"] - tile["y0"])
+            c.line(ox, y, ox + w, y)
+    c.restoreState()
+    if neighbours:
+        c.setFont("Helvetica", 8)
+        c.drawCentredString(W/2, PAGE_MARGIN_BOTTOM/2 - 3, "  ·  ".join(neighbours))
+
+def draw_room(c, geometry, placements, forms, static, image_cache):
+    """Statische opstelling en foto's met naam, in bladcoördinaten."""
+    H = geometry["sheet_size"][1]
+    base_slots = geometry["base_slots"]
+    c.doForm(static)
+
+    px = max(1, geometry["seat_size"]*PDF_EXPORT_OVERSAMPLE)
+    for s, slot_idx in placements:
+        if slot_idx is None or not isinstance(slot_idx, int) or slot_idx >= len(base_slots): continue
+        slot = base_slots[slot_idx]
+        x, y = slot["x"], slot["y"]
+        draw_w = draw_h = slot["w"]
+        if s.get("jpeg"):
+            # vooraf gecodeerd (bv. aangeleverd door een batch-worker): (digest, bytes)
+            photo = jpeg_form(c, s["jpeg"][0], s["jpeg"][1], forms)
+        else:
+            photo = photo_form(c, s["pil"], px, forms, image_cache)
+        c.saveState()
+        c.translate(x, H-(y+draw_h))
+        c.scale(draw_w, draw_h)
+        c.doForm(photo)
+        c.restoreState()
+        ui_font_size = int(s.get("font_size", FONT_MAX))
+        ui_font_size = max(FONT_MIN, min(FONT_MAX, ui_font_size))
+        c.setFont("Helvetica-Bold", ui_font_size)
+        c.drawCentredString(x + draw_w/2, H-(y+draw_h+CAPTION_GAP+12), s["name"])
+
+def page_spec(geometry, title, placements, image_cache):
+    """
+    Beschrijf één pagina zonder PIL-afbeeldingen: enkel namen, slots en JPEG-bytes.
+    Zo'n spec is klein en picklebaar (voor procespools) en kan met write_pages
+    in een ander document opnieuw getekend worden zonder hercodering.
+    """
+    px = max(1, geometry["seat_size"]*PDF_EXPORT_OVERSAMPLE)
+    entries = []
+    for s, slot_idx in placements:
+        entries.append(({"name": s["name"], "font_size": s.get("font_size", FONT_MAX),
+                         "jpeg": image_cache.get(s["pil"], px)}, slot_idx))
+    return {"geometry": geometry, "title": title, "placements": entries}
+
+@traced("export.pdf")
+def write_pages(fpath, specs, page_labels=None):
+    """
+    Schrijf page_specs (mogelijk met verschillende opstellingen/oriëntaties) als één PDF.
+    Foto's die in meerdere specs voorkomen worden maar één keer ingebed.
+    """
+    c = pdfcanvas.Canvas(fpath)
+    forms = {}
+    for k, spec in enumerate(specs):
+        geometry = spec["geometry"]
+        c.setPageSize(geometry["page_size"])
+        static = static_form(c, geometry, name=f"static_room_{k}")
+        label = page_labels[k] if page_labels else None
+        draw_page(c, geometry, spec["title"], spec["placements"], forms, static, None, page_label=label)
+    c.save()
+
+@traced("export.pdf")
+def write_pdf(fpath, geometry, title, pages, image_cache=None, page_labels=None):
+    """
+    Schrijf een PDF met één pagina per verdeling.
+    pages: lijst van placements, elk een lijst van (leerling, slot-index).
+    fpath mag ook een bestandsobject zijn.
+    """
+    image_cache = image_cache if image_cache is not None else ExportImageCache()
+    c = pdfcanvas.Canvas(fpath, pagesize=geometry["page_size"])
+    static = static_form(c, geometry)
+    forms = {}
+    for k, placements in enumerate(pages):
+        label = page_labels[k] if page_labels else None
+        draw_page(c, geometry, title, placements, forms, static, image_cache, page_label=label)
+    c.save()
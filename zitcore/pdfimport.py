@@ -0,0 +1,47 @@
+"""
+PDF-import via pdf2image/poppler. pdf2image en de zoektocht naar poppler gebeuren
+pas bij de eerste import van een PDF, zodat het venster sneller opent.
+"""
+import os
+import sys
+
+from .config import PDF_DPI
+from .fileio import read_bytes
+from .trace import traced
+
+_poppler_ready = False
+
+def ensure_poppler():
+    """Zet een meegeleverde poppler/bin vooraan in PATH (eenmalig)."""
+    global _poppler_ready
+    if _poppler_ready:
+        return
+    # --- Poppler packaging support: when bundled by PyInstaller we add the bundled poppler/bin to PATH
+    if getattr(sys, "_MEIPASS", None):
+        # runtime when running from a PyInstaller bundle
+        bundled_poppler_bin = os.path.join(sys._MEIPASS, "poppler", "bin")
+    else:
+        # runtime during development
+        bundled_poppler_bin = os.path.join(os.path.abspath("."), "poppler", "bin")
+
+    # If the folder exists, prepend to PATH so pdf2image can find pdftoppm / pdftocairo
+    if os.path.isdir(bundled_poppler_bin):
+        os.environ["PATH"] = bundled_poppler_bin + os.pathsep + os.environ.get("PATH", "")
+    _poppler_ready = True
+
+@traced("pdf.rasterize")
+def convert_pdf_pages(pdf_path, dpi=PDF_DPI):
+    """
+    Zet de PDF om naar PIL.Image pagina's.
+    Het bestand wordt één keer gelezen (met retry als OneDrive het vergrendelt, zie
+    zitcore.fileio); pdf2image krijgt die bytes rechtstreeks.
+    Returned: lijst van PIL Images of raise Exception.
+    """
+    if not os.path.isfile(pdf_path):
+        raise FileNotFoundError(f"PDF niet gevonden: {pdf_path}")
+    ensure_poppler()
+    from pdf2image import convert_from_bytes   # (will find poppler via PATH if present)
+    pages = convert_from_bytes(read_bytes(pdf_path), dpi=dpi)
+    if not pages:
+        raise ValueError("Geen pagina's gevonden in PDF.")
+    return pages
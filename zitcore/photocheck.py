@@ -0,0 +1,152 @@
+"""
+Controle van geïmporteerde foto's vóór ze op het bord komen: dubbele foto's (zelfde
+foto onder twee namen), lege vakken en uitsneden die verschoven zijn (een witte
+strook met de naam van de rij erboven of eronder, bv. door een verkeerd aangeduide
+rij met lange namen).
+
+Elke foto wordt één keer verkleind tot een RGB-vak van SAMPLE_SIZE pixels
+(PIL, in C); al de rest gebeurt in één NumPy-batch over alle foto's samen: het
+perceptuele hash (DCT van 32×32, de laagste 8×8 frequenties t.o.v. hun mediaan),
+de onderlinge Hamming-afstanden, de helderheid en de witte randen.
+Zonder NumPy wordt niet gecontroleerd (check_photos geeft None).
+"""
+from PIL import Image
+
+from .classlist import BLANK_STDDEV, BLANK_MEAN
+
+try:
+    import numpy as np
+except ImportError:   # optioneel: zonder numpy geen controle
+    np = None
+
+SAMPLE_SIZE = 64
+HASH_SIZE = 32
+# zoveel van de 63 hashbits mogen verschillen om nog als dezelfde foto te tellen
+DUPLICATE_BITS = 6
+# ... en de verkleinde foto's (16×16, RGB) mogen gemiddeld hoogstens zoveel verschillen:
+# pasfoto's met dezelfde pose hebben soms bijna hetzelfde hash
+DUPLICATE_MEAN_DIFF = 10
+# een rij telt als "pagina" (wit, met hoogstens wat tekst) als zoveel van de pixels bijna wit is
+EDGE_WHITE_LEVEL = 230
+EDGE_WHITE_FRACTION = 0.75
+# een witte strook boven of onder van minstens zoveel van de hoogte: verschoven uitsnede
+MISALIGN_FRACTION = 0.08
+
+def _dct_matrix(n):
+    k = np.arange(n)[:, None]
+    m = np.cos(np.pi * (2 * np.arange(n)[None, :] + 1) * k / (2 * n))
+    m[0] *= 1 / np.sqrt(2)
+    return m * np.sqrt(2 / n)
+
+def _samples(photos):
+    """Alle foto's als (n, SAMPLE_SIZE, SAMPLE_SIZE, 3) RGB (float32)."""
+    out = np.empty((len(photos), SAMPLE_SIZE, SAMPLE_SIZE, 3), dtype=np.float32)
+    for i, pil in enumerate(photos):
+        small = pil.convert("RGB").resize((SAMPLE_SIZE, SAMPLE_SIZE), Image.BOX, reducing_gap=3.0)
+        out[i] = np.asarray(small, dtype=np.float32)
+    return out
+
+def _gray(rgb):
+    """Grijswaarden zoals PIL ze maakt (ITU-R 601-2)."""
+    return rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+def _pool(a, size):
+    """(n, S, S, ...) -> (n, size, size, ...) door gemiddelden over blokken."""
+    n, f = len(a), SAMPLE_SIZE // size
+    return a.reshape((n, size, f, size, f) + a.shape[3:]).mean(axis=(2, 4))
+
+def perceptual_hashes(gray):
+    """(n, S, S) grijswaarden -> (n,) uint64 pHashes."""
+    n = len(gray)
+    small = _pool(gray, HASH_SIZE)
+    d = _dct_matrix(HASH_SIZE)[:8]   # enkel de laagste 8 frequenties zijn nodig
+    coeffs = (d @ small @ d.T).reshape(n, 64)
+    coeffs = coeffs[:, 1:]   # zonder de DC-term (gemiddelde helderheid)
+    bits = coeffs > np.median(coeffs, axis=1, keepdims=True)
+    return (bits.astype(np.uint64) << np.arange(63, dtype=np.uint64)).sum(axis=1, dtype=np.uint64)
+
+def _popcount(x):
+    x = x - ((x >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    x = (x & np.uint64(0x3333333333333333)) + ((x >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    x = (x + (x >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return (x * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+def hamming_matrix(hashes):
+    """(n, n) aantal verschillende bits tussen elk paar hashes."""
+    return _popcount(hashes[:, None] ^ hashes[None, :]).astype(np.int32)
+
+def _white_band(white_rows):
+    """(n, S) bool per rij -> (n,) lengte van de aaneengesloten witte rijen vanaf de rand."""
+    run = np.cumprod(white_rows, axis=1)
+    return run.sum(axis=1)
+
+def check_photos(photos, pdf=False):
+    """
+    Controleer een lijst PIL-foto's in één batch. pdf: uitsneden van een klaslijst
+    (dan ook op verschuiving controleren; losse foto's mogen een witte rand hebben).
+    Returned: {"blank": [i], "misaligned": [(i, "boven"|"onder")], "duplicates": [(i, j, bits)]}
+    met i < j, of None zonder NumPy.
+    """
+    if np is None:
+        return None
+    report = {"blank": [], "misaligned": [], "duplicates": []}
+    if not photos:
+        return report
+    rgb = _samples(photos)
+    gray = _gray(rgb)
+    n = len(gray)
+    pixels = gray.reshape(n, -1)
+    flat = pixels.std(axis=1) < BLANK_STDDEV
+    blank = flat & (pixels.mean(axis=1) > BLANK_MEAN)
+    report["blank"] = np.flatnonzero(blank).tolist()
+
+    if pdf:
+        white_rows = (gray > EDGE_WHITE_LEVEL).mean(axis=2) >= EDGE_WHITE_FRACTION
+        limit = MISALIGN_FRACTION * SAMPLE_SIZE
+        top = _white_band(white_rows) >= limit
+        bottom = _white_band(white_rows[:, ::-1]) >= limit
+        for i in np.flatnonzero((top | bottom) & ~blank):
+            report["misaligned"].append((int(i), "boven" if top[i] else "onder"))
+
+    hashes = perceptual_hashes(gray)
+    dist = hamming_matrix(hashes)
+    close = np.triu(dist <= DUPLICATE_BITS, k=1)
+    close[flat, :] = False   # effen vlakken (lege vakken, placeholders) hebben geen zinvol hash
+    close[:, flat] = False
+    pi, pj = np.nonzero(close)
+    if len(pi):
+        thumbs = _pool(rgb, 16).reshape(n, -1)
+        same = np.abs(thumbs[pi] - thumbs[pj]).mean(axis=1) <= DUPLICATE_MEAN_DIFF
+        for i, j in zip(pi[same], pj[same]):
+            report["duplicates"].append((int(i), int(j), int(dist[i, j])))
+    return report
+
+def has_problems(report):
+    return bool(report) and any(report[k] for k in ("blank", "misaligned", "duplicates"))
+
+def duplicate_groups(report):
+    """De paren uit report["duplicates"] samengevoegd tot groepen [i, j, ...] (oplopend)."""
+    parent = {}
+    def root(i):
+        while parent.setdefault(i, i) != i:
+            i = parent[i]
+        return i
+    for i, j, _ in report["duplicates"]:
+        parent[root(j)] = root(i)
+    groups = {}
+    for i in sorted(parent):
+        groups.setdefault(root(i), []).append(i)
+    return sorted(groups.values())
+
+def describe_problems(report, names, limit=12):
+    """Leesbare regels (Nederlands) voor een rapport van check_photos; names[i] hoort bij foto i (limit: None = alle)."""
+    def label(i):
+        return names[i] if i < len(names) and names[i] else f"foto {i+1}"
+    lines = [f"{label(i)}: leeg vak" for i in report["blank"]]
+    lines += [f"{label(i)}: verschoven (witte strook {side})" for i, side in report["misaligned"]]
+    for group in duplicate_groups(report):
+        labels = [label(i) for i in group]
+        lines.append(", ".join(labels[:-1]) + f" en {labels[-1]}: zelfde foto")
+    if limit and len(lines) > limit:
+        lines = lines[:limit] + [f"... en nog {len(lines) - limit}"]
+    return lines
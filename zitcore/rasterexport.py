@@ -0,0 +1,237 @@
+"""
+Export van een verdeling als afbeelding (PNG of WebP), bv. om te projecteren of in de
+ELO te zetten, rechtstreeks met PIL en zonder PDF-renderer.
+
+Het blad (geometry["sheet_size"], in punten) wordt passend gecentreerd op de gevraagde
+resolutie. Banken en stoelkaders liggen per (opstelling, resolutie) één keer klaar als
+achtergrond; per export worden enkel de foto's erop geplakt en titel en namen getekend.
+De foto's komen uit een piramide per leerling (origineel, 1/2, 1/4, ...): een doelgrootte
+wordt geschaald vanaf het kleinste niveau dat nog groot genoeg is.
+
+Dezelfde tekening (zonder foto's) dient ook als vaste laag op het scherm, zie
+draw_static_layer: één afbeelding i.p.v. honderden gestippelde canvasrechthoeken.
+"""
+import os
+import weakref
+from collections import OrderedDict
+
+from PIL import Image, ImageDraw, ImageFont
+
+from .config import (
+    RASTER_SIZES, RASTER_WEBP_QUALITY, RASTER_PNG_COMPRESS, CAPTION_GAP, TITLE_Y, FONT_MAX, FONT_MIN,
+    PLACEHOLDER_COLOR,
+)
+from .trace import traced
+
+RASTER_EXTENSIONS = {".png": "PNG", ".webp": "WEBP"}
+# lettertypes in volgorde van voorkeur (Helvetica/Arial vet zoals in de PDF); anders het ingebouwde
+FONT_FILES = ("DejaVuSans-Bold.ttf", "arialbd.ttf", "Arial Bold.ttf", "Helvetica-Bold.ttf", "LiberationSans-Bold.ttf")
+SEAT_OUTLINE = (153, 153, 153)
+TILE_OUTLINE = (106, 159, 216)
+
+def is_raster_path(fpath):
+    return os.path.splitext(str(fpath))[1].lower() in RASTER_EXTENSIONS
+
+def parse_raster_size(text):
+    """'1080p', '4K' of 'BxH' (bv. '2560x1440') -> (breedte, hoogte) in pixels."""
+    for name, size in RASTER_SIZES.items():
+        if text.strip().lower() == name.lower():
+            return size
+    try:
+        w, h = (int(v) for v in text.lower().split("x"))
+    except ValueError:
+        raise ValueError(f"Onbekende resolutie: '{text}' (kies {', '.join(RASTER_SIZES)} of bv. 2560x1440)")
+    if w <= 0 or h <= 0:
+        raise ValueError(f"Ongeldige resolutie: '{text}'")
+    return w, h
+
+_fonts = {}
+
+def _font(px):
+    font = _fonts.get(px)
+    if font is None:
+        for name in FONT_FILES:
+            try:
+                font = ImageFont.truetype(name, px)
+                break
+            except OSError:
+                continue
+        else:
+            font = ImageFont.load_default(px)
+        _fonts[px] = font
+    return font
+
+class RasterCache:
+    """
+    Sessiecache voor de export als afbeelding: per foto de piramide en de geschaalde
+    versies per doelgrootte, en per (opstelling, resolutie) de achtergrond.
+    """
+    def __init__(self, max_photos=1024, max_backgrounds=4):
+        self.max_photos = max_photos
+        self.max_backgrounds = max_backgrounds
+        # id(pil) -> (weakref naar pil, [verkleinde niveaus], {px: foto}); het origineel
+        # zelf wordt niet vastgehouden (het geheugenbudget mag het vervangen)
+        self._photos = OrderedDict()
+        self._backgrounds = OrderedDict()
+
+    def photo(self, pil_img, px):
+        """pil_img als RGB van px × px pixels."""
+        key = id(pil_img)
+        entry = self._photos.get(key)
+        # id() kan hergebruikt worden na garbage collection: controleer via de weakref
+        if entry is None or entry[0]() is not pil_img:
+            levels = [] if pil_img.mode == "RGB" else [pil_img.convert("RGB")]
+            entry = self._photos[key] = (weakref.ref(pil_img), levels, {})
+            while len(self._photos) > self.max_photos:
+                self._photos.popitem(last=False)
+        else:
+            self._photos.move_to_end(key)
+        levels, sized = entry[1], entry[2]
+        thumb = sized.get(px)
+        if thumb is None:
+            src = pil_img if pil_img.mode == "RGB" else levels[0]
+            for level in levels:   # het kleinste niveau dat nog groot genoeg is
+                if min(level.size) >= px:
+                    src = level
+            while min(src.size) >= 2 * px:
+                src = src.reduce(2)
+                levels.append(src)
+            thumb = sized[px] = src.resize((px, px), Image.LANCZOS)
+        return thumb
+
+    def background(self, geometry, size):
+        """Wit blad met banken en stoelkaders voor deze opstelling op deze resolutie."""
+        key = (tuple(geometry["sheet_size"]), tuple(size),
+               tuple((s["x"], s["y"], s["w"]) for s in geometry["base_slots"]),
+               tuple(map(tuple, geometry["base_bank_rects"])))
+        img = self._backgrounds.get(key)
+        if img is None:
+            img = self._backgrounds[key] = draw_background(geometry, size)
+            while len(self._backgrounds) > self.max_backgrounds:
+                self._backgrounds.popitem(last=False)
+        else:
+            self._backgrounds.move_to_end(key)
+        return img
+
+    def clear(self):
+        self._photos.clear()
+        self._backgrounds.clear()
+
+    def nbytes(self):
+        def size(im):
+            return im.size[0] * im.size[1] * len(im.getbands())
+        n = sum(size(im) for im in self._backgrounds.values())
+        for _, levels, sized in self._photos.values():
+            n += sum(size(im) for im in levels) + sum(size(im) for im in sized.values())
+        return n
+
+def fit_sheet(geometry, size):
+    """(schaal, x, y): bladpunten -> pixels, het blad gecentreerd in size."""
+    SW, SH = geometry["sheet_size"]
+    W, H = size
+    scale = min(W / SW, H / SH)
+    return scale, (W - SW * scale) / 2, (H - SH * scale) / 2
+
+def _dashed_rect(draw, x0, y0, x1, y1, dash, fill, width):
+    for a, b, fixed, horizontal in ((x0, x1, y0, True), (x0, x1, y1, True), (y0, y1, x0, False), (y0, y1, x1, False)):
+        t = a
+        while t < b:
+            e = min(b, t + dash)
+            draw.line((t, fixed, e, fixed) if horizontal else (fixed, t, fixed, e), fill=fill, width=width)
+            t += 2 * dash
+
+def _draw_room(img, slots, bank_rects, bank_polys, scale, ox, oy, dash, width):
+    """
+    Banken (zwart) en gestippelde stoelkaders, coördinaten * scale + (ox, oy). Elk
+    stoelkader van dezelfde grootte is hetzelfde: één keer getekend en dan geplakt.
+    """
+    draw = ImageDraw.Draw(img)
+    if bank_polys:
+        for poly in bank_polys:
+            draw.polygon([(ox + x * scale, oy + y * scale) for x, y in poly], outline="black", width=width)
+    else:
+        for x0, y0, x1, y1 in bank_rects:
+            draw.rectangle((ox + x0 * scale, oy + y0 * scale, ox + x1 * scale, oy + y1 * scale), outline="black", width=width)
+    stamps = {}
+    for slot in slots:
+        w = round(slot["w"] * scale)
+        stamp = stamps.get(w)
+        if stamp is None:
+            stamp = stamps[w] = Image.new("RGBA", (w + width, w + width), (0, 0, 0, 0))
+            _dashed_rect(ImageDraw.Draw(stamp), 0, 0, w, w, dash, SEAT_OUTLINE, width)
+        img.paste(stamp, (round(ox + slot["x"] * scale), round(oy + slot["y"] * scale)), stamp)
+
+def draw_background(geometry, size):
+    scale, ox, oy = fit_sheet(geometry, size)
+    img = Image.new("RGB", tuple(size), "white")
+    _draw_room(img, geometry["base_slots"], geometry["base_bank_rects"], geometry.get("base_bank_polys"),
+               scale, ox, oy, max(2, 2 * scale), max(1, round(scale)))
+    return img
+
+def draw_static_layer(geometry, zoom):
+    """
+    Vaste laag voor het canvas: banken, stoelkaders en paginagrenzen van de (al gezoomde)
+    schermgeometrie op een transparante achtergrond, bijgesneden tot wat getekend is.
+    Returned: (RGBA-afbeelding, (x, y)) met (x, y) de plaats op het canvas, of None als er niets is.
+    """
+    W, H = geometry["sheet_size"]
+    img = Image.new("RGBA", (int(W * zoom) + 2, int(H * zoom) + 2), (0, 0, 0, 0))
+    _draw_room(img, geometry["slots"], geometry["bank_rects"], geometry.get("bank_polys"), 1, 0, 0, 2, 1)
+    draw = ImageDraw.Draw(img)
+    for tile in geometry["tiles"]:
+        _dashed_rect(draw, tile["x0"] * zoom, tile["y0"] * zoom, tile["x1"] * zoom, tile["y1"] * zoom, 5, TILE_OUTLINE, 1)
+    bbox = img.getbbox()
+    if bbox is None:
+        return None
+    return img.crop(bbox), bbox[:2]
+
+def render_board(geometry, title, placements, size, cache=None):
+    """
+    De verdeling als PIL-afbeelding van size (breedte, hoogte) pixels.
+    placements: (leerling, slot-index)-paren zoals voor write_pdf.
+    """
+    cache = cache if cache is not None else RasterCache()
+    scale, ox, oy = fit_sheet(geometry, size)
+    img = cache.background(geometry, size).copy()
+    draw = ImageDraw.Draw(img)
+    base_slots = geometry["base_slots"]
+    SW = geometry["sheet_size"][0]
+    draw.text((ox + SW * scale / 2, oy + TITLE_Y * scale), title, fill="black", font=_font(max(1, round(20 * scale))), anchor="ms")
+    placeholder = None
+    for s, slot_idx in placements:
+        if slot_idx is None or not isinstance(slot_idx, int) or slot_idx >= len(base_slots): continue
+        slot = base_slots[slot_idx]
+        x, y = round(ox + slot["x"] * scale), round(oy + slot["y"] * scale)
+        px = max(1, round(slot["w"] * scale))
+        if s.get("pil") is not None:
+            img.paste(cache.photo(s["pil"], px), (x, y))
+        else:
+            if placeholder is None or placeholder.size[0] != px:
+                placeholder = Image.new("RGB", (px, px), PLACEHOLDER_COLOR)
+            img.paste(placeholder, (x, y))
+        font_size = max(FONT_MIN, min(FONT_MAX, int(s.get("font_size", FONT_MAX))))
+        draw.text((x + px / 2, y + px + CAPTION_GAP * scale), s["name"], fill="black",
+                  font=_font(max(1, round(font_size * scale))), anchor="ma")
+    return img
+
+def save_raster(img, fpath):
+    """Bewaar als PNG of WebP, volgens de extensie van fpath."""
+    fmt = RASTER_EXTENSIONS.get(os.path.splitext(str(fpath))[1].lower())
+    if fmt is None:
+        raise ValueError(f"Onbekend beeldformaat: {os.path.basename(str(fpath))} (kies .png of .webp)")
+    if fmt == "PNG":
+        img.save(fpath, format=fmt, compress_level=RASTER_PNG_COMPRESS)
+    else:
+        img.save(fpath, format=fmt, quality=RASTER_WEBP_QUALITY)
+    return fpath
+
+@traced("export.raster")
+def write_raster(fpath, geometry, title, placements, size, cache=None):
+    return save_raster(render_board(geometry, title, placements, size, cache), fpath)
+
+def numbered_paths(fpath, count):
+    """Eén pad per verdeling: plan.png, of plan-1.png, plan-2.png, ... bij meerdere."""
+    if count <= 1:
+        return [fpath]
+    base, ext = os.path.splitext(fpath)
+    return [f"{base}-{k+1}{ext}" for k in range(count)]
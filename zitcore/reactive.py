@@ -0,0 +1,81 @@
+"""
+Kleine reactieve laag voor het venster: benoemde waarden (klas, lokaal, opstelling)
+en de acties die ervan afhangen (titel, tabblad, autosave).
+
+set() noteert enkel dat een waarde veranderd is; dezelfde waarde opnieuw zetten telt
+niet. Alle acties die afhangen van wat veranderde, lopen daarna samen in één idle-pass
+(after_idle), elk één keer, hoeveel toetsen er intussen ook ingedrukt werden. Een
+actie met een delay loopt pas als de waarden zo lang niet meer veranderd zijn
+(debounce), bv. de autosave terwijl je typt.
+
+Tk-vrij: de planner geeft root.after, root.after_idle en root.after_cancel mee.
+"""
+
+_UNSET = object()
+
+class Reactive:
+    def __init__(self, after, after_idle, after_cancel):
+        self._after, self._after_idle, self._after_cancel = after, after_idle, after_cancel
+        self.values = {}
+        self._watchers = []        # [(sleutels, fn, delay in ms)], in volgorde van watch()
+        self._dirty = set()
+        self._idle_pending = False
+        self._idle_job = None
+        self._timers = {}          # index van de watcher -> after-job (debounce)
+
+    def watch(self, keys, fn, delay=0):
+        """fn() na een wijziging van een van keys: in de idle-pass, of pas na delay ms zonder wijzigingen."""
+        self._watchers.append((frozenset(keys), fn, delay))
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def set(self, key, value):
+        """Returned: True als de waarde veranderde (de afhankelijke acties zijn dan ingepland)."""
+        if self.values.get(key, _UNSET) == value:
+            return False
+        self.values[key] = value
+        self._dirty.add(key)
+        if not self._idle_pending:
+            self._idle_pending = True
+            self._idle_job = self._after_idle(self._run)
+        return True
+
+    def _run(self):
+        self._idle_pending = False
+        dirty, self._dirty = self._dirty, set()
+        for i, (keys, fn, delay) in enumerate(self._watchers):
+            if not keys & dirty:
+                continue
+            if delay:
+                job = self._timers.pop(i, None)
+                if job is not None:
+                    self._after_cancel(job)
+                self._timers[i] = self._after(delay, lambda i=i: self._fire(i))
+            else:
+                fn()
+
+    def _fire(self, i):
+        self._timers.pop(i, None)
+        self._watchers[i][1]()
+
+    def flush(self):
+        """Voer wat nog ingepland staat meteen uit, bv. vóór het wisselen van klas."""
+        if self._idle_pending:
+            self._after_cancel(self._idle_job)
+            self._run()
+        for i in sorted(self._timers):
+            job = self._timers.get(i)
+            if job is not None:
+                self._after_cancel(job)
+                self._fire(i)
+
+    def cancel(self):
+        """Vergeet wat nog ingepland staat (bv. bij het sluiten van een klas)."""
+        if self._idle_pending:
+            self._after_cancel(self._idle_job)
+            self._idle_pending = False
+        for job in self._timers.values():
+            self._after_cancel(job)
+        self._timers.clear()
+        self._dirty.clear()
@@ -0,0 +1,75 @@
+"""
+Leerlingen zoeken op naam, terwijl je typt.
+
+Namen worden genormaliseerd (kleine letters, zonder accenten of leestekens) en in
+woorden gesplitst. Elk woord van de zoekopdracht moet het begin van een woord uit
+de naam zijn, of vanaf drie letters er een stuk uit, in eender welke volgorde:
+"piet jans", "janssens p" en "Jánssens" vinden allemaal "Janssens Piet".
+
+Een index van trigrammen en beginletters beperkt de kandidaten vooraf, zodat ook
+een examenbord met honderden leerlingen uit verschillende klassen meteen antwoordt.
+"""
+import re
+import unicodedata
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+# zoveel beginletters van elk woord staan in de index (kortere zoekwoorden)
+PREFIX_LEN = 2
+
+def normalize(text):
+    """'Ségolène D'Hondt-Ünal' -> 'segolene d hondt unal'."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return _NON_ALNUM.sub(" ", text).strip()
+
+def name_tokens(text):
+    return normalize(text).split()
+
+def _grams(token):
+    return {token[j:j+3] for j in range(len(token) - 2)}
+
+def _term_matches(term, token):
+    return token.startswith(term) if len(term) < 3 else term in token
+
+class NameIndex:
+    def __init__(self, names):
+        self.tokens = [name_tokens(n) for n in names]
+        self.grams = {}      # trigram -> {index}
+        self.prefixes = {}   # eerste 1..PREFIX_LEN letters van een woord -> {index}
+        for i, tokens in enumerate(self.tokens):
+            for t in tokens:
+                for k in range(1, min(PREFIX_LEN, len(t)) + 1):
+                    self.prefixes.setdefault(t[:k], set()).add(i)
+                for g in _grams(t):
+                    self.grams.setdefault(g, set()).add(i)
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def _candidates(self, term):
+        if len(term) < 3:
+            return self.prefixes.get(term, set())
+        postings = sorted((self.grams.get(g, set()) for g in _grams(term)), key=len)
+        return set.intersection(*postings) if postings[0] else set()
+
+    def search(self, query):
+        """
+        Indices van de namen die bij query passen: eerst waar elk zoekwoord het begin
+        van een woord is, dan de rest; binnen elke groep in de oorspronkelijke volgorde.
+        """
+        terms = name_tokens(query)
+        if not terms:
+            return []
+        found = None
+        for term in sorted(terms, key=len, reverse=True):   # langste woorden beperken het meest
+            cand = self._candidates(term)
+            found = cand if found is None else found & cand
+            if not found:
+                return []
+        hits = []
+        for i in found:
+            tokens = self.tokens[i]
+            if all(any(_term_matches(term, t) for t in tokens) for term in terms):
+                prefix = all(any(t.startswith(term) for t in tokens) for term in terms)
+                hits.append((not prefix, i))
+        return [i for _, i in sorted(hits)]
@@ -0,0 +1,334 @@
+import os
+import io
+import json
+import hashlib
+import shutil
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, features
+
+from .config import FONT_MAX
+from .imaging import placeholder_image
+from .layouts import LAYOUTS, BUILTIN_LAYOUTS, parse_layout, layout_to_json
+from .container import ZIT_EXTENSION, is_container
+from .fileio import atomic_write, read_bytes, read_text, open_mapped
+from .trace import traced, span
+
+def safe_filename(s):
+    keep = "-_.() abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+    return "".join(c for c in s if c in keep).replace(" ", "_")
+
+def make_student(name, pil, slot=None, source=None, pdf_index=None, font_size=FONT_MAX, img_filename=None, pending=None, asset=None):
+    """
+    Nieuwe leerling-dict zoals SeatPlanner.students ze gebruikt.
+    pending: nog niet gedecodeerde foto-bytes (dan is pil None, zie zitcore.lazy).
+    asset: naam van de foto in het fotopakket ("<sha256>.webp"), eens bewaard.
+    """
+    return {
+        "name": name, "pil": pil, "tk": None, "slot": slot,
+        "img_id": None, "text_id": None, "font_size": font_size,
+        "source": source, "pdf_index": pdf_index, "img_filename": img_filename,
+        "pending": pending, "asset": asset
+    }
+
+def asset_paths(fpath):
+    """(assets_dir, zip_path) van een verdeling in het oude formaat (één zip per JSON)."""
+    base, _ = os.path.splitext(fpath)
+    return base + "_assets", base + "_assets.zip"
+
+def asset_pack_path(fpath, class_name=None):
+    """
+    Fotopakket voor een verdeling: <klas>_fotos.zip naast de JSON. Alle verdelingen
+    van dezelfde klas in die map delen zo één pakket.
+    """
+    folder = os.path.dirname(os.path.abspath(fpath))
+    stem = safe_filename(class_name or "") or os.path.splitext(os.path.basename(fpath))[0]
+    return os.path.join(folder, stem + "_fotos.zip")
+
+def is_seating_file(path):
+    """
+    Een .zit, of een .json met bijhorende assets (fotopakket, zip of map), is een
+    opgeslagen verdeling.
+    """
+    if not os.path.isfile(path):
+        return False
+    if path.lower().endswith(ZIT_EXTENSION):
+        return True
+    if not path.lower().endswith(".json"):
+        return False
+    assets_dir, zip_path = asset_paths(path)
+    if os.path.isfile(zip_path) or os.path.isdir(assets_dir):
+        return True
+    try:
+        data = read_seating_json(path)
+    except Exception:
+        return False
+    return isinstance(data, dict) and bool(data.get("asset_pack"))
+
+# Foto's in het fotopakket: verliesvrije WebP (kleiner dan PNG); PNG als Pillow geen WebP kan schrijven
+ASSET_FORMAT = ("WEBP", ".webp", {"lossless": True, "method": 4}) if features.check("webp") else ("PNG", ".png", {})
+IMAGE_FORMAT_EXTENSIONS = {"PNG": ".png", "WEBP": ".webp", "JPEG": ".jpg", "GIF": ".gif", "BMP": ".bmp"}
+
+# Formaten die al gecomprimeerd zijn: opnieuw deflaten kost tijd en wint niets
+COMPRESSED_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+
+def encode_image(pil, placeholder_size=100):
+    """(bytes, extensie) van een foto in ASSET_FORMAT (placeholder als de foto niet te bewaren valt)."""
+    fmt, ext, options = ASSET_FORMAT
+    buf = io.BytesIO()
+    try:
+        pil.save(buf, format=fmt, **options)
+    except Exception:
+        buf = io.BytesIO()
+        placeholder_image(placeholder_size).save(buf, format=fmt, **options)
+    return buf.getvalue(), ext
+
+def encoded_extension(data):
+    """Extensie voor reeds gecodeerde foto-bytes (enkel de header wordt gelezen)."""
+    try:
+        fmt = Image.open(io.BytesIO(data)).format
+    except Exception:
+        fmt = None
+    return IMAGE_FORMAT_EXTENSIONS.get(fmt, ".png")
+
+@traced("save.encode")
+def encode_asset(s, placeholder_size=100):
+    """
+    (naam, bytes) van de foto van s zoals ze in het fotopakket komt. De naam is de
+    sha256 van de inhoud: dezelfde foto krijgt altijd dezelfde naam.
+    Foto's die nog als gecodeerde bytes bestaan (geladen uit een eerdere verdeling)
+    worden niet opnieuw gecodeerd.
+    """
+    if s.get("pending") is not None:
+        data = s["pending"]
+        ext = encoded_extension(data)
+    else:
+        data, ext = encode_image(s["pil"], placeholder_size)
+    return hashlib.sha256(data).hexdigest() + ext, data
+
+def zip_member(name):
+    """ZipInfo met de juiste compressie: STORED voor reeds gecomprimeerde formaten."""
+    zinfo = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+    zinfo.compress_type = zipfile.ZIP_STORED if name.lower().endswith(COMPRESSED_EXTENSIONS) else zipfile.ZIP_DEFLATED
+    zinfo.external_attr = 0o644 << 16
+    return zinfo
+
+def pack_members(pack_path):
+    """Namen in een fotopakket (enkel de centrale directory wordt gelezen); leeg als het niet bestaat."""
+    if not os.path.isfile(pack_path):
+        return set()
+    from .container import SeatingContainer
+    with SeatingContainer(pack_path) as pack:
+        return pack.names()
+
+def seating_manifest(meta, students, asset_pack=None):
+    """
+    De JSON-inhoud van een verdeling (los bestand of manifest.json van een .zit).
+    Elke leerling moet al een asset-naam hebben (zie encode_asset).
+    """
+    students_meta = []
+    for s in students:
+        students_meta.append({
+            "name": s["name"],
+            "slot": s["slot"],
+            "source": s.get("source"),
+            "pdf_index": s.get("pdf_index"),
+            "font_size": s.get("font_size", FONT_MAX),
+            "img_filename": s["asset"]
+        })
+    data = {
+        "class": meta.get("class"),
+        "room": meta.get("room"),
+        "layout": meta.get("layout"),
+        "custom_layout": meta.get("custom_layout"),
+        "asset_names": "sha256",
+        "students": students_meta,
+        "pdf_multiline_rows": meta.get("pdf_multiline_rows") or {}
+    }
+    layout = meta.get("layout")
+    if layout not in BUILTIN_LAYOUTS and layout in LAYOUTS:
+        # opstelling uit de bibliotheek: meebewaren, zodat de verdeling ook elders opent
+        data["layout_cfg"] = layout_to_json(LAYOUTS[layout])
+    if asset_pack:
+        data["asset_pack"] = asset_pack
+    return data
+
+@traced("save")
+def save_seating_files(fpath, meta, students, placeholder_size=100, workers=None):
+    """
+    Bewaar een verdeling. Een pad op .zit wordt één containerbestand (zie
+    zitcore.container); anders fpath (JSON) + een fotopakket <klas>_fotos.zip.
+    meta: class, room, layout, custom_layout, pdf_multiline_rows.
+    De foto's staan in het pakket onder hun inhoudshash; de JSON verwijst ernaar.
+    Enkel foto's die nog niet in het pakket zitten worden gecodeerd en toegevoegd,
+    dus opnieuw bewaren na het verslepen van leerlingen schrijft enkel de JSON.
+    Pakket en JSON worden elk atomisch vervangen, het pakket eerst zodat de JSON
+    nooit naar ontbrekende foto's verwijst.
+    Returned: pad naar het fotopakket (bij .zit: fpath zelf). Raise bij fouten.
+    """
+    if is_container(fpath):
+        from .container import save_container
+        return save_container(fpath, meta, students, placeholder_size, workers)
+
+    pack_path = asset_pack_path(fpath, meta.get("class"))
+    existing = pack_members(pack_path)
+
+    # PIL geeft de GIL vrij tijdens het coderen: threads volstaan
+    todo = [s for s in students if s.get("asset") not in existing]
+    new_assets = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for s, (name, data) in zip(todo, pool.map(lambda s: encode_asset(s, placeholder_size), todo)):
+            s["asset"] = name
+            if name not in existing:
+                new_assets[name] = data
+
+    data = seating_manifest(meta, students, asset_pack=os.path.basename(pack_path))
+
+    def write_pack(f):
+        # bestaande foto's ongewijzigd overnemen (geen hercodering), nieuwe achteraan toevoegen
+        mode = "w"
+        if os.path.isfile(pack_path):
+            with open_mapped(pack_path) as src:
+                if src.map is not None:
+                    f.write(src.map)
+                else:
+                    shutil.copyfileobj(src.file, f)
+            mode = "a"
+        with zipfile.ZipFile(f, mode, compression=zipfile.ZIP_DEFLATED) as zf:
+            for name, png in new_assets.items():
+                zf.writestr(zip_member(name), png)
+
+    def write_json(f):
+        f.write(json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8"))
+
+    if new_assets or not os.path.isfile(pack_path):
+        with span("save.zip", new=len(new_assets)):
+            atomic_write(pack_path, write_pack)
+    atomic_write(fpath, write_json)
+    # assets van het oude formaat horen enkel bij deze JSON en zijn nu overbodig
+    assets_dir, zip_path = asset_paths(fpath)
+    if os.path.isdir(assets_dir):
+        shutil.rmtree(assets_dir, ignore_errors=True)
+    if os.path.isfile(zip_path):
+        os.unlink(zip_path)
+    return pack_path
+
+@traced("load.manifest")
+def read_seating_json(fpath):
+    """
+    Lees de JSON van een verdeling (bij een .zit: het manifest). Een vergrendeld
+    bestand wordt opnieuw geprobeerd (zie zitcore.fileio).
+    Returned: parsed data or raise.
+    """
+    if is_container(fpath):
+        from .container import SeatingContainer
+        with SeatingContainer(fpath) as box:
+            return box.manifest()
+    return json.loads(read_text(fpath))
+
+def resolve_layout(data):
+    """
+    Zet een meegeleverde eigen opstelling terug in LAYOUTS en geef de naam van de
+    opstelling van deze verdeling (eerste opstelling als de naam onbekend is).
+    Een meebewaarde bibliotheekopstelling ("layout_cfg") gaat voor op de bibliotheek,
+    zodat de leerlingen op dezelfde plaatsen blijven als die intussen gewijzigd is.
+    """
+    custom = data.get("custom_layout")
+    if custom and isinstance(custom, dict) and ("regular" in custom or custom.get("free")):
+        LAYOUTS["Eigen opstelling"] = custom
+    layout_name = data.get("layout")
+    if data.get("layout_cfg") and layout_name and layout_name not in BUILTIN_LAYOUTS:
+        try:
+            LAYOUTS[layout_name] = parse_layout(data["layout_cfg"])
+        except ValueError:
+            pass
+    if layout_name not in LAYOUTS:
+        layout_name = list(LAYOUTS.keys())[0]
+    return layout_name
+
+@traced("load.assets")
+def read_asset_bytes(fpath, data=None):
+    """
+    Lees de foto's van een verdeling als gecodeerde bytes: {bestandsnaam: bytes}.
+    data: de JSON van de verdeling. Uit een .zit of een (gedeeld) fotopakket worden
+    enkel de foto's van deze verdeling gelezen. Een zip van het oude formaat wordt in één
+    keer gelezen en in het geheugen uitgepakt (geen tijdelijke map); een oude
+    <naam>_assets-map wordt rechtstreeks gelezen. Zonder assets: lege dict.
+    """
+    if is_container(fpath):
+        from .container import read_container_assets
+        if data is None:
+            data = read_seating_json(fpath)
+        return read_container_assets(fpath, [m.get("img_filename") for m in data.get("students", [])])
+    assets = {}
+    pack = (data or {}).get("asset_pack")
+    if pack:
+        pack_path = os.path.join(os.path.dirname(os.path.abspath(fpath)), os.path.basename(pack))
+        if os.path.isfile(pack_path):
+            # een fotopakket is een zip met ongecomprimeerde foto's, net als een .zit: uit de mmap lezen
+            from .container import read_container_assets
+            assets = read_container_assets(pack_path, {m.get("img_filename") for m in data.get("students", [])})
+        return assets
+    assets_dir, zip_path = asset_paths(fpath)
+    if os.path.isdir(assets_dir):
+        for fname in os.listdir(assets_dir):
+            p = os.path.join(assets_dir, fname)
+            if os.path.isfile(p):
+                assets[fname] = read_bytes(p)
+    elif os.path.isfile(zip_path):
+        with zipfile.ZipFile(io.BytesIO(read_bytes(zip_path)), "r") as zf:
+            for info in zf.infolist():
+                if not info.is_dir():
+                    assets[info.filename] = zf.read(info)
+    return assets
+
+def open_seating(fpath, placeholder_size=100):
+    """
+    Open een opgeslagen verdeling zonder de foto's te decoderen: elke leerling krijgt
+    pil=None en pending=<gecodeerde bytes>. Gebruik zitcore.lazy.ImageDecoder om ze
+    (op aanvraag, parallel) te decoderen.
+    Returned: (data, students, missing_images). Leerlingen waarvan de foto ontbreekt
+    krijgen meteen een placeholder; hun bestandsnaam komt in missing_images.
+    """
+    data = read_seating_json(fpath)
+    students, missing = students_from_data(data, read_asset_bytes(fpath, data), placeholder_size)
+    return data, students, missing
+
+def students_from_data(data, assets, placeholder_size=100):
+    """
+    Bouw de leerlingen van een verdeling uit de JSON-data en de gecodeerde foto's
+    (zie read_asset_bytes). Returned: (students, missing_images).
+    """
+    missing = []
+    students = []
+    # in een fotopakket of .zit zijn de bestandsnamen inhoudshashes
+    in_pack = data.get("asset_names") == "sha256" or bool(data.get("asset_pack"))
+    for i, meta in enumerate(data.get("students", [])):
+        imgfile = meta.get("img_filename")
+        pending = assets.get(imgfile) if imgfile else None
+        if imgfile and pending is None:
+            missing.append(imgfile)
+        students.append(make_student(meta.get("name", f"leerling_{i+1}"),
+                                     None if pending is not None else placeholder_image(placeholder_size),
+                                     slot=meta.get("slot"), source=meta.get("source"),
+                                     pdf_index=meta.get("pdf_index"),
+                                     font_size=meta.get("font_size", FONT_MAX),
+                                     img_filename=imgfile, pending=pending,
+                                     asset=imgfile if in_pack and pending is not None else None))
+    return students, missing
+
+def load_seating_files(fpath, placeholder_size=100, workers=None):
+    """
+    Lees een opgeslagen verdeling zonder GUI en decodeer meteen alle foto's (parallel).
+    Returned: (data, students, missing_images); zie open_seating.
+    """
+    from .lazy import ImageDecoder
+    data, students, missing = open_seating(fpath, placeholder_size)
+    decoder = ImageDecoder(workers=workers, placeholder_size=placeholder_size)
+    try:
+        decoder.ensure_all(students)
+    finally:
+        decoder.close()
+    return data, students, missing
@@ -0,0 +1,110 @@
+"""
+Ruimtelijke index over de stoelen van een opstelling (uniform rooster).
+
+Elke rechthoek (x0, y0, x1, y1) komt in de roostercellen die ze raakt. Een vraag
+naar een punt, een rechthoek of de dichtstbijzijnde stoel bekijkt zo enkel de
+cellen in de buurt, ook bij vrije opstellingen met honderden stoelen: slepen en
+neerzetten, het zichtbare deel van het canvas en de pagina's van een grote
+opstelling hoeven niet langer alle stoelen af te lopen.
+"""
+import math
+
+class GridIndex:
+    def __init__(self, rects, cell=None):
+        """rects: [(x0, y0, x1, y1)]; cell: celgrootte (standaard ± twee keer de gemiddelde rechthoek)."""
+        self.rects = [tuple(r) for r in rects]
+        if cell is None:
+            sizes = [max(x1 - x0, y1 - y0) for x0, y0, x1, y1 in self.rects]
+            cell = 2 * sum(sizes) / len(sizes) if sizes else 1
+        self.cell = max(1.0, float(cell))
+        self.cells = {}
+        self.bounds = None
+        if self.rects:
+            self.bounds = (min(r[0] for r in self.rects), min(r[1] for r in self.rects),
+                           max(r[2] for r in self.rects), max(r[3] for r in self.rects))
+        for i, (x0, y0, x1, y1) in enumerate(self.rects):
+            for key in self._keys(x0, y0, x1, y1):
+                self.cells.setdefault(key, []).append(i)
+
+    def _keys(self, x0, y0, x1, y1):
+        c = self.cell
+        for gx in range(math.floor(x0 / c), math.floor(x1 / c) + 1):
+            for gy in range(math.floor(y0 / c), math.floor(y1 / c) + 1):
+                yield gx, gy
+
+    def query_rect(self, x0, y0, x1, y1):
+        """Indices van de rechthoeken die (x0, y0, x1, y1) raken, oplopend."""
+        found = set()
+        for key in self._keys(x0, y0, x1, y1):
+            for i in self.cells.get(key, ()):
+                r = self.rects[i]
+                if r[0] <= x1 and r[2] >= x0 and r[1] <= y1 and r[3] >= y0:
+                    found.add(i)
+        return sorted(found)
+
+    def query_point(self, x, y):
+        return self.query_rect(x, y, x, y)
+
+    def nearest(self, x, y, max_dist=None):
+        """
+        (index, afstand²) van de rechthoek met het dichtstbijzijnde middelpunt, of
+        (None, None) als er binnen max_dist geen is. Zoekt ring per ring naar buiten.
+        """
+        if not self.rects:
+            return None, None
+        c = self.cell
+        gx, gy = math.floor(x / c), math.floor(y / c)
+        if max_dist is not None:
+            limit = max_dist
+        else:
+            # verder dan de verste hoek van alle rechthoeken samen hoeft nooit
+            bx0, by0, bx1, by1 = self.bounds
+            limit = math.hypot(max(abs(x - bx0), abs(x - bx1)), max(abs(y - by0), abs(y - by1)))
+        best, best_d2 = None, None
+        ring = 0
+        while True:
+            for key in self._ring(gx, gy, ring):
+                for i in self.cells.get(key, ()):
+                    x0, y0, x1, y1 = self.rects[i]
+                    dx, dy = x - (x0 + x1) / 2, y - (y0 + y1) / 2
+                    d2 = dx*dx + dy*dy
+                    if best_d2 is None or d2 < best_d2 or (d2 == best_d2 and i < best):
+                        best, best_d2 = i, d2
+            # een middelpunt ligt in een cel van zijn rechthoek: wat nog niet gezien is,
+            # heeft zijn middelpunt buiten deze ring, dus minstens ring*cel ver
+            reach = ring * c
+            if best_d2 is not None and reach*reach >= best_d2:
+                break
+            if reach > limit:
+                break
+            ring += 1
+        if best is None or (max_dist is not None and best_d2 > max_dist*max_dist):
+            return None, None
+        return best, best_d2
+
+    def _ring(self, gx, gy, ring):
+        if ring == 0:
+            yield gx, gy
+            return
+        for dx in range(-ring, ring + 1):
+            yield gx + dx, gy - ring
+            yield gx + dx, gy + ring
+        for dy in range(-ring + 1, ring):
+            yield gx - ring, gy + dy
+            yield gx + ring, gy + dy
+
+def slot_rect(slot, below=0):
+    """Stoel als rechthoek; below: extra hoogte onder de foto (bv. voor de naam)."""
+    return (slot["x"], slot["y"], slot["x"] + slot["w"], slot["y"] + slot["h"] + below)
+
+def slot_index(geometry, base=False):
+    """
+    GridIndex over de stoelen van een geometrie (scherm, of met base=True in
+    bladpunten), één keer opgebouwd en in de geometrie bewaard.
+    """
+    key = "_base_index" if base else "_slot_index"
+    index = geometry.get(key)
+    if index is None:
+        slots = geometry["base_slots" if base else "slots"]
+        index = geometry[key] = GridIndex([slot_rect(s) for s in slots])
+    return index
@@ -0,0 +1,140 @@
+"""
+Tijdsmetingen (spans) rond de zware bewerkingen: PDF rasteren en uitsnijden,
+thumbnails, geometrie, tekenen, opslaan, laden en exporteren.
+
+Standaard staat meten uit: span() geeft dan een gedeeld leeg object terug en
+@traced roept de functie gewoon aan, dus het kost niets merkbaars. Aanzetten kan met
+de omgevingsvariabele ZITPLAATSEN_TRACE=1 of in het venster via Ctrl+Shift+T.
+Met ZITPLAATSEN_TRACE=<bestand>.json wordt de trace bij het afsluiten ook weggeschreven.
+
+Metingen komen in een ringbuffer (de laatste TRACE_BUFFER spans). write_chrome_trace()
+schrijft ze als Chrome trace-event JSON (openen in chrome://tracing of ui.perfetto.dev);
+summary() geeft per bewerking aantal, totaal en maximum (voor de overlay in het venster).
+"""
+import os
+import json
+import time
+import atexit
+import functools
+import threading
+from collections import deque
+
+TRACE_ENV = "ZITPLAATSEN_TRACE"
+TRACE_BUFFER = 5000
+
+# (naam, start in s sinds _T0, duur in s, thread-id, args of None)
+_spans = deque(maxlen=TRACE_BUFFER)
+_thread_names = {}
+_enabled = False
+_T0 = time.perf_counter()
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+class _Span:
+    __slots__ = ("name", "args", "start")
+
+    def __init__(self, name, args):
+        self.name, self.args = name, args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        tid = threading.get_ident()
+        if tid not in _thread_names:
+            _thread_names[tid] = threading.current_thread().name
+        args = self.args
+        if exc_type is not None:
+            args = dict(args or {}, error=exc_type.__name__)
+        _spans.append((self.name, self.start - _T0, end - self.start, tid, args))
+        return False
+
+def span(name, **args):
+    """Context manager die de duur van het blok opneemt (enkel als meten aan staat)."""
+    if not _enabled:
+        return _NO_SPAN
+    return _Span(name, args or None)
+
+def traced(name):
+    """Decorator: meet elke aanroep van de functie als span `name`."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(name, None):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def enabled():
+    return _enabled
+
+def enable(on=True, buffer=None):
+    """Zet meten aan of uit; buffer: andere grootte voor de ringbuffer (bestaande metingen blijven)."""
+    global _enabled, _spans
+    if buffer and buffer != _spans.maxlen:
+        _spans = deque(_spans, maxlen=buffer)
+    _enabled = bool(on)
+
+def clear():
+    _spans.clear()
+
+def spans():
+    """Opgenomen spans als dicts: name, start, seconds, thread, args (oudste eerst)."""
+    return [{"name": n, "start": s, "seconds": d, "thread": _thread_names.get(t, str(t)), "args": a}
+            for n, s, d, t, a in list(_spans)]
+
+def summary():
+    """{naam: {"count", "total", "max", "last"}} in seconden, gesorteerd op totale tijd (grootste eerst)."""
+    stats = {}
+    for n, s, d, t, a in list(_spans):
+        st = stats.get(n)
+        if st is None:
+            stats[n] = {"count": 1, "total": d, "max": d, "last": d}
+        else:
+            st["count"] += 1
+            st["total"] += d
+            st["max"] = max(st["max"], d)
+            st["last"] = d
+    return dict(sorted(stats.items(), key=lambda kv: -kv[1]["total"]))
+
+def _json_arg(value):
+    return value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+
+def chrome_trace():
+    """De ringbuffer als Chrome trace-event dict ({"traceEvents": [...]}, tijden in µs)."""
+    pid = os.getpid()
+    events = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+              for tid, name in list(_thread_names.items())]
+    for n, s, d, t, a in list(_spans):
+        event = {"name": n, "cat": n.split(".")[0], "ph": "X", "pid": pid, "tid": t,
+                 "ts": round(s * 1e6, 1), "dur": round(d * 1e6, 1)}
+        if a:
+            event["args"] = {k: _json_arg(v) for k, v in a.items()}
+        events.append(event)
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+def write_chrome_trace(path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(chrome_trace(), f)
+    return path
+
+def _from_environment():
+    value = os.environ.get(TRACE_ENV, "").strip()
+    if not value or value == "0":
+        return
+    enable()
+    if value.lower().endswith(".json"):
+        atexit.register(write_chrome_trace, value)
+
+_from_environment()
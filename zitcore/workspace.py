@@ -0,0 +1,146 @@
+"""
+Werkruimte met meerdere open verdelingen (één tabblad per klas).
+
+Een tabblad is een dict met de volledige toestand van één klas: leerlingen,
+klas/lokaal/opstelling, zoom, ongedaan-maken-geschiedenis, autosave-journaal en
+een eigen geometriecache. De thumbnails zitten in de leerlingen zelf
+(student["tk"] met student["tk_size"]), dus terugkeren naar een recent gebruikte
+klas hoeft niets te decoderen of te schalen.
+
+Niet-actieve klassen samen mogen hoogstens `budget` bytes aan gedecodeerde foto's
+en thumbnails vasthouden. Daarboven worden de minst recent gebruikte klassen
+ontladen: hun thumbnails en geometrie vallen weg, en foto's die nog als gecodeerde
+bytes bestaan (student["pending"], uit een opgeslagen verdeling of de autosave)
+worden vergeten en bij het terugkeren opnieuw gedecodeerd (zie zitcore.lazy).
+"""
+import os
+import json
+import itertools
+from collections import OrderedDict
+
+from .config import WORKSPACE_BUDGET_MB
+from .layouts import LAYOUTS
+from .history import History
+from .memory import student_nbytes
+
+WORKSPACE_ENV = "ZITPLAATSEN_WORKSPACE_MB"
+# zoveel geometrieën (opstelling × zoom) onthoudt elk tabblad
+GEOMETRY_CACHE_SIZE = 8
+# zoveel getekende vaste lagen (banken en stoelkaders per opstelling × zoom) onthoudt het venster
+STATIC_LAYER_CACHE_SIZE = 8
+
+_use_counter = itertools.count(1)
+
+def workspace_budget():
+    """Budget in bytes voor niet-actieve klassen (ZITPLAATSEN_WORKSPACE_MB of WORKSPACE_BUDGET_MB)."""
+    try:
+        mb = float(os.environ.get(WORKSPACE_ENV, WORKSPACE_BUDGET_MB))
+    except ValueError:
+        mb = WORKSPACE_BUDGET_MB
+    return max(0, int(mb * 1024 * 1024))
+
+def new_tab(class_name="klas", room="lokaal", layout=None):
+    return {
+        "students": [],
+        "class": class_name,
+        "room": room,
+        "layout": layout or next(iter(LAYOUTS)),
+        "custom_layout": None,
+        "zoom_level": 1.0,
+        "history": History(),
+        "layout_state": (None, None),
+        "pdf_multiline_rows": {},
+        "journal": None,
+        "autosave_dir": None,
+        "geometry_cache": OrderedDict(),
+        "last_used": 0,
+    }
+
+def geometry_key(cfg, page_size, zoom_level):
+    """Sleutel voor alles wat enkel van opstelling, pagina en zoom afhangt."""
+    return (json.dumps(cfg, sort_keys=True), tuple(page_size), zoom_level)
+
+def cached_geometry(tab, compute, cfg, page_size, zoom_level):
+    """compute(cfg, page_size, zoom_level), onthouden per tabblad (de resultaten worden niet aangepast)."""
+    key = geometry_key(cfg, page_size, zoom_level)
+    cache = tab["geometry_cache"]
+    geometry = cache.get(key)
+    if geometry is None:
+        geometry = cache[key] = compute(cfg, page_size, zoom_level)
+        while len(cache) > GEOMETRY_CACHE_SIZE:
+            cache.popitem(last=False)
+    else:
+        cache.move_to_end(key)
+    return geometry
+
+def tab_students(tab):
+    """Leerlingen op het bord en in de geschiedenis van dit tabblad (elk één keer)."""
+    seen = {}
+    for s in itertools.chain(tab["students"], tab["history"].held_students()):
+        seen.setdefault(id(s), s)
+    return list(seen.values())
+
+def tab_nbytes(tab, shared=()):
+    """Wat ontladen kan worden: gedecodeerde foto's en thumbnails (gecodeerde bytes blijven)."""
+    total = 0
+    for s in tab_students(tab):
+        n = student_nbytes(s, shared)
+        total += n["original"] + n["thumb"]
+    return total
+
+def evict_tab(tab):
+    """Laat thumbnails, geometrie en herlaadbare foto's van een tabblad los. Returned: leerlingen zonder foto."""
+    unloaded = []
+    for s in tab_students(tab):
+        s["tk"] = None
+        s.pop("tk_size", None)
+        if s.get("pending") is not None and s.get("pil") is not None:
+            s["pil"] = None
+            unloaded.append(s)
+    tab["geometry_cache"].clear()
+    return unloaded
+
+class Workspace:
+    def __init__(self, budget=None):
+        self.budget = workspace_budget() if budget is None else budget
+        self.tabs = []
+        self.active = None
+
+    def add(self, tab):
+        self.tabs.append(tab)
+        return tab
+
+    def remove(self, tab):
+        self.tabs = [t for t in self.tabs if t is not tab]
+        if self.active is tab:
+            self.active = None
+
+    def activate(self, tab, shared=()):
+        """Maak tab actief (meest recent gebruikt) en ontlaad zo nodig oude klassen."""
+        tab["last_used"] = next(_use_counter)
+        self.active = tab
+        return self.enforce(shared)
+
+    def inactive(self):
+        """Niet-actieve tabbladen, minst recent gebruikt eerst."""
+        return sorted((t for t in self.tabs if t is not self.active), key=lambda t: t["last_used"])
+
+    def inactive_nbytes(self, shared=()):
+        return sum(tab_nbytes(t, shared) for t in self.inactive())
+
+    def enforce(self, shared=()):
+        """Ontlaad de minst recent gebruikte klassen tot de rest binnen het budget past. Returned: ontladen tabbladen."""
+        if not self.budget:
+            return []
+        tabs = self.inactive()
+        sizes = [tab_nbytes(t, shared) for t in tabs]
+        usage = sum(sizes)
+        evicted = []
+        for tab, size in zip(tabs, sizes):
+            if usage <= self.budget:
+                break
+            if size:
+                evict_tab(tab)
+                usage -= size - tab_nbytes(tab, shared)   # foto's zonder gecodeerde bytes blijven
+                evicted.append(tab)
+        return evicted
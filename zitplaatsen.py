@@ -1,297 +1,62 @@
 import os
 import sys
-import math
-import json
-import shutil
-import tempfile
-import zipfile
-import io
+import time
+import queue
+import random
+import threading
+from collections import OrderedDict
+
+# opstarttijd meten (ZITPLAATSEN_STARTUP=1): vanaf hier tot het venster voor het eerst stil is
+_STARTUP_T0 = time.perf_counter()
+
+# Met een subcommando (export, render, layouts, ...) draait zitplaatsen zonder venster:
+# dispatch vóór tkinter geïmporteerd wordt zodat de CLI snel start.
+if __name__ == "__main__" and len(sys.argv) > 1:
+    import multiprocessing
+    multiprocessing.freeze_support()  # batch-commando's gebruiken een procespool (ook in de .exe)
+    from zitcore.cli import main as cli_main
+    sys.exit(cli_main())
+
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, simpledialog
 from tkinter import font as tkfont
 from PIL import Image, ImageTk
 
-# --- Poppler packaging support: when bundled by PyInstaller we add the bundled poppler/bin to PATH
-if getattr(sys, "_MEIPASS", None):
-    # runtime when running from a PyInstaller bundle
-    bundled_poppler_bin = os.path.join(sys._MEIPASS, "poppler", "bin")
-else:
-    # runtime during development
-    bundled_poppler_bin = os.path.join(os.path.abspath("."), "poppler", "bin")
-
-# If the folder exists, prepend to PATH so pdf2image can find pdftoppm / pdftocairo
-if os.path.isdir(bundled_poppler_bin):
-    os.environ["PATH"] = bundled_poppler_bin + os.pathsep + os.environ.get("PATH", "")
-
-# Now import pdf2image (will find poppler via PATH if present)
-from pdf2image import convert_from_path, convert_from_bytes
-
-from reportlab.pdfgen import canvas as pdfcanvas
-from reportlab.lib.pagesizes import A4, landscape, portrait
-from reportlab.lib.utils import ImageReader
-
-# ---------- helper resource path (PyInstaller safe) ----------
-def resource_path(rel_path):
-    if hasattr(sys, "_MEIPASS"):
-        return os.path.join(sys._MEIPASS, rel_path)
-    return os.path.join(os.path.abspath("."), rel_path)
-
-# =========================
-# PDF CROP-PARAMETERS (jouw exacte waarden)
-# =========================
-PDF_COLS = 5
-PDF_PHOTO_W = 236
-PDF_PHOTO_H = 236
-PDF_MARGIN_LEFT = 140
-PDF_MARGIN_TOP = 319
-PDF_H_SPACING = 40
-PDF_V_SPACING = 88
-PDF_DPI = 200  # hogere dpi = scherpere crop
-
-# =========================
-# UI/Render instellingen
-# =========================
-SEAT_MIN = 60
-SEAT_MAX = 130
-CAPTION_GAP = 8
-INNER_PAD_X = 8
-INNER_PAD_TOP = 8
-INNER_PAD_BOTTOM = 12
-SEAT_SPACING = 8
-ROW_SPACING = 28
-BANK_SPACING = 24
-
-PAGE_MARGIN_LR = 28
-PAGE_MARGIN_TOP_PORTRAIT = 28   # kleinere top marge bij portret
-PAGE_MARGIN_TOP_LANDSCAPE = 56  # oorspronkelijke waarde voor liggend
-PAGE_MARGIN_BOTTOM = 24
-
-# Titeldetails (gebruikelijk voor zowel UI als PDF zodat spacing overeenkomt)
-TITLE_Y = 28
-TITLE_GAP_AFTER = 8
-
-FONT_MAX = 12
-FONT_MIN = 7
-
-# =========================
-# Layouts definitie (incl. default Eigen opstelling)
-# =========================
-LAYOUTS = {
-    "Lang type — 5 rijen × 3 banken × 2 stoelen": {
-        "regular": True, "rows": 5, "banks": 3, "seats": 2, "orientation": "portrait"
-    },
-    "Breed type — 4 rijen × 4 banken × 2 stoelen": {
-        "regular": True, "rows": 4, "banks": 4, "seats": 2, "orientation": "landscape"
-    },
-    "Kleine klas — 3 rijen × 4 banken × 2 stoelen": {
-        "regular": True, "rows": 3, "banks": 4, "seats": 2, "orientation": "landscape"
-    },
-    "Grote klas — 6 rijen × 3 banken × 2 stoelen": {
-        "regular": True, "rows": 6, "banks": 3, "seats": 2, "orientation": "portrait"
-    },
-    "Labo — 4 rijen × 2 banken × 4 stoelen": {
-        "regular": True, "rows": 4, "banks": 2, "seats": 4, "orientation": "landscape"
-    },
-    "Lokaal X — 3 rijen × (3-2-2-3 stoelen)": {
-        "regular": False,
-        "pattern": [[3,2,2,3], [3,2,2,3], [3,2,2,3], [3,2,2,3]],
-        "orientation": "landscape",
-        "center_first_row": True
-    },
-    "Lokaal Y — 3 rijen × 3 banken × 3 stoelen + rij met 4 stoelen": {
-        "regular": False,
-        "pattern": [[4], [3,3,3], [3,3,3], [3,3,3]],
-        "orientation": "landscape",
-        "center_first_row": True
-    },
-    "Lokaal Z — 3 rijen × 5 banken × 2 stoelen": {
-        "regular": True, "rows": 3, "banks": 5, "seats": 2, "orientation": "landscape"
-    },
-    "Eigen opstelling": {
-        "regular": True, "rows": 4, "banks": 3, "seats": 2, "orientation": "portrait"
-    }
-}
-
-def parse_pattern_text(raw: str):
-    if raw is None:
-        raise ValueError("Leeg patroon")
-    s = raw.strip()
-    if not s:
-        raise ValueError("Leeg patroon")
-    s = s.replace("], [", ";").replace("],[", ";").replace("][", ";")
-    s = s.replace("[", "").replace("]", "")
-    s = s.replace("\n", ";")
-    parts = [p.strip() for p in s.split(";") if p.strip()]
-    pattern = []
-    for p in parts:
-        nums = [x.strip() for x in p.split(",") if x.strip()]
-        if not nums:
-            raise ValueError("Lege rij in patroon")
-        row = []
-        for n in nums:
-            if not n.isdigit():
-                raise ValueError(f"Niet-numerieke waarde in patroon: '{n}'")
-            v = int(n)
-            if v <= 0:
-                raise ValueError("Alle aantallen moeten > 0 zijn")
-            row.append(v)
-        pattern.append(row)
-    return pattern
-
-def safe_filename(s):
-    keep = "-_.() abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
-    return "".join(c for c in s if c in keep).replace(" ", "_")
-
-def _safe_extract_zipfileobj(zipfile_obj, target_dir):
-    """
-    Extract a ZipFile object (zipfile.ZipFile instance) safely into target_dir,
-    preventing path traversal.
-    """
-    for member in zipfile_obj.namelist():
-        normalized = os.path.normpath(member)
-        # skip absolute or parent-traversal entries
-        if normalized.startswith("..") or os.path.isabs(normalized):
-            continue
-        dest_path = os.path.join(target_dir, normalized)
-        dest_dir = os.path.dirname(dest_path)
-        os.makedirs(dest_dir, exist_ok=True)
-        # if it's a directory entry, make sure it exists
-        if member.endswith("/") or member.endswith("\\"):
-            os.makedirs(dest_path, exist_ok=True)
-            continue
-        with zipfile_obj.open(member) as src, open(dest_path, "wb") as out:
-            shutil.copyfileobj(src, out)
-
-def veilige_unzip(zip_path, target_dir):
-    """
-    Safely try to unpack zip_path into target_dir.
-    Strategies (in order):
-      1) Try reading zip bytes into memory and extract from BytesIO (avoids file-copy locks).
-      2) If (1) fails, copy to a temporary file and extract from there.
-    Returns True on success, False on failure.
-    """
-    try:
-        if not os.path.isfile(zip_path):
-            return False
-
-        # Ensure target_dir created or empty
-        if os.path.isdir(target_dir):
-            # try to test write/read permission on target_dir
-            try:
-                testfile = os.path.join(target_dir, ".write_test")
-                with open(testfile, "w") as tf:
-                    tf.write("test")
-                os.unlink(testfile)
-            except PermissionError as e:
-                messagebox.showerror("Assets", f"Geen schrijfrechten in doelmap {target_dir}:\n{e}")
-                return False
-        else:
-            try:
-                os.makedirs(target_dir, exist_ok=True)
-            except Exception as e:
-                messagebox.showerror("Assets", f"Kon doelmap niet aanmaken {target_dir}:\n{e}")
-                return False
-
-        # First attempt: read zip into memory and extract from bytes (often works even when copy fails)
-        try:
-            with open(zip_path, "rb") as f:
-                data = f.read()
-            with zipfile.ZipFile(io.BytesIO(data), "r") as zf:
-                _safe_extract_zipfileobj(zf, target_dir)
-            #messagebox.showinfo("Assets", f"✅ Assets uitgepakt naar {target_dir}")
-            return True
-        except PermissionError as pe:
-            # direct permission error reading zip — report and don't continue
-            messagebox.showerror("Assets", f"Toegang geweigerd bij lezen van zip-bestand:\n{pe}")
-            return False
-        except Exception:
-            # try fallback with temporary copy
-            try:
-                tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".zip")
-                tmp.close()
-                shutil.copy2(zip_path, tmp.name)
-                with zipfile.ZipFile(tmp.name, "r") as zf:
-                    _safe_extract_zipfileobj(zf, target_dir)
-                #messagebox.showinfo("Assets", f"✅ Assets uitgepakt naar {target_dir} (via tijdelijke kopie)")
-                return True
-            except PermissionError as pe2:
-                messagebox.showerror("Assets", f"Toegang geweigerd bij kopiëren/extractie van zip:\n{pe2}")
-                return False
-            except Exception as e2:
-                messagebox.showwarning("Assets", f"Fout bij uitpakken assets: {e2}")
-                return False
-            finally:
-                try:
-                    if 'tmp' in locals() and tmp is not None:
-                        os.unlink(tmp.name)
-                except Exception:
-                    pass
-
-    except Exception as final_e:
-        messagebox.showwarning("Assets", f"Fout bij uitpakken assets: {final_e}")
-        return False
-
-def prepare_assets_for_loading(assets_dir, zip_path):
-    """
-    Zorg dat we werken met een LOKALE, betrouwbare kopie van de assets.
-    - Als assets_dir bestaat: kopieer alle bestanden naar een tijdelijke map (lokale kopie).
-    - Als zip_path bestaat: pak de zip veilig uit naar een tijdelijke map.
-    Returned: pad naar tijdelijke map (dat de caller moet verwijderen wanneer klaar), of None bij fout.
-    """
-    # Create a temp working dir
-    tmpdir = None
-    try:
-        tmpdir = tempfile.mkdtemp(prefix="kls_assets_")
-        # If assets_dir exists, copy files to tmpdir by reading bytes (safer with OneDrive placeholders)
-        if os.path.isdir(assets_dir):
-            try:
-                for fname in os.listdir(assets_dir):
-                    src = os.path.join(assets_dir, fname)
-                    dst = os.path.join(tmpdir, fname)
-                    # skip directories unless we want to preserve subfolders
-                    if os.path.isdir(src):
-                        # replicate directory structure
-                        shutil.copytree(src, dst, dirs_exist_ok=True)
-                        continue
-                    # read bytes and write to dst to avoid some lock/copy pitfalls
-                    with open(src, "rb") as fr:
-                        data = fr.read()
-                    with open(dst, "wb") as fw:
-                        fw.write(data)
-                return tmpdir
-            except PermissionError as pe:
-                messagebox.showerror("Assets", f"Toegang geweigerd bij kopiëren van assets-map:\n{pe}\nLoad geannuleerd.")
-                try: shutil.rmtree(tmpdir, ignore_errors=True)
-                except Exception: pass
-                return None
-            except Exception as e:
-                # Something else failed while copying; cleanup and abort
-                messagebox.showerror("Assets", f"Fout bij kopiëren van assets naar tijdelijke map:\n{e}\nLoad geannuleerd.")
-                try: shutil.rmtree(tmpdir, ignore_errors=True)
-                except Exception: pass
-                return None
-
-        # If here, assets_dir not present but maybe zip exists
-        if os.path.isfile(zip_path):
-            # extract zip into tmpdir using veilige_unzip
-            ok = veilige_unzip(zip_path, tmpdir)
-            if ok:
-                return tmpdir
-            else:
-                try: shutil.rmtree(tmpdir, ignore_errors=True)
-                except Exception: pass
-                return None
-
-        # neither assets dir nor zip -> nothing to prepare
-        try: shutil.rmtree(tmpdir, ignore_errors=True)
-        except Exception: pass
-        return None
-    except Exception as e:
-        if tmpdir:
-            try: shutil.rmtree(tmpdir, ignore_errors=True)
-            except Exception: pass
-        messagebox.showerror("Assets", f"Onverwachte fout bij voorbereiden assets: {e}")
-        return None
+from zitcore.config import (
+    A4, resource_path, user_data_dir, plan_title, CAPTION_GAP, TITLE_Y, FONT_MAX, FONT_MIN, RASTER_SIZES,
+)
+from zitcore.layouts import LAYOUTS, parse_pattern_text, page_size_for, read_layout_file, write_layout_file, compile_layout
+from zitcore.geometry import compute_geometry
+from zitcore.imaging import (
+    crop_square, placeholder_image, list_folder_images, load_square_image,
+    pdf_rows_to_query, crop_pdf_photos, icon_raster,
+)
+from zitcore.arrange import ROTATION_MODES, generate_arrangements, auto_assign, shuffle_students, parse_seed
+from zitcore.seating import make_student, save_seating_files, read_seating_json, resolve_layout, read_asset_bytes, students_from_data
+from zitcore.lazy import ImageDecoder
+from zitcore.journal import Journal, extra_journal_dirs, new_journal_dir
+from zitcore.history import (History, MoveCommand, RenameCommand, RemoveCommand, AddCommand,
+                             OrderCommand, LayoutCommand, slot_changes)
+from zitcore.memory import memory_budget, memory_report, enforce_budget, MB
+from zitcore.workspace import Workspace, new_tab, cached_geometry, geometry_key, STATIC_LAYER_CACHE_SIZE
+from zitcore.rasterexport import draw_static_layer
+from zitcore.spatial import slot_index
+from zitcore.library import open_library, catalog, search_layouts
+from zitcore.search import NameIndex
+from zitcore.photocheck import check_photos, has_problems, describe_problems
+from zitcore.reactive import Reactive
+from zitcore import trace
+from zitcore.trace import traced, span
+
+# pdf2image (zitcore.pdfimport) en reportlab (zitcore.pdfexport) worden pas geïmporteerd
+# wanneer een PDF-import of -export start: ze vertragen het opstarten merkbaar.
+
+# autosave: gebufferde journaalregels worden hoogstens om de zoveel ms ge-fsynct
+JOURNAL_FLUSH_MS = 500
+# klas, lokaal, opstelling: autosave pas als er zo lang niet meer getypt is
+META_DEBOUNCE_MS = 400
+# meet-overlay (Ctrl+Shift+T): zo vaak wordt ze ververst
+TRACE_OVERLAY_MS = 1000
 
 class SeatPlanner:
     def __init__(self, root):
@@ -309,19 +74,57 @@ class SeatPlanner:
         self.root.option_add("*Font", ("Helvetica", 10))
 
         # Data containers
-        self.students = []   # list of dicts: name,pil,tk,slot,img_id,text_id,font_size,source,pdf_index,img_filename
+        self.students = []   # list of dicts: name,pil,tk,slot,img_id,text_id,font_size,source,pdf_index,img_filename,pending,asset
         self.base_slots = []     # logical geometry used for export
         self.base_bank_rects = []
         self.slots = []          # visual (scaled) geometry
         self.bank_rects = []
         self.page_size = A4
+        self.geometry = None     # laatste resultaat van zitcore.geometry.compute_geometry
         self.seat_size = 100
         self.zoom_level = 1.0
         self.drag = {"student": None, "offset": (0,0)}
         
+        # JPEG-gecodeerde foto's voor PDF-export (gedeeld over alle exports in deze sessie;
+        # aangemaakt bij de eerste export, zie export_cache)
+        self.export_images = None
+        # idem voor de export als afbeelding: geschaalde foto's en achtergronden (zie raster_cache)
+        self.raster_images = None
+        # foto's van een geladen verdeling worden pas gedecodeerd wanneer ze zichtbaar/nodig zijn
+        self.images = ImageDecoder()
+        self._placeholder_tk = None
+        # banken en stoelkaders als één afbeelding per (opstelling, pagina, zoom), zie static_layer
+        self._static_layers = OrderedDict()
+        # gedeelde opstellingen: enkel de index wordt nu gelezen (zie zitcore.library)
+        try:
+            self.library = open_library()
+        except OSError:
+            self.library = None
+        self._poll_job = None
+        # autosave-journaal; pas actief nadat een eventuele vorige sessie hersteld of verworpen is
+        self.journal = None
+        self._journal_job = None
+        # ongedaan maken / opnieuw (kleine delta's, zie zitcore.history)
+        self.history = History()
+        self._layout_state = (None, None)   # (opstelling, eigen opstelling) zoals laatst getekend
+        self._trace_job = None
+        # geheugenbudget voor foto's en caches (bytes, 0 = geen limiet; zie zitcore.memory)
+        self.memory_budget = memory_budget()
+
         # cache van per-PDF per-page checkbox-waarden (wordt weggeschreven bij save en herladen bij load)
         self._last_pdf_multiline_rows = {}
 
+        # open klassen (tabbladen, zie zitcore.workspace); de toestand van de actieve klas
+        # staat in de attributen hierboven en wordt bij het wisselen in haar tabblad bewaard
+        self.workspace = Workspace()
+        self.tab = self.workspace.add(new_tab())
+        self.workspace.activate(self.tab)
+
+        # klas, lokaal en opstelling met wat ervan afhangt: gebundeld in één idle-pass,
+        # autosave pas na een pauze in het typen (zie zitcore.reactive)
+        self.reactive = Reactive(root.after, root.after_idle, root.after_cancel)
+        self._title_id = None
+
         # icons
         self.load_icons()
 
@@ -340,6 +143,10 @@ class SeatPlanner:
                   command=self.load_from_pdf_and_names, bg="#D7EEF9", fg="black", bd=1, relief="raised",
                   padx=6, pady=4, font=btn_font).pack(side=tk.LEFT, padx=4)
 
+        tk.Button(top_buttons, text=" Klaslijsten", image=self.ic_camera, compound="left",
+                  command=self.batch_import_class_lists, bg="#D7EEF9", fg="black", bd=1, relief="raised",
+                  padx=6, pady=4, font=btn_font).pack(side=tk.LEFT, padx=4)
+
         tk.Button(top_buttons, text=" Shuffle", image=self.ic_herh, compound="left",
                   command=self.shuffle_students, bg="#FDE5C6", fg="black", bd=1, relief="raised",
                   padx=6, pady=4, font=btn_font).pack(side=tk.LEFT, padx=4)
@@ -356,6 +163,14 @@ class SeatPlanner:
                   command=self.export_pdf, bg="#FFF7CC", fg="black", bd=1, relief="raised",
                   padx=6, pady=4, font=btn_font_bold).pack(side=tk.LEFT, padx=4)
 
+        tk.Button(top_buttons, text=" Rotaties PDF", image=self.ic_outbox, compound="left",
+                  command=self.export_rotations_pdf, bg="#FFF7CC", fg="black", bd=1, relief="raised",
+                  padx=6, pady=4, font=btn_font).pack(side=tk.LEFT, padx=4)
+
+        tk.Button(top_buttons, text=" Exporteer beeld", image=self.ic_outbox, compound="left",
+                  command=self.export_image, bg="#FFF7CC", fg="black", bd=1, relief="raised",
+                  padx=6, pady=4, font=btn_font).pack(side=tk.LEFT, padx=4)
+
         # Reset (clear board) button — rechts van Export PDF
         tk.Button(top_buttons, text=" Reset", image=self.ic_reset, compound="left",
                   command=self.reset_board, bg="#F8D7DA", fg="black", bd=1, relief="raised",
@@ -369,21 +184,27 @@ class SeatPlanner:
         self.var_class = tk.StringVar(value="klas")
         ent_class = tk.Entry(inputs_row, textvariable=self.var_class, width=22)
         ent_class.pack(side=tk.LEFT, padx=(4, 12))
-        self.var_class.trace_add("write", lambda *_: self.update_title())
+        self.var_class.trace_add("write", lambda *_: self.reactive.set("class", self.var_class.get()))
 
         tk.Label(inputs_row, text="Lokaal:").pack(side=tk.LEFT)
         self.var_room = tk.StringVar(value="lokaal")
         ent_room = tk.Entry(inputs_row, textvariable=self.var_room, width=12)
         ent_room.pack(side=tk.LEFT, padx=(4, 12))
-        self.var_room.trace_add("write", lambda *_: self.update_title())
+        self.var_room.trace_add("write", lambda *_: self.reactive.set("room", self.var_room.get()))
 
         tk.Label(inputs_row, text="Opstelling:").pack(side=tk.LEFT, padx=(12,4))
         self.var_layout = tk.StringVar(value=list(LAYOUTS.keys())[0])
-        self.op_layout_menu = ttk.OptionMenu(inputs_row, self.var_layout, self.var_layout.get(), *LAYOUTS.keys(),
-                                             command=lambda *_: self.set_layout())
-        self.op_layout_menu.pack(side=tk.LEFT)
+        self.var_layout.trace_add("write", lambda *_: self.reactive.set("layout", self.var_layout.get()))
+        self.reactive.watch(("class", "room"), self.update_title)
+        self.reactive.watch(("class",), self.update_tab_title)
+        self.reactive.watch(("class", "room", "layout"), self.autosave, delay=META_DEBOUNCE_MS)
+        # een knop met de huidige opstelling; klikken opent een doorzoekbare lijst (ook de bibliotheek)
+        self.btn_layout = ttk.Button(inputs_row, textvariable=self.var_layout, width=34, command=self.layout_picker)
+        self.btn_layout.pack(side=tk.LEFT)
 
         ttk.Button(inputs_row, text="Eigen opstelling", command=self.custom_layout_popup).pack(side=tk.LEFT, padx=8)
+        ttk.Button(inputs_row, text="↶ Ongedaan maken", command=self.undo).pack(side=tk.LEFT, padx=(8,2))
+        ttk.Button(inputs_row, text="↷ Opnieuw", command=self.redo).pack(side=tk.LEFT, padx=2)
 
         # Zoom controls (moved to second row)
         zoom_frame = tk.Frame(inputs_row)
@@ -392,6 +213,33 @@ class SeatPlanner:
         tk.Button(zoom_frame, text="100%", width=5, command=self.reset_zoom).pack(side=tk.LEFT, padx=2)
         tk.Button(zoom_frame, text="+", width=3, command=lambda: self.zoom(1.1)).pack(side=tk.LEFT, padx=2)
 
+        # Zoeken op naam (Ctrl+F): treffers worden omkaderd, Enter springt naar de volgende
+        search_frame = tk.Frame(inputs_row)
+        search_frame.pack(side=tk.RIGHT, padx=(4,12))
+        tk.Label(search_frame, text="Zoek:").pack(side=tk.LEFT)
+        self.var_search = tk.StringVar(value="")
+        self.ent_search = tk.Entry(search_frame, textvariable=self.var_search, width=16)
+        self.ent_search.pack(side=tk.LEFT, padx=4)
+        self.lbl_search = tk.Label(search_frame, text="", fg="#555", width=6, anchor="w")
+        self.lbl_search.pack(side=tk.LEFT)
+        self.var_search.trace_add("write", lambda *_: self.on_search_change())
+        self.ent_search.bind("<Return>", lambda e: self.next_search_hit(1))
+        self.ent_search.bind("<Shift-Return>", lambda e: self.next_search_hit(-1))
+        self.ent_search.bind("<Escape>", lambda e: self.var_search.set(""))
+        self._name_index = None    # (sleutel, NameIndex), zie name_index
+        self._search_pos = 0
+
+        # ---------- Tabbladen: één per open klas ----------
+        tabs_row = tk.Frame(root)
+        tabs_row.pack(side=tk.TOP, fill=tk.X, padx=8)
+        self.tabbar = ttk.Notebook(tabs_row, height=0)
+        self.tabbar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.tabbar.add(tk.Frame(self.tabbar, height=0), text=self.tab["class"])
+        self.tabbar.enable_traversal()   # Ctrl+Tab / Ctrl+Shift+Tab
+        self.tabbar.bind("<<NotebookTabChanged>>", lambda e: self.on_tab_changed())
+        ttk.Button(tabs_row, text="+ Klas", command=self.new_class_tab).pack(side=tk.LEFT, padx=(8,2))
+        ttk.Button(tabs_row, text="✕ Sluit klas", command=self.close_class_tab).pack(side=tk.LEFT, padx=2)
+
         # ---------- Scrollable Canvas ----------
         viewport_frame = tk.Frame(root)
         viewport_frame.pack(side=tk.TOP, fill=tk.BOTH, expand=True, padx=8, pady=8)
@@ -405,8 +253,9 @@ class SeatPlanner:
                                 xscrollcommand=hbar.set, yscrollcommand=vbar.set)
         self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-        hbar.config(command=self.canvas.xview)
-        vbar.config(command=self.canvas.yview)
+        hbar.config(command=self._xview)
+        vbar.config(command=self._yview)
+        self.canvas.bind("<Configure>", lambda e: self.request_visible_images())
 
         # enable mousewheel scrolling
         self.canvas.bind_all("<MouseWheel>", self._on_mousewheel)      # Windows
@@ -418,17 +267,48 @@ class SeatPlanner:
         self.menu.add_command(label="Naam wijzigen", command=lambda: self.rename_selected())
         self.menu.add_command(label="Verwijder leerling", command=lambda: self.delete_selected())
         self.selected_student = None
+        self._student_items = {}   # canvas-item (foto of naam) -> leerling, zie draw_students
+
+        # verborgen menu voor tijdsmetingen (zie zitcore.trace), via Ctrl+Shift+T
+        self.var_trace = tk.BooleanVar(value=trace.enabled())
+        self.var_trace_overlay = tk.BooleanVar(value=False)
+        self.trace_menu = tk.Menu(self.root, tearoff=0)
+        self.trace_menu.add_checkbutton(label="Metingen aan", variable=self.var_trace, command=self.toggle_trace)
+        self.trace_menu.add_checkbutton(label="Toon metingen op het bord", variable=self.var_trace_overlay,
+                                        command=self.toggle_trace_overlay)
+        self.trace_menu.add_command(label="Exporteer trace (Chrome)...", command=self.export_trace)
+        self.trace_menu.add_command(label="Wis metingen", command=self.clear_trace)
+        self.trace_menu.add_separator()
+        self.trace_menu.add_command(label="Geheugengebruik...", command=self.show_memory)
+        self.root.bind_all("<Control-T>", self.show_trace_menu)
 
         # bind clicks
         self.canvas.bind("<Button-3>", self.on_right_click)
         self.canvas.bind("<Double-Button-1>", self.on_double_click)
 
+        # undo / redo
+        self.root.bind_all("<Control-z>", lambda e: self.undo())
+        self.root.bind_all("<Control-y>", lambda e: self.redo())
+        self.root.bind_all("<Control-Z>", lambda e: self.redo())   # Ctrl+Shift+Z
+        self.root.bind_all("<Control-f>", lambda e: (self.ent_search.focus_set(), self.ent_search.select_range(0, "end")))
+
         # Init layout
         self.set_layout(initial=True)
 
+        # vorige sessie herstellen (na een crash) en daarna elke wijziging bijhouden
+        self.root.after_idle(self.start_autosave)
+
     # ---------------- icons loader ----------------
     def load_icons(self):
+        """
+        Icoontjes op hun schermgrootte. De eerste keer worden ze met PIL geschaald en in
+        de gebruikerscache bewaard; daarna laadt Tk die PNG's rechtstreeks.
+        """
         size = 24
+        try:
+            cache_dir = user_data_dir("cache", "icons")
+        except OSError:
+            cache_dir = None
         mapping = {
             "ic_tools": "icons/tools.png",
             "ic_camera": "icons/camera.png",
@@ -442,9 +322,12 @@ class SeatPlanner:
             p = resource_path(rel)
             imgtk = None
             try:
-                im = Image.open(p).convert("RGBA")
-                im = im.resize((size, size), Image.LANCZOS)
-                imgtk = ImageTk.PhotoImage(im)
+                if cache_dir is not None:
+                    imgtk = tk.PhotoImage(file=icon_raster(p, size, cache_dir))
+                else:
+                    im = Image.open(p).convert("RGBA")
+                    im = im.resize((size, size), Image.LANCZOS)
+                    imgtk = ImageTk.PhotoImage(im)
             except Exception:
                 im = Image.new("RGBA", (size, size), (220,220,220,0))
                 imgtk = ImageTk.PhotoImage(im)
@@ -452,29 +335,240 @@ class SeatPlanner:
 
     # ---------------- Title & close ----------------
     def on_close(self):
-        if self.students:
+        self.store_tab()
+        if any(tab["students"] for tab in self.workspace.tabs):
             resp = messagebox.askyesnocancel("Bevestig afsluiten",
                                              "Er staan nog foto's op het bord. Wilt u opslaan vóór afsluiten?\n\nJa = opslaan en afsluiten\nNee = afsluiten zonder opslaan\nAnnuleer = terug")
             if resp is None:
                 return
             if resp is True:
-                self.save_seating()
+                # elke open klas met leerlingen apart bewaren
+                for tab in list(self.workspace.tabs):
+                    if tab["students"]:
+                        self.select_tab(tab)
+                        self.save_seating()
+                self.store_tab()
         # either no students or user chose to continue
         if messagebox.askyesno("Bevestig afsluiten", "Ben je zeker dat je wil afsluiten?"):
+            # bewust afgesloten: de autosave is niet meer nodig
+            for tab in self.workspace.tabs:
+                if tab["journal"] is not None:
+                    tab["journal"].clear()
+            self.images.close()
             self.root.destroy()
 
-    def update_title(self):
+    # ---------------- Autosave journal ----------------
+    def session_meta(self):
+        return {
+            "class": self.var_class.get(),
+            "room": self.var_room.get(),
+            "layout": self.var_layout.get(),
+            "custom_layout": LAYOUTS.get("Eigen opstelling"),
+            "pdf_multiline_rows": self._last_pdf_multiline_rows
+        }
+
+    def start_autosave(self):
         try:
-            self.canvas.delete("title")
-        except Exception:
-            pass
-        W,_ = self.page_size
+            # één journaal per klas die de vorige keer open stond
+            journals = [Journal()] + [Journal(folder) for folder in extra_journal_dirs()]
+            sessions = [j for j in journals if j.has_session()]
+            restore = bool(sessions) and messagebox.askyesno(
+                    "Vorige sessie herstellen",
+                    "Het programma werd de vorige keer niet normaal afgesloten.\n"
+                    "Wil je de niet-opgeslagen opstelling herstellen?")
+            for journal in journals:
+                if not (restore and journal in sessions):
+                    journal.clear()
+            if not restore:
+                sessions = journals[:1]
+            for k, journal in enumerate(sessions):
+                if k:
+                    self.new_class_tab(autosave=False)   # krijgt hieronder het herstelde journaal
+                if restore:
+                    self.restore_session(journal)
+                journal.compact()
+                self.journal = journal
+                self.autosave()
+        except Exception as e:
+            messagebox.showwarning("Autosave", f"Autosave is uitgeschakeld:\n{e}")
+            return
+
+    def restore_session(self, journal):
+        meta = journal.state["meta"]
+        layout_name = resolve_layout(meta)
+        if meta.get("class") is not None: self.var_class.set(meta["class"])
+        if meta.get("room") is not None: self.var_room.set(meta["room"])
+        self.var_layout.set(layout_name)
+        self._last_pdf_multiline_rows = meta.get("pdf_multiline_rows") or {}
+        self.images.forget()
+        self.history.clear()
+        self.students = []
+        self.set_layout()
+        self.students, missing_images = journal.restore_students(placeholder_size=self.seat_size)
+        self.images.placeholder_size = self.seat_size
+        if missing_images:
+            messagebox.showwarning("Ontbrekende afbeeldingen", f"{len(missing_images)} foto('s) konden niet hersteld worden en zijn vervangen door placeholders.")
+        self.reflow_after_data_change()
+
+    def autosave(self):
+        """Schrijf de wijzigingen sinds de vorige keer naar het journaal (fsync volgt gebundeld)."""
+        if self.journal is None:
+            return
+        try:
+            if self.journal.record(self.session_meta(), self.students) and self._journal_job is None:
+                self._journal_job = self.root.after(JOURNAL_FLUSH_MS, self.flush_journal)
+        except Exception as e:
+            self.journal = None
+            messagebox.showwarning("Autosave", f"Autosave is uitgeschakeld:\n{e}")
+
+    def flush_journal(self):
+        self._journal_job = None
+        if self.journal is None:
+            return
+        try:
+            self.journal.flush()
+        except Exception as e:
+            self.journal = None
+            messagebox.showwarning("Autosave", f"Autosave is uitgeschakeld:\n{e}")
+            return
+        # foto's worden nog op de achtergrond gecodeerd (ook voor een klas waarvan net
+        # weggewisseld werd): hun namen bij de volgende flush
+        busy = self.journal.busy()
+        for tab in self.workspace.tabs:
+            journal = tab["journal"]
+            if journal is not None and journal is not self.journal and journal.busy():
+                try:
+                    journal.flush()
+                except Exception:
+                    tab["journal"] = None   # autosave enkel voor die klas uit
+                    continue
+                busy = busy or journal.busy()
+        if busy:
+            self._journal_job = self.root.after(JOURNAL_FLUSH_MS, self.flush_journal)
+
+    def update_title(self):
+        """Titel op het canvas: het bestaande item aanpassen, enkel na het leegmaken van het canvas opnieuw aanmaken."""
+        W,_ = self.geometry["sheet_size"] if self.geometry else self.page_size
         # draw title with zoom applied visually and using TITLE_Y for consistency
-        self.canvas.create_text((W/2)*self.zoom_level, TITLE_Y*self.zoom_level,
-                                text=f"Klas {self.var_class.get()} — Lokaal {self.var_room.get()}",
-                                font=("Helvetica", int(16*self.zoom_level), "bold"), tags=("title",))
+        x, y = (W/2)*self.zoom_level, TITLE_Y*self.zoom_level
+        text = plan_title(self.var_class.get(), self.var_room.get())
+        font = ("Helvetica", int(16*self.zoom_level), "bold")
+        if self._title_id is None:
+            self._title_id = self.canvas.create_text(x, y, text=text, font=font, tags=("title",))
+        else:
+            self.canvas.coords(self._title_id, x, y)
+            self.canvas.itemconfig(self._title_id, text=text, font=font)
 
     # ---------------- Custom layout popup ----------------
+    def layout_picker(self):
+        """Kies een opstelling: typ om te zoeken op naam, lokaal of aantal plaatsen; Enter of dubbelklik kiest."""
+        top = tk.Toplevel(self.root)
+        top.title("Opstelling kiezen")
+        top.transient(self.root)
+
+        var_query = tk.StringVar()
+        ent = tk.Entry(top, textvariable=var_query, width=60)
+        ent.pack(fill="x", padx=8, pady=(8,4))
+        frame = tk.Frame(top)
+        frame.pack(fill="both", expand=True, padx=8)
+        listbox = tk.Listbox(frame, width=70, height=16, activestyle="dotbox")
+        scroll = ttk.Scrollbar(frame, orient="vertical", command=listbox.yview)
+        listbox.configure(yscrollcommand=scroll.set)
+        listbox.pack(side=tk.LEFT, fill="both", expand=True)
+        scroll.pack(side=tk.RIGHT, fill="y")
+        lbl_lib = tk.Label(top, fg="#555", anchor="w", justify="left")
+        lbl_lib.pack(fill="x", padx=8, pady=(4,0))
+        shown = []
+
+        def fill(*_):
+            shown[:] = search_layouts(catalog(self.library), var_query.get())
+            listbox.delete(0, "end")
+            for row in shown:
+                orient = "liggend" if row["orientation"] == "landscape" else "staand"
+                room = f" — {row['room']}" if row["room"] else ""
+                listbox.insert("end", f"{row['name']}{room}   ({row['seats']} plaatsen, {orient})")
+            current = [i for i, row in enumerate(shown) if row["name"] == self.var_layout.get()]
+            sel = current[0] if current else 0
+            if shown:
+                listbox.selection_set(sel)
+                listbox.see(sel)
+            if self.library is None:
+                lbl_lib.config(text="Geen bibliotheek met opstellingen.")
+            else:
+                note = f"; {len(self.library.errors)} bestand(en) overgeslagen" if self.library.errors else ""
+                lbl_lib.config(text=f"Bibliotheek: {self.library.folder} ({len(self.library)} opstellingen{note})")
+
+        def choose(*_):
+            sel = listbox.curselection()
+            if not sel:
+                return
+            name = shown[sel[0]]["name"]
+            try:
+                LAYOUTS[name]   # bibliotheek: pas nu inlezen
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Fout", f"Kon de opstelling niet lezen:\n{e}", parent=top)
+                return
+            top.destroy()
+            self.var_layout.set(name)
+            self.change_layout()
+
+        def move(delta):
+            sel = listbox.curselection()
+            i = min(max((sel[0] if sel else -1) + delta, 0), listbox.size() - 1)
+            listbox.selection_clear(0, "end")
+            listbox.selection_set(i)
+            listbox.see(i)
+            return "break"
+
+        def other_folder():
+            folder = filedialog.askdirectory(title="Map met opstellingen (JSON)", parent=top)
+            if not folder:
+                return
+            try:
+                self.library = open_library(folder)
+            except OSError as e:
+                messagebox.showerror("Fout", f"Kon de map niet lezen:\n{e}", parent=top)
+                return
+            fill()
+
+        def save_current():
+            if self.library is None:
+                return
+            current = self.var_layout.get()
+            name = simpledialog.askstring("In bibliotheek bewaren", "Naam van de opstelling:", parent=top,
+                                          initialvalue=self.var_room.get() if current == "Eigen opstelling" else current)
+            if not name or not name.strip():
+                return
+            name = name.strip()
+            if LAYOUTS.is_builtin(name):
+                messagebox.showerror("Fout", "Dat is de naam van een ingebouwde opstelling.", parent=top)
+                return
+            if name in self.library and not messagebox.askyesno("Bestaat al", f"'{name}' overschrijven?", parent=top):
+                return
+            try:
+                self.library.save(name, LAYOUTS[current], room=self.var_room.get())
+            except (OSError, ValueError) as e:
+                messagebox.showerror("Fout", f"Kon niet opslaan:\n{e}", parent=top)
+                return
+            var_query.set(name)
+
+        var_query.trace_add("write", fill)
+        ent.bind("<Return>", choose)
+        ent.bind("<Down>", lambda e: move(1))
+        ent.bind("<Up>", lambda e: move(-1))
+        ent.bind("<Escape>", lambda e: top.destroy())
+        listbox.bind("<Double-Button-1>", choose)
+        listbox.bind("<Return>", choose)
+
+        btns = tk.Frame(top)
+        btns.pack(fill="x", padx=8, pady=6)
+        ttk.Button(btns, text="Kiezen", command=choose).pack(side=tk.LEFT)
+        ttk.Button(btns, text="Andere map...", command=other_folder).pack(side=tk.LEFT, padx=6)
+        ttk.Button(btns, text="Huidige in bibliotheek bewaren...", command=save_current).pack(side=tk.LEFT)
+        ttk.Button(btns, text="Annuleer", command=top.destroy).pack(side=tk.RIGHT)
+        fill()
+        ent.focus_set()
+
     def custom_layout_popup(self):
         top = tk.Toplevel(self.root)
         top.title("Eigen opstelling")
@@ -506,7 +600,10 @@ class SeatPlanner:
         tk.Radiobutton(top, text="Staand", variable=var_orient, value="portrait").pack(anchor="w", padx=8)
         tk.Radiobutton(top, text="Liggend", variable=var_orient, value="landscape").pack(anchor="w", padx=8)
 
-        if existing:
+        if existing.get("free"):
+            tk.Label(top, text=f"De huidige eigen opstelling is vrij ({len(existing['banks'])} banken, uit een JSON-bestand).",
+                     fg="#555").pack(anchor="w", padx=8)
+        elif existing:
             if existing.get("regular", True):
                 ent_rows.insert(0, str(existing.get("rows",4)))
                 ent_banks.insert(0, str(existing.get("banks",3)))
@@ -530,11 +627,43 @@ class SeatPlanner:
                     pattern = parse_pattern_text(raw)
                     LAYOUTS["Eigen opstelling"] = {"regular": False, "pattern": pattern, "orientation": orientation, "center_first_row": True}
                 self.var_layout.set("Eigen opstelling")
-                self.set_layout()
+                self.change_layout()
                 top.destroy()
             except Exception as e:
                 messagebox.showerror("Fout", f"Ongeldige invoer:\n{e}")
 
+        def on_load_free():
+            fpath = filedialog.askopenfilename(filetypes=[("Opstelling", "*.json")], title="Vrije opstelling laden", parent=top)
+            if not fpath:
+                return
+            try:
+                _, cfg = read_layout_file(fpath)
+            except Exception as e:
+                messagebox.showerror("Fout", f"Kon de opstelling niet lezen:\n{e}", parent=top)
+                return
+            LAYOUTS["Eigen opstelling"] = cfg
+            self.var_layout.set("Eigen opstelling")
+            self.change_layout()
+            top.destroy()
+
+        def on_save_free():
+            # de huidige opstelling als banken met coördinaten: vertrekpunt voor een U-vorm, eilandjes, ...
+            name = self.var_layout.get()
+            fpath = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Opstelling", "*.json")],
+                                                 title="Opstelling bewaren als JSON", parent=top)
+            if not fpath:
+                return
+            try:
+                write_layout_file(fpath, name, compile_layout(LAYOUTS[name]))
+            except Exception as e:
+                messagebox.showerror("Fout", f"Kon niet opslaan:\n{e}", parent=top)
+
+        free = tk.Frame(top)
+        free.pack(fill="x", padx=8, pady=(8,0))
+        tk.Label(free, text="Vrije opstelling (banken met coördinaten en hoek):").pack(anchor="w")
+        ttk.Button(free, text="Laden uit JSON...", command=on_load_free).pack(side=tk.LEFT, pady=2)
+        ttk.Button(free, text="Huidige bewaren als JSON...", command=on_save_free).pack(side=tk.LEFT, padx=6, pady=2)
+
         btns = tk.Frame(top)
         btns.pack(pady=6)
         ttk.Button(btns, text="OK", command=on_ok).pack(side=tk.LEFT, padx=6)
@@ -546,63 +675,33 @@ class SeatPlanner:
         folder = filedialog.askdirectory(title="Kies map met foto's (jpg/png)")
         if not folder:
             return
-        files = [f for f in os.listdir(folder) if f.lower().endswith((".jpg",".jpeg",".png"))]
-        files.sort()
+        first = len(self.students)
+        files = list_folder_images(folder)
         if not files:
             messagebox.showwarning("Geen foto's", "Geen jpg/png gevonden in de gekozen map.")
             return
         names = self.prompt_names_list(default_list=[os.path.splitext(f)[0] for f in files])
-        for i,f in enumerate(files):
-            path = os.path.join(folder,f)
-            try:
-                im = Image.open(path).convert("RGB")
-            except Exception:
-                continue
-            pil_sq = self.crop_square(im)
-            name = names[i] if i < len(names) else os.path.splitext(f)[0]
-            self.students.append({
-                "name": name, "pil": pil_sq, "tk": None, "slot": None,
-                "img_id": None, "text_id": None, "font_size": FONT_MAX,
-                "source": path, "pdf_index": None, "img_filename": None
-            })
-        self.reflow_after_data_change()
-
-    def _convert_pdf_pages(self, pdf_path):
-        """
-        Probeer de PDF veilig te converteren naar PIL.Image pagina's.
-        - Eerst: probeer convert_from_bytes door het bestand in geheugen te lezen.
-        - Fallback: maak tijdelijke kopie en gebruik convert_from_path.
-        Returned: lijst van PIL Images of raise Exception.
-        """
-        if not os.path.isfile(pdf_path):
-            raise FileNotFoundError(f"PDF niet gevonden: {pdf_path}")
-        # try convert_from_bytes (safe when file can be read)
-        try:
-            with open(pdf_path, "rb") as f:
-                data = f.read()
-            pages = convert_from_bytes(data, dpi=PDF_DPI)
-            if pages:
-                return pages
-        except Exception:
-            # fall through to temp-copy approach
-            pass
-
-        # fallback: create temporary copy, use convert_from_path (useful if original is locked for direct access)
-        tmp = None
-        try:
-            tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".pdf")
-            tmp.close()
-            shutil.copy2(pdf_path, tmp.name)
-            pages = convert_from_path(tmp.name, dpi=PDF_DPI)
-            if pages:
-                return pages
-            raise Exception("Geen pagina's gevonden in PDF (fallback).")
-        finally:
-            if tmp is not None:
+        loaded = []
+        with span("import.folder", count=len(files)):
+            for i,f in enumerate(files):
+                path = os.path.join(folder,f)
                 try:
-                    os.unlink(tmp.name)
+                    pil_sq = load_square_image(path)
                 except Exception:
-                    pass
+                    continue
+                name = names[i] if i < len(names) else os.path.splitext(f)[0]
+                loaded.append(make_student(name, pil_sq, source=path))
+        # dezelfde foto onder twee namen, of een lege foto: vóór ze op het bord komen
+        report = check_photos([s["pil"] for s in loaded])
+        if has_problems(report):
+            lines = describe_problems(report, [s["name"] for s in loaded])
+            if messagebox.askyesno("Controle foto's", "Mogelijke problemen met de foto's:\n\n" + "\n".join(lines)
+                                   + "\n\nDubbele (op de eerste na) en lege foto's weglaten?"):
+                skip = set(report["blank"]) | {j for _, j, _ in report["duplicates"]}
+                loaded = [s for k, s in enumerate(loaded) if k not in skip]
+        self.students.extend(loaded)
+        self.reflow_after_data_change()
+        self.history.push(AddCommand(list(enumerate(self.students))[first:]))
 
     def load_from_pdf_and_names(self):
         pdf_path = filedialog.askopenfilename(filetypes=[("PDF", "*.pdf")], title="Kies PDF met foto's")
@@ -610,7 +709,8 @@ class SeatPlanner:
             return
 
         try:
-            pages = self._convert_pdf_pages(pdf_path)
+            from zitcore.pdfimport import convert_pdf_pages
+            pages = convert_pdf_pages(pdf_path)
         except Exception as e:
             messagebox.showerror("PDF fout", f"Kon PDF niet lezen:\n{e}")
             return
@@ -618,83 +718,49 @@ class SeatPlanner:
             messagebox.showerror("PDF fout", "PDF bevat geen pagina's.")
             return
 
-        # aantal foto's per rij/kolom op een pagina (vaste layout: 5x5 -> 25 per pagina)
-        COLS_PER_PAGE = 5
-        ROWS_PER_PAGE = 5
-        PHOTOS_PER_PAGE = COLS_PER_PAGE * ROWS_PER_PAGE  # 25
-
-        # tweede-pagina Y-start zoals gevraagd (263) — eerste pagina gebruikt PDF_MARGIN_TOP (319)
-        PDF_SECOND_PAGE_TOP = 263
-        delta_top = PDF_SECOND_PAGE_TOP - PDF_MARGIN_TOP
-
         N = simpledialog.askinteger("Aantal leerlingen", "Hoeveel leerlingen staan op de PDF?", minvalue=1, maxvalue=200, parent=self.root)
         if not N:
             return
         names = self.prompt_names_list(count=N)
         
-        # bepaal hoeveel pagina's nodig zijn en vraag per pagina enkel het aantal benodigde rijen
-        pages_needed = (N + PHOTOS_PER_PAGE - 1) // PHOTOS_PER_PAGE
-        multiline_rows_per_page = []
-        for p in range(pages_needed):
-            items_on_page = N - p * PHOTOS_PER_PAGE
-            items_on_page = min(PHOTOS_PER_PAGE, max(0,items_on_page))
-            rows_present = (items_on_page + COLS_PER_PAGE - 1) // COLS_PER_PAGE  # 0..5
-            rows_to_query = max(0, rows_present - 1)
-            if rows_to_query > 0 and (p == 0 or (p >= 1 and N > 30)):
-                vals = self.prompt_multiline_rows(rows=rows_to_query, page_num=p+1)
-            else:
-                vals = [False]*rows_to_query
-            multiline_rows_per_page.append(vals)
-            
-        # **cache** de per-PDF keuze zodat we die bij opslaan kunnen bewaren
-        self._last_pdf_multiline_rows[pdf_path] = multiline_rows_per_page
-        
-        for i in range(N):
-            # bepaal van welke PDF-pagina dit item komt en de rij/kolom binnen die pagina
-            page_index = i // PHOTOS_PER_PAGE
-            idx_in_page = i % PHOTOS_PER_PAGE
-            r = idx_in_page // COLS_PER_PAGE
-            c = idx_in_page % COLS_PER_PAGE
-
-            if page_index >= len(pages):
-                messagebox.showerror("PDF fout", f"PDF heeft niet genoeg pagina's voor {N} leerlingen (ontbreekt pagina {page_index+1}).")
+        while True:
+            # bepaal hoeveel pagina's nodig zijn en vraag per pagina enkel het aantal benodigde rijen
+            multiline_rows_per_page = []
+            for p, rows_to_query in enumerate(pdf_rows_to_query(N)):
+                if rows_to_query > 0 and (p == 0 or (p >= 1 and N > 30)):
+                    vals = self.prompt_multiline_rows(rows=rows_to_query, page_num=p+1)
+                else:
+                    vals = [False]*rows_to_query
+                multiline_rows_per_page.append(vals)
+
+            try:
+                photos = crop_pdf_photos(pages, N, multiline_rows_per_page)
+            except ValueError as e:
+                messagebox.showerror("PDF fout", str(e))
+                return
+            # lege of verschoven uitsneden (bv. een rij met lange namen niet aangeduid): nu
+            # opnieuw aanduiden in plaats van na de eerste export alles opnieuw te importeren
+            report = check_photos(photos, pdf=True)
+            if not has_problems(report):
+                break
+            answer = messagebox.askyesnocancel(
+                "Controle foto's",
+                "Mogelijke problemen met de uitgesneden foto's:\n\n" + "\n".join(describe_problems(report, names))
+                + "\n\nJa: toch importeren\nNee: rijen met lange namen opnieuw aanduiden\nAnnuleren: niet importeren")
+            if answer is None:
                 return
+            if answer:
+                break
 
-            # bepaal page-specifieke top offset (pagina 0 = PDF_MARGIN_TOP, pagina 1 = PDF_MARGIN_TOP + delta_top, ...)
-            if page_index == 0:
-                page_margin_top_for_this_page = PDF_MARGIN_TOP
-            else:
-                page_margin_top_for_this_page = PDF_MARGIN_TOP + page_index * delta_top
-
-            # bereken cumulatieve extra shift voor deze rij: elke aangevinkte eerdere rij → +33 px
-            extra_shift = 0
-            if page_index < len(multiline_rows_per_page):
-                page_checks = multiline_rows_per_page[page_index]
-                extra_shift = sum(1 for j in range(0, r) if j < len(page_checks) and page_checks[j]) * 33
-
-            page_img = pages[page_index].convert("RGB")
-            x1 = PDF_MARGIN_LEFT + c * (PDF_PHOTO_W + PDF_H_SPACING)
-            y1 = page_margin_top_for_this_page + r * (PDF_PHOTO_H + PDF_V_SPACING) + extra_shift
-            x2 = x1 + PDF_PHOTO_W
-            y2 = y1 + PDF_PHOTO_H
-
-            # safety: clamp crop inside page bounds and add a small padding to avoid cutting edges
-            Wp, Hp = page_img.size
-            pad = 2
-            x1c = max(0, min(Wp, int(round(x1)) - pad))
-            y1c = max(0, min(Hp, int(round(y1)) - pad))
-            x2c = max(0, min(Wp, int(round(x2)) + pad))
-            y2c = max(0, min(Hp, int(round(y2)) + pad))
-
-            crop = page_img.crop((x1c, y1c, x2c, y2c))
-            pil_sq = self.crop_square(crop)
+        # **cache** de per-PDF keuze zodat we die bij opslaan kunnen bewaren
+        self._last_pdf_multiline_rows[pdf_path] = multiline_rows_per_page
+        del pages   # de gerasterde pagina's niet vasthouden tijdens het tekenen
+        first = len(self.students)
+        for i, pil_sq in enumerate(photos):
             name = names[i] if i < len(names) else f"leerling_{i+1}"
-            self.students.append({
-                "name": name, "pil": pil_sq, "tk": None, "slot": None,
-                "img_id": None, "text_id": None, "font_size": FONT_MAX,
-                "source": pdf_path, "pdf_index": i, "img_filename": None
-            })
+            self.students.append(make_student(name, pil_sq, source=pdf_path, pdf_index=i))
         self.reflow_after_data_change()
+        self.history.push(AddCommand(list(enumerate(self.students))[first:]))
 
 
     def prompt_names_list(self, count=None, default_list=None):
@@ -767,182 +833,88 @@ class SeatPlanner:
 
     # ---------------- Helpers ----------------
     def crop_square(self, pil_img):
-        w,h = pil_img.size
-        side = min(w,h)
-        L = (w - side)//2
-        T = (h - side)//2
-        return pil_img.crop((L,T,L+side,T+side))
+        return crop_square(pil_img)
 
     def set_layout(self, initial=False):
         chosen = self.var_layout.get()
         if chosen not in LAYOUTS:
             chosen = next(iter(LAYOUTS.keys()))
             self.var_layout.set(chosen)
-        cfg = LAYOUTS[chosen]
-        orient = cfg.get("orientation","portrait")
-        self.page_size = portrait(A4) if orient=="portrait" else landscape(A4)
+        self.page_size = page_size_for(LAYOUTS[chosen])
+        self._layout_state = (chosen, LAYOUTS.get("Eigen opstelling"))
         # recompute geometry and redraw (keeps current zoom_level)
         self.compute_geometry_and_draw_static()
         self.build_tk_thumbs()
         self.auto_assign_students()
         self.draw_students()
+        self.autosave()
 
-    def compute_geometry_and_draw_static(self):
-        """
-        Compute both base (export) geometry based on logical seat_size,
-        and display geometry according to zoom_level.
-
-        Extra: limit the portrait-start-Y so it never becomes much lower than
-        the equivalent centered start-Y for the same layout in landscape.
-        That keeps the title-to-first-bank spacing comparable.
-        """
-        # Clear canvas items
-        self.canvas.delete("all")
-        self.base_slots.clear()
-        self.base_bank_rects.clear()
-        self.slots.clear()
-        self.bank_rects.clear()
+    def change_layout(self):
+        """Andere opstelling gekozen door de gebruiker (kan ongedaan gemaakt worden)."""
+        before = self._layout_state
+        slots = {id(s): s["slot"] for s in self.students}
+        self.set_layout()
+        if self._layout_state != before:
+            self.history.push(LayoutCommand(before, self._layout_state, slot_changes(self.students, slots)))
+
+    def apply_layout(self, name, custom_layout):
+        """Voor LayoutCommand: zet een opstelling terug zonder leerlingen te verplaatsen."""
+        if custom_layout is not None:
+            LAYOUTS["Eigen opstelling"] = custom_layout
+        self.var_layout.set(name)
+        self.page_size = page_size_for(LAYOUTS[name])
+        self._layout_state = (name, LAYOUTS.get("Eigen opstelling"))
+        self.compute_geometry_and_draw_static()
 
-        W, H = self.page_size
-        cfg = LAYOUTS[self.var_layout.get()]
-        regular = cfg.get("regular", True)
-        orient = cfg.get("orientation", "portrait")
+    # ---------------- Undo / redo ----------------
+    def undo(self):
+        self.redraw_after_history(self.history.undo(self))
 
-        # pick top margin based on orientation (this fixes extra whitespace in portrait)
-        page_margin_top = PAGE_MARGIN_TOP_PORTRAIT if orient == "portrait" else PAGE_MARGIN_TOP_LANDSCAPE
+    def redo(self):
+        self.redraw_after_history(self.history.redo(self))
 
-        if regular:
-            rows = cfg["rows"]
-            banks_per_row = [cfg["banks"]]*rows
-            seats_lookup = lambda r,c: cfg["seats"]
+    def redraw_after_history(self, cmd):
+        if cmd is None:
+            return
+        self.drag["student"] = None
+        if cmd.redraw == "positions":
+            self.refresh_positions()
+        elif cmd.redraw == "labels":
+            self.draw_students()
         else:
-            pattern = cfg["pattern"]
-            banks_per_row = [len(row) for row in pattern]
-            rows = len(pattern)
-            def seats_lookup(r,c):
-                return pattern[r][c]
-
-        max_banks = max(banks_per_row) if banks_per_row else 0
-
-        max_seats_in_widest_row = 0
-        for r in range(rows):
-            seats_list = [seats_lookup(r, c) for c in range(banks_per_row[r])]
-            max_seats_in_widest_row = max(max_seats_in_widest_row, max(seats_list) if seats_list else 0)
-
-        avail_w = W - PAGE_MARGIN_LR*2 - (max_banks-1)*BANK_SPACING
-        seats_per_bank_for_width = cfg["seats"] if regular else (max_seats_in_widest_row or 1)
-        seat_by_w = (avail_w / max_banks - 2*INNER_PAD_X - (seats_per_bank_for_width-1)*SEAT_SPACING) / max(seats_per_bank_for_width,1)
-
-        font_est = 14
-        avail_h = H - page_margin_top - PAGE_MARGIN_BOTTOM - (rows-1)*ROW_SPACING
-        seat_by_h = avail_h/rows - (INNER_PAD_TOP + CAPTION_GAP + font_est + INNER_PAD_BOTTOM)
-
-        # base logical seat_size used for export
-        self.seat_size = int(max(SEAT_MIN, min(SEAT_MAX, seat_by_w, seat_by_h)))
+            self.build_tk_thumbs()
+            self.auto_assign_students()
+            self.draw_students()
+        self.autosave()
 
-        def bank_w_base(seats):
-            return int(2*INNER_PAD_X + seats*self.seat_size + (seats-1)*SEAT_SPACING)
-        bank_h_base = int(INNER_PAD_TOP + self.seat_size + CAPTION_GAP + font_est + INNER_PAD_BOTTOM)
-
-        # Build base geometry
-        # centered y as before
-        centered_y_base = page_margin_top + max(0, (H - page_margin_top - PAGE_MARGIN_BOTTOM - (rows*bank_h_base + (rows-1)*ROW_SPACING))//2)
-        y_base = centered_y_base
-
-        # also compute what the centered start Y would be for the SAME layout in landscape A4
-        # (this allows us to cap portrait-start so it won't be much lower than landscape)
-        try:
-            _, landscape_H = landscape(A4)
-            alt_page_margin_top = PAGE_MARGIN_TOP_LANDSCAPE
-            alt_centered = alt_page_margin_top + max(0, (landscape_H - alt_page_margin_top - PAGE_MARGIN_BOTTOM - (rows*bank_h_base + (rows-1)*ROW_SPACING))//2)
-            # allow a small slack so portrait can be a bit lower if needed
-            max_allowed_y_base = alt_centered + 6
-            # cap y_base so it doesn't drop far below the landscape equivalent
-            if y_base > max_allowed_y_base:
-                y_base = max_allowed_y_base
-        except Exception:
-            # if anything goes wrong, keep original centered value
-            pass
-
-        # ensure banks don't start so low that there's an excessive gap below the title
-        min_allowed = TITLE_Y + TITLE_GAP_AFTER
-        if y_base < min_allowed:
-            y_base = min_allowed
-
-        for r in range(rows):
-            row_banks = banks_per_row[r]
-            if regular:
-                row_bank_widths = [bank_w_base(cfg["seats"]) for _ in range(row_banks)]
-            else:
-                row_bank_widths = [bank_w_base(seats_lookup(r, c)) for c in range(row_banks)]
-            row_total_w = sum(row_bank_widths) + (row_banks-1)*BANK_SPACING
-            x_base = PAGE_MARGIN_LR + (W - 2*PAGE_MARGIN_LR - row_total_w)//2
-            for b in range(row_banks):
-                seats = seats_lookup(r,b) if not regular else cfg["seats"]
-                bw = row_bank_widths[b]
-                x0b, y0b = x_base, y_base
-                x1b, y1b = x0b + bw, y0b + bank_h_base
-                self.base_bank_rects.append((x0b, y0b, x1b, y1b))
-                sx = x0b + INNER_PAD_X
-                sy = y0b + INNER_PAD_TOP
-                for s in range(seats):
-                    self.base_slots.append({
-                        "x": sx, "y": sy, "w": self.seat_size, "h": self.seat_size,
-                        "cx": sx + self.seat_size/2, "cy": sy + self.seat_size/2
-                    })
-                    sx += self.seat_size + SEAT_SPACING
-                x_base += bw + BANK_SPACING
-            y_base += bank_h_base + ROW_SPACING
-
-        # Build visual geometry using zoom_level
-        vs = max(4, int(self.seat_size * self.zoom_level))
-        def bank_w_disp(seats):
-            return int(2*INNER_PAD_X + seats*vs + (seats-1)*SEAT_SPACING)
-        bank_h_disp = int(INNER_PAD_TOP + vs + CAPTION_GAP + font_est + INNER_PAD_BOTTOM)
-
-        # compute displayed y starting point using the same page_margin_top (scaled)
-        centered_y_disp = page_margin_top*self.zoom_level + max(0, int((H*self.zoom_level - (page_margin_top*self.zoom_level + PAGE_MARGIN_BOTTOM*self.zoom_level) - (rows*bank_h_disp + (rows-1)*int(ROW_SPACING*self.zoom_level)))//2))
-        y_disp = centered_y_disp
-
-        # compute landscape-equivalent display start and cap similarly
-        try:
-            _, landscape_H = landscape(A4)
-            alt_centered_disp = PAGE_MARGIN_TOP_LANDSCAPE*self.zoom_level + max(0, int((landscape_H*self.zoom_level - (PAGE_MARGIN_TOP_LANDSCAPE*self.zoom_level + PAGE_MARGIN_BOTTOM*self.zoom_level) - (rows*bank_h_disp + (rows-1)*int(ROW_SPACING*self.zoom_level)))//2))
-            max_allowed_y_disp = alt_centered_disp + (6 * self.zoom_level)
-            if y_disp > max_allowed_y_disp:
-                y_disp = int(max_allowed_y_disp)
-        except Exception:
-            pass
-
-        if y_disp < TITLE_Y*self.zoom_level + TITLE_GAP_AFTER:
-            y_disp = TITLE_Y*self.zoom_level + TITLE_GAP_AFTER
-
-        for r in range(rows):
-            row_banks = banks_per_row[r]
-            if regular:
-                row_bank_widths = [bank_w_disp(cfg["seats"]) for _ in range(row_banks)]
-            else:
-                row_bank_widths = [bank_w_disp(seats_lookup(r, c)) for c in range(row_banks)]
-            row_total_w = sum(row_bank_widths) + (row_banks-1)*int(BANK_SPACING*self.zoom_level)
-            x_disp = int(PAGE_MARGIN_LR*self.zoom_level + (W*self.zoom_level - 2*PAGE_MARGIN_LR*self.zoom_level - row_total_w)//2)
-            for b in range(row_banks):
-                seats = seats_lookup(r,b) if not regular else cfg["seats"]
-                bw = row_bank_widths[b]
-                x0, y0 = x_disp, int(y_disp)
-                x1, y1 = x0 + bw, y0 + bank_h_disp
-                self.canvas.create_rectangle(x0, y0, x1, y1, outline="black", tags=("static","bank"))
-                self.bank_rects.append((x0, y0, x1, y1))
-                sx = x0 + INNER_PAD_X
-                sy = y0 + INNER_PAD_TOP
-                for s in range(seats):
-                    self.canvas.create_rectangle(sx, sy, sx+vs, sy+vs, outline="#999", dash=(2,2), tags=("static","seatbox"))
-                    self.slots.append({
-                        "x": sx, "y": sy, "w": vs, "h": vs,
-                        "cx": sx + vs/2, "cy": sy + vs/2
-                    })
-                    sx += vs + int(SEAT_SPACING*self.zoom_level)
-                x_disp += bw + int(BANK_SPACING*self.zoom_level)
-            y_disp += bank_h_disp + int(ROW_SPACING*self.zoom_level)
+    @traced("draw.static")
+    def compute_geometry_and_draw_static(self):
+        """
+        Compute base (export) and display geometry via zitcore.geometry
+        and draw the static banks and seat placeholders on the canvas.
+        """
+        # Clear canvas items
+        self.canvas.delete("all")
+        self._title_id = None
+        self.geometry = cached_geometry(self.tab, compute_geometry, LAYOUTS[self.var_layout.get()],
+                                        self.page_size, self.zoom_level)
+        W, H = self.geometry["sheet_size"]
+        self.seat_size = self.geometry["seat_size"]
+        self.base_slots = self.geometry["base_slots"]
+        self.base_bank_rects = self.geometry["base_bank_rects"]
+        self.slots = self.geometry["slots"]
+        self.bank_rects = self.geometry["bank_rects"]
+
+        # banken, stoelkaders en paginagrenzen: één afbeelding (gestippelde canvasrechthoeken
+        # zijn traag, zeker op Windows); enkel de leerlingen zijn nog aparte items
+        layer, pos = self.static_layer()
+        if layer is not None:
+            self.canvas.create_image(*pos, image=layer, anchor="nw", tags=("static","room"))
+        # te groot voor één pagina: toon waar de PDF-pagina's beginnen en eindigen
+        z = self.zoom_level
+        for k, tile in enumerate(self.geometry["tiles"]):
+            self.canvas.create_text(tile["x0"]*z + 4, tile["y0"]*z + 2, anchor="nw", text=f"pagina {k+1}",
+                                    fill="#6A9FD8", font=("Helvetica", 8), tags=("static","tile"))
 
         # title and scrollregion
         self.update_title()
@@ -952,29 +924,94 @@ class SeatPlanner:
         else:
             self.canvas.config(scrollregion=(0,0,W*self.zoom_level,H*self.zoom_level))
 
+    def static_layer(self):
+        """(PhotoImage, (x, y)) met de vaste laag van de huidige geometrie; één keer getekend per opstelling en zoom."""
+        key = geometry_key(LAYOUTS[self.var_layout.get()], self.page_size, self.zoom_level)
+        layer = self._static_layers.get(key)
+        if layer is None:
+            with span("draw.static_layer"):
+                drawn = draw_static_layer(self.geometry, self.zoom_level)
+                layer = (ImageTk.PhotoImage(drawn[0]), drawn[1]) if drawn else (None, None)
+            self._static_layers[key] = layer
+            while len(self._static_layers) > STATIC_LAYER_CACHE_SIZE:
+                self._static_layers.popitem(last=False)
+        else:
+            self._static_layers.move_to_end(key)
+        return layer
+
+    def static_layers_nbytes(self):
+        return sum(4 * img.width() * img.height() for img, _ in self._static_layers.values() if img is not None)
+
     # ---------------- Thumbnail building / drawing ----------------
+    @traced("thumbs")
     def build_tk_thumbs(self):
         vs = max(4, int(self.seat_size * self.zoom_level))
+        self._placeholder_tk = None
         for s in self.students:
-            try:
-                thumb = s["pil"].resize((vs, vs), Image.LANCZOS)
-            except Exception:
-                thumb = Image.new("RGB", (vs, vs), (240,240,240))
-            s["tk"] = ImageTk.PhotoImage(thumb)
+            # thumbnails op deze grootte blijven geldig (bv. bij terugkeren naar een klas)
+            if s.get("tk_size") != vs or s.get("tk") is None:
+                self.build_tk_thumb(s, vs)
+        self.request_visible_images()
+
+    def build_tk_thumb(self, s, vs):
+        if s["pil"] is None:
+            # nog niet gedecodeerd: gedeelde placeholder tot de foto klaar is
+            if self._placeholder_tk is None:
+                self._placeholder_tk = ImageTk.PhotoImage(placeholder_image(vs))
+            s["tk"] = self._placeholder_tk
+            s.pop("tk_size", None)
+            return
+        try:
+            thumb = s["pil"].resize((vs, vs), Image.LANCZOS)
+        except Exception:
+            thumb = placeholder_image(vs)
+        s["tk"] = ImageTk.PhotoImage(thumb)
+        s["tk_size"] = vs
+
+    # ---------------- Lazy image decoding ----------------
+    def request_visible_images(self):
+        """Laat de foto's in (of net naast) het zichtbare deel van het canvas eerst decoderen."""
+        pending = [s for s in self.students if s["pil"] is None]
+        if not pending:
+            return
+        x0, y0 = self.canvas.canvasx(0), self.canvas.canvasy(0)
+        x1 = x0 + max(1, self.canvas.winfo_width())
+        y1 = y0 + max(1, self.canvas.winfo_height())
+        margin = self.seat_size * self.zoom_level
+        in_view = set(slot_index(self.geometry).query_rect(x0 - margin, y0 - margin, x1 + margin, y1 + margin))
+        visible = [s for s in pending if s["slot"] in in_view]
+        self.images.request(visible)
+        if self._poll_job is None and self.images.busy():
+            self._poll_job = self.root.after(30, self._poll_images)
+
+    def _poll_images(self):
+        self._poll_job = None
+        vs = max(4, int(self.seat_size * self.zoom_level))
+        for s in self.images.collect():
+            self.build_tk_thumb(s, vs)
+            if s.get("img_id"):
+                self.canvas.itemconfig(s["img_id"], image=s["tk"])
+        if self.images.busy():
+            self._poll_job = self.root.after(30, self._poll_images)
+        else:
+            self.enforce_memory()
+
+    def _xview(self, *args):
+        self.canvas.xview(*args)
+        self.request_visible_images()
+
+    def _yview(self, *args):
+        self.canvas.yview(*args)
+        self.request_visible_images()
 
     def auto_assign_students(self):
-        used = set(s["slot"] for s in self.students if s["slot"] is not None and isinstance(s["slot"], int) and s["slot"] < len(self.slots))
-        free = [i for i in range(len(self.slots)) if i not in used]
-        for s in self.students:
-            if s["slot"] is None or not isinstance(s["slot"], int) or s["slot"] >= len(self.slots):
-                if free:
-                    s["slot"] = free.pop(0)
-                else:
-                    s["slot"] = None
+        auto_assign(self.students, len(self.slots))
 
+    @traced("draw.students")
     def draw_students(self):
         self.canvas.delete("student")
         self.canvas.delete("photo")
+        self._student_items = {}
         for s in self.students:
             if s["slot"] is None or not isinstance(s["slot"], int) or s["slot"] >= len(self.slots):
                 continue
@@ -985,12 +1022,14 @@ class SeatPlanner:
             s["font_size_display"] = font_size
             s["text_id"] = self.canvas.create_text(x + slot["w"]/2, y + slot["h"] + CAPTION_GAP, text=s["name"],
                                                    font=("Helvetica", font_size, "bold"), anchor="n", tags=("student","label"))
+            self._student_items[s["img_id"]] = self._student_items[s["text_id"]] = s
             # bindings
             self.canvas.tag_bind(s["img_id"], "<Button-1>", self.on_drag_start)
             self.canvas.tag_bind(s["img_id"], "<B1-Motion>", self.on_drag_move)
             self.canvas.tag_bind(s["img_id"], "<ButtonRelease-1>", self.on_drag_end)
             self.canvas.tag_bind(s["img_id"], "<Double-Button-1>", self.on_double_click)
             self.canvas.tag_bind(s["text_id"], "<Double-Button-1>", self.on_double_click)
+        self.draw_search_hits()
 
     def fit_font_size(self, text, max_width):
         size = FONT_MAX
@@ -1004,14 +1043,14 @@ class SeatPlanner:
         self.build_tk_thumbs()
         self.auto_assign_students()
         self.draw_students()
+        self.autosave()
+        self.enforce_memory()
 
 
     # ---------------- Drag & Drop ----------------
     def find_student_by_img(self, item_id):
-        for s in self.students:
-            if s.get("img_id") == item_id:
-                return s
-        return None
+        s = self._student_items.get(item_id)
+        return s if s is not None and s.get("img_id") == item_id else None
 
     def on_drag_start(self, event):
         cx = self.canvas.canvasx(event.x)
@@ -1044,16 +1083,9 @@ class SeatPlanner:
         if not st: return
         cx = self.canvas.canvasx(event.x)
         cy = self.canvas.canvasy(event.y)
-        nearest, bestd2 = None, 1e18
-        for i, slot in enumerate(self.slots):
-            dx = cx - slot["cx"]
-            dy = cy - slot["cy"]
-            d2 = dx*dx + dy*dy
-            if d2 < bestd2:
-                bestd2 = d2
-                nearest = i
         snap = max(100, int(self.seat_size * 1.2 * self.zoom_level))
-        if bestd2 > snap*snap:
+        nearest, _ = slot_index(self.geometry).nearest(cx, cy, snap)
+        if nearest is None:
             self.refresh_positions()
             self.drag["student"] = None
             return
@@ -1073,11 +1105,17 @@ class SeatPlanner:
 
         if other is None:
             st["slot"] = target
+            changes = [(st, origin, target)]
         else:
             st["slot"], other["slot"] = other["slot"], st["slot"]
+            changes = [(st, origin, target), (other, target, origin)]
+        if target != origin:
+            # snel na elkaar dezelfde leerling verslepen = één stap om ongedaan te maken
+            self.history.push(MoveCommand(changes, key=st))
 
         self.refresh_positions()
         self.drag["student"] = None
+        self.autosave()
 
     def refresh_positions(self):
         for s in self.students:
@@ -1087,23 +1125,89 @@ class SeatPlanner:
             self.canvas.coords(s["img_id"], x, y)
             if s.get("text_id"):
                 self.canvas.coords(s["text_id"], x + slot["w"]/2, y + slot["h"] + CAPTION_GAP)
+        self.draw_search_hits()
 
     def shuffle_students(self):
-        import random
-        random.shuffle(self.students)
-        for i, s in enumerate(self.students):
-            s["slot"] = i if i < len(self.slots) else None
+        before = [(s, s["slot"]) for s in self.students]
+        shuffle_students(self.students, len(self.slots))
+        self.history.push(OrderCommand(before, [(s, s["slot"]) for s in self.students]))
         self.draw_students()
+        self.autosave()
 
     # ---------------- Contextmenu & edit name / delete ----------------
     def hit_student(self, cx, cy):
         items = self.canvas.find_overlapping(cx-1, cy-1, cx+1, cy+1)
         for it in reversed(items):
-            for s in self.students:
-                if it == s.get("img_id") or it == s.get("text_id"):
-                    return s
+            s = self._student_items.get(it)
+            if s is not None:
+                return s
         return None
 
+    # ---------------- Zoeken op naam ----------------
+    def name_index(self):
+        """NameIndex over de leerlingen op het bord; opnieuw opgebouwd als er namen of leerlingen wijzigen."""
+        key = tuple((id(s), s["name"]) for s in self.students)
+        if self._name_index is None or self._name_index[0] != key:
+            self._name_index = (key, NameIndex(s["name"] for s in self.students))
+        return self._name_index[1]
+
+    def search_hits(self):
+        """Leerlingen op een plaats die bij de zoektekst passen (zie zitcore.search)."""
+        query = self.var_search.get()
+        if not query.strip():
+            return []
+        hits = [self.students[i] for i in self.name_index().search(query)]
+        return [s for s in hits if isinstance(s["slot"], int) and s["slot"] < len(self.slots)]
+
+    def on_search_change(self):
+        self._search_pos = 0
+        self.draw_search_hits(scroll=True)
+
+    def next_search_hit(self, step):
+        self._search_pos += step
+        self.draw_search_hits(scroll=True)
+        return "break"
+
+    def draw_search_hits(self, scroll=False):
+        """Omkader de treffers (de huidige dikker) en scroll zo nodig naar de huidige."""
+        self.canvas.delete("search")
+        hits = self.search_hits()
+        if not hits:
+            self.lbl_search.config(text="geen" if self.var_search.get().strip() else "")
+            return
+        current = self._search_pos % len(hits)
+        pad = 3
+        for k, s in enumerate(hits):
+            slot = self.slots[s["slot"]]
+            self.canvas.create_rectangle(slot["x"] - pad, slot["y"] - pad, slot["x"] + slot["w"] + pad,
+                                         slot["y"] + slot["h"] + pad, outline="#FF8C00",
+                                         width=4 if k == current else 2, tags=("search",))
+        self.lbl_search.config(text=f"{current + 1}/{len(hits)}")
+        if scroll:
+            self.scroll_to_slot(hits[current]["slot"])
+
+    def scroll_to_slot(self, i):
+        """Scroll het canvas zodat stoel i zichtbaar is (niets als ze dat al is)."""
+        slot = self.slots[i]
+        region = str(self.canvas.cget("scrollregion")).split()
+        if len(region) != 4:
+            return
+        rx0, ry0, rx1, ry1 = map(float, region)
+        vx0, vy0 = self.canvas.canvasx(0), self.canvas.canvasy(0)
+        vw, vh = max(1, self.canvas.winfo_width()), max(1, self.canvas.winfo_height())
+        x0, y0 = slot["x"], slot["y"]
+        x1, y1 = x0 + slot["w"], y0 + slot["h"] + CAPTION_GAP + FONT_MAX * 2
+        # enkel in de richting waarin de stoel (deels) buiten beeld is: dan in het midden
+        moved = False
+        if not (vx0 <= x0 and x1 <= vx0 + vw) and rx1 - rx0 > vw:
+            self.canvas.xview_moveto(max(0.0, ((x0 + x1) / 2 - vw / 2 - rx0) / (rx1 - rx0)))
+            moved = True
+        if not (vy0 <= y0 and y1 <= vy0 + vh) and ry1 - ry0 > vh:
+            self.canvas.yview_moveto(max(0.0, ((y0 + y1) / 2 - vh / 2 - ry0) / (ry1 - ry0)))
+            moved = True
+        if moved:
+            self.request_visible_images()
+
     def on_right_click(self, event):
         cx = self.canvas.canvasx(event.x)
         cy = self.canvas.canvasy(event.y)
@@ -1131,11 +1235,15 @@ class SeatPlanner:
         var = tk.StringVar(value=student["name"])
         ent = tk.Entry(top, textvariable=var, width=30); ent.pack(padx=8, pady=6); ent.focus_set()
         def ok():
+            old = (student["name"], student.get("font_size"))
             student["name"] = var.get().strip() or student["name"]
             new_size = self.fit_font_size(student["name"], max_width=int(self.seat_size * self.zoom_level * 0.95))
             student["font_size"] = new_size
+            if (student["name"], new_size) != old:
+                self.history.push(RenameCommand(student, old, (student["name"], new_size)))
             if student.get("text_id"):
                 self.canvas.itemconfig(student["text_id"], text=student["name"], font=("Helvetica", new_size, "bold"))
+            self.autosave()
             top.destroy()
         ttk.Button(top, text="OK", command=ok).pack(pady=(4,10))
         top.bind("<Return>", lambda e: ok())
@@ -1146,6 +1254,7 @@ class SeatPlanner:
         s = self.selected_student
         if s.get("img_id"): self.canvas.delete(s.get("img_id"))
         if s.get("text_id"): self.canvas.delete(s.get("text_id"))
+        self.history.push(RemoveCommand([(self.students.index(s), s)]))
         self.students.remove(s)
         self.selected_student = None
         self.reflow_after_data_change()
@@ -1155,132 +1264,60 @@ class SeatPlanner:
         if not self.students:
             messagebox.showwarning("Opslaan", "Geen leerlingen om op te slaan.")
             return
-        fpath = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON","*.json")], title="Bewaar opstelling")
+        fpath = filedialog.asksaveasfilename(defaultextension=".zit",
+                                             filetypes=[("Zitplaatsen", "*.zit"), ("JSON + fotopakket", "*.json")],
+                                             title="Bewaar opstelling")
         if not fpath:
             return
 
-        base, _ = os.path.splitext(fpath)
-        assets_dir = base + "_assets"
-        zip_path = base + "_assets.zip"
-        try:
-            if os.path.isdir(assets_dir):
-                shutil.rmtree(assets_dir)
-            os.makedirs(assets_dir, exist_ok=True)
-        except Exception as e:
-            messagebox.showerror("Fout", f"Kan assets-map niet aanmaken:\n{e}")
-            return
-
-        students_meta = []
-        for i, s in enumerate(self.students):
-            fname = f"{i}_{safe_filename(s['name'])}.png"
-            save_path = os.path.join(assets_dir, fname)
-            try:
-                s["pil"].save(save_path, format="PNG")
-            except Exception:
-                Image.new("RGB", (self.seat_size, self.seat_size), (240,240,240)).save(save_path, format="PNG")
-            students_meta.append({
-                "name": s["name"],
-                "slot": s["slot"],
-                "source": s.get("source"),
-                "pdf_index": s.get("pdf_index"),
-                "font_size": s.get("font_size", FONT_MAX),
-                "img_filename": fname
-            })
-
-        data = {
-            "class": self.var_class.get(),
-            "room": self.var_room.get(),
-            "layout": self.var_layout.get(),
-            "custom_layout": LAYOUTS.get("Eigen opstelling"),
-            "students": students_meta,
-            "pdf_multiline_rows": self._last_pdf_multiline_rows
-        }
-
-        # write JSON and create ZIP of assets, then remove the assets_dir
         try:
-            with open(fpath, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            # create zip
-            with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-                for fname in os.listdir(assets_dir):
-                    zf.write(os.path.join(assets_dir, fname), arcname=fname)
-            # remove the temporary assets_dir
-            shutil.rmtree(assets_dir)
-            messagebox.showinfo("Opslaan", f"Opstelling opgeslagen in:\n{fpath}\n(en assets gecomprimeerd in {os.path.basename(zip_path)})")
+            pack_path = save_seating_files(fpath, self.session_meta(), self.students, placeholder_size=self.seat_size)
+            extra = "" if pack_path == fpath else f"\n(foto's in {os.path.basename(pack_path)})"
+            messagebox.showinfo("Opslaan", f"Opstelling opgeslagen in:\n{fpath}{extra}")
         except Exception as e:
             messagebox.showerror("Fout", f"Kon niet opslaan:\n{e}")
 
     def _safe_read_json(self, fpath):
-        """
-        Probeer JSON te lezen. Als openen direct faalt (bv door lock), maak tijdelijke kopie en lees die.
-        Returned: parsed data or raise.
-        """
-        try:
-            with open(fpath, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            tmp = None
-            try:
-                tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".json")
-                tmp.close()
-                shutil.copy2(fpath, tmp.name)
-                with open(tmp.name, "r", encoding="utf-8") as f2:
-                    return json.load(f2)
-            finally:
-                if tmp is not None:
-                    try:
-                        os.unlink(tmp.name)
-                    except Exception:
-                        pass
-
-    def load_seating(self):
-        # if there are existing students, ask user whether to save before opening
-        if self.students:
-            resp = messagebox.askyesnocancel("Open opstelling",
-                                             "Er staan foto's op het bord. Wilt u opslaan vóór openen?\n\nJa = opslaan en openen\nNee = openen zonder opslaan\nAnnuleer = stoppen")
-            if resp is None:
-                return
-            if resp is True:
-                self.save_seating()
-        # proceed: ask user for JSON file
-        fpath = filedialog.askopenfilename(filetypes=[("JSON","*.json")], title="Open opstelling")
+        return read_seating_json(fpath)
+
+    def load_seating(self, fpath=None):
+        # ask user for a .zit (or an older JSON file); a non-empty board stays open in its own tab
+        if fpath is None:
+            fpath = filedialog.askopenfilename(filetypes=[("Opstellingen", "*.zit *.json"), ("Zitplaatsen", "*.zit"), ("JSON", "*.json")],
+                                               title="Open opstelling")
         if not fpath:
             return
-        base, _ = os.path.splitext(fpath)
-        assets_dir = base + "_assets"
-        zip_path = base + "_assets.zip"
         try:
             data = self._safe_read_json(fpath)
         except Exception as e:
             messagebox.showerror("Fout", f"Kon bestand niet lezen:\n{e}")
             return
+        # Lees de assets in één keer (zip in het geheugen, geen tijdelijke map); decoderen gebeurt later
+        try:
+            assets = read_asset_bytes(fpath, data)
+        except Exception as e:
+            messagebox.showerror("Assets", f"Kon de foto's van deze opstelling niet lezen:\n{e}\nLoad geannuleerd.")
+            return
+        if self.students:
+            self.new_class_tab()
+        # pas nu (in het tabblad van deze verdeling): anders bewaart store_tab ze bij de vorige klas
         # keep cached pdf-multiline rows if present but we don't use them for fallback cropping anymore
         self._last_pdf_multiline_rows = data.get("pdf_multiline_rows", {}) or {}
 
-        # --- NEW: Prepare a local working copy of assets (temporary dir)
-        working_assets = prepare_assets_for_loading(assets_dir, zip_path)
-        if working_assets is None:
-            # prepare_assets_for_loading already showed an error; abort load
-            return
-
         # restore custom layout if present
-        custom = data.get("custom_layout")
-        if custom and isinstance(custom, dict) and "regular" in custom:
-            LAYOUTS["Eigen opstelling"] = custom
+        layout_name = resolve_layout(data)
 
         if "class" in data: self.var_class.set(data["class"])
         if "room" in data: self.var_room.set(data["room"])
         if "layout" in data:
-            layout_name = data["layout"]
-            if layout_name not in LAYOUTS:
-                layout_name = list(LAYOUTS.keys())[0]
             self.var_layout.set(layout_name)
 
-        saved_students = data.get("students", [])
-
         # CLEAR current state completely (we're now ready)
+        self.images.forget()
+        self.history.clear()
         self.students = []
         self.canvas.delete("all")
+        self._title_id = None
         self.base_slots.clear()
         self.base_bank_rects.clear()
         self.slots.clear()
@@ -1289,43 +1326,10 @@ class SeatPlanner:
         # Rebuild base layout first to know slots
         self.set_layout()
 
-        # Build students list reading images only from working_assets. NO PDF fallback.
-        missing_images = []
-        new_students = []
-        try:
-            for i, meta in enumerate(saved_students):
-                img_pil = None
-                imgfile = meta.get("img_filename")
-                if imgfile:
-                    p = os.path.join(working_assets, imgfile)
-                    if os.path.isfile(p):
-                        # try a robust open: first Image.open, if fails try reading bytes
-                        try:
-                            img_pil = Image.open(p).convert("RGB")
-                        except Exception:
-                            try:
-                                with open(p, "rb") as fr:
-                                    data = fr.read()
-                                img_pil = Image.open(io.BytesIO(data)).convert("RGB")
-                            except Exception:
-                                img_pil = None
-                    else:
-                        missing_images.append(imgfile)
-                if img_pil is None:
-                    # If image missing in assets, use neutral placeholder but continue.
-                    img_pil = Image.new("RGB", (self.seat_size, self.seat_size), (240,240,240))
-                name = meta.get("name", f"leerling_{i+1}")
-                new_students.append({
-                    "name": name, "pil": img_pil, "tk": None, "slot": meta.get("slot"),
-                    "img_id": None, "text_id": None, "font_size": meta.get("font_size", FONT_MAX),
-                    "source": meta.get("source"), "pdf_index": meta.get("pdf_index"), "img_filename": meta.get("img_filename")
-                })
-        finally:
-            # cleanup temporary working assets dir (we have loaded PIL images into memory)
-            try:
-                shutil.rmtree(working_assets, ignore_errors=True)
-            except Exception:
-                pass
+        # Leerlingen krijgen enkel hun gecodeerde foto; zichtbare foto's worden meteen
+        # parallel gedecodeerd, de rest pas wanneer ze nodig zijn.
+        new_students, missing_images = students_from_data(data, assets, placeholder_size=self.seat_size)
+        self.images.placeholder_size = self.seat_size
 
         if missing_images:
             messagebox.showwarning("Ontbrekende afbeeldingen", f"De volgende afbeeldingsbestanden ontbraken in de assets en zijn vervangen door placeholders:\n\n" + "\n".join(missing_images[:50]) + ("" if len(missing_images) <= 50 else f"\n... ({len(missing_images)-50} meer)"))
@@ -1334,6 +1338,91 @@ class SeatPlanner:
         self.students = new_students
         self.reflow_after_data_change()
 
+    # ---------------- Klaslijsten in bulk (zitcore.batch) ----------------
+    def batch_import_class_lists(self):
+        """
+        Importeer een hele map Smartschool-klaslijsten in één keer: elke PDF wordt in een
+        eigen proces gelezen en bewaard als verdeling, met voortgang per bestand.
+        """
+        from zitcore.batch import find_class_pdfs, batch_import
+        src = filedialog.askdirectory(title="Map met klaslijsten (PDF)")
+        if not src:
+            return
+        paths = find_class_pdfs([src])
+        if not paths:
+            messagebox.showwarning("Klaslijsten", "Geen PDF-bestanden gevonden in deze map.")
+            return
+        out_dir = filedialog.askdirectory(title="Map voor de verdelingen", initialdir=src)
+        if not out_dir:
+            return
+
+        top = tk.Toplevel(self.root)
+        top.title("Klaslijsten importeren")
+        top.transient(self.root)
+        top.protocol("WM_DELETE_WINDOW", lambda: None)   # de workers lopen door tot ze klaar zijn
+        status = tk.Label(top, text=f"0 / {len(paths)} klaslijsten", anchor="w")
+        status.pack(fill=tk.X, padx=10, pady=(10, 4))
+        bar = ttk.Progressbar(top, maximum=len(paths), length=420)
+        bar.pack(fill=tk.X, padx=10)
+        listbox = tk.Listbox(top, width=70, height=min(15, len(paths)))
+        listbox.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        for p in paths:
+            listbox.insert(tk.END, f"…  {os.path.basename(p)}")
+
+        done = queue.Queue()
+        room = self.var_room.get() or "lokaal"
+        def work():
+            try:
+                results = batch_import(paths, out_dir, room=room, report=done.put)
+            except Exception as e:
+                results = [{"path": p, "out": None, "error": str(e)} for p in paths]
+            done.put(results)
+        threading.Thread(target=work, name="batch-import", daemon=True).start()
+
+        index = {p: i for i, p in enumerate(paths)}
+        def poll():
+            while True:
+                try:
+                    item = done.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(item, list):
+                    top.destroy()
+                    self._batch_import_done(item)
+                    return
+                name = os.path.basename(item["path"])
+                if item["error"]:
+                    line = f"✗  {name}: {item['error']}"
+                else:
+                    line = f"✓  {name} → {item['count']} leerlingen ({item['layout']})"
+                    if item.get("warnings"):
+                        line = f"⚠  {name} → {item['count']} leerlingen, {len(item['warnings'])} foto('s) controleren"
+                i = index[item["path"]]
+                listbox.delete(i)
+                listbox.insert(i, line)
+                bar["value"] += 1
+                status.config(text=f"{int(bar['value'])} / {len(paths)} klaslijsten")
+            self.root.after(100, poll)
+        self.root.after(100, poll)
+
+    def _batch_import_done(self, results):
+        ok = [r for r in results if not r["error"]]
+        failed = [r for r in results if r["error"]]
+        msg = f"{len(ok)} klas(sen) geïmporteerd."
+        check = [r for r in ok if r.get("warnings")]
+        if check:
+            msg += f"\n\nControleer de foto's ({len(check)}):\n" + "\n".join(
+                f"{os.path.basename(r['path'])}: {'; '.join(r['warnings'][:3])}" for r in check[:10])
+        if failed:
+            msg += f"\n\nMislukt ({len(failed)}):\n" + "\n".join(
+                f"{os.path.basename(r['path'])}: {r['error']}" for r in failed[:20])
+        if not ok:
+            messagebox.showerror("Klaslijsten", msg)
+            return
+        if messagebox.askyesno("Klaslijsten", msg + "\n\nDe geïmporteerde klassen nu openen (elk in een tabblad)?"):
+            for r in ok:
+                self.load_seating(r["out"])
+
     # ---------------- Reset board ----------------
     def reset_board(self):
         if not self.students:
@@ -1343,15 +1432,23 @@ class SeatPlanner:
         else:
             if not messagebox.askyesno("Reset bord", "Ben je zeker dat je wil resetten? Dit verwijdert alle foto's op het bord."):
                 return
-        # clear students, keep layout
+        # clear students, keep layout (the removed students stay in the undo history)
         for s in list(self.students):
             if s.get('img_id'): self.canvas.delete(s.get('img_id'))  # keep safe deletion
+        if self.students:
+            self.history.push(RemoveCommand(list(enumerate(self.students))))
         self.students = []
         self.reflow_after_data_change()
         # ensure banks/slots remain visible: recompute layout
         self.set_layout()
 
     # ---------------- Export PDF ----------------
+    def export_cache(self):
+        if self.export_images is None:
+            from zitcore.pdfexport import ExportImageCache
+            self.export_images = ExportImageCache()
+        return self.export_images
+
     def export_pdf(self):
         if not self.students:
             messagebox.showwarning("Geen leerlingen", "Er zijn geen leerlingen om te exporteren.")
@@ -1363,47 +1460,219 @@ class SeatPlanner:
         if not fpath:
             return
 
-        cfg = LAYOUTS[self.var_layout.get()]
-        page = portrait(A4) if cfg.get("orientation","portrait")=="portrait" else landscape(A4)
-        W,H = page
-        c = pdfcanvas.Canvas(fpath, pagesize=page)
-
-        # Titel (gebruik TITLE_Y zodat UI/PDF overeenkomen)
-        c.setFont("Helvetica-Bold", 20)
-        title = f"Klas {self.var_class.get()} — Lokaal {self.var_room.get()}"
-        c.drawCentredString(W/2, H - TITLE_Y, title)
-
-        # Banken (use base bank rects)
-        c.setLineWidth(1)
-        for (x0,y0,x1,y1) in self.base_bank_rects:
-            c.rect(x0, H - y1, x1-x0, y1-y0, stroke=1, fill=0)
-
-        # Stoel placeholders (dotted)
-        c.setDash(2,2)
-        for slot in self.base_slots:
-            x,y,w,h = slot["x"], slot["y"], slot["w"], slot["h"]
-            c.rect(x, H-(y+h), w, h, stroke=1, fill=0)
-        c.setDash()
-
-        oversample = 2
-        for s in self.students:
-            if s["slot"] is None or not isinstance(s["slot"], int) or s["slot"] >= len(self.base_slots): continue
-            slot = self.base_slots[s["slot"]]
-            x, y = slot["x"], slot["y"]
-            draw_w = draw_h = slot["w"]
-            thumb = s["pil"].resize((max(1, draw_w*oversample), max(1, draw_h*oversample)), Image.LANCZOS)
-            ir = ImageReader(thumb)
-            c.drawImage(ir, x, H-(y+draw_h), width=draw_w, height=draw_h, preserveAspectRatio=True, mask='auto')
-            ui_font_size = int(s.get("font_size", FONT_MAX))
-            ui_font_size = max(FONT_MIN, min(FONT_MAX, ui_font_size))
-            c.setFont("Helvetica-Bold", ui_font_size)
-            c.drawCentredString(x + draw_w/2, H-(y+draw_h+CAPTION_GAP+12), s["name"])
-
-        c.showPage()
-        c.save()
-        messagebox.showinfo("Export", f"PDF opgeslagen:\n{fpath}")
+        from zitcore.pdfexport import write_pdf
+        title = plan_title(self.var_class.get(), self.var_room.get())
+        self.images.ensure_all(self.students)
+        write_pdf(fpath, self.geometry, title, [[(s, s["slot"]) for s in self.students]], self.export_cache())
+        self.enforce_memory()
+        messagebox.showinfo("Export", f"PDF opgeslagen:\n{fpath}{self.paper_note()}")
+
+    def paper_note(self):
+        """Extra uitleg bij de export als de opstelling niet op één A4 past (zie zitcore.geometry.page_plan)."""
+        if self.geometry["tiles"]:
+            return f"\n\nDe opstelling is te groot voor één pagina: elke verdeling staat op {len(self.geometry['tiles'])} A4-pagina's om aan elkaar te leggen."
+        if max(self.geometry["page_size"]) > max(A4) + 1:
+            return "\n\nDe opstelling past niet op A4 en is op A3 gezet."
+        return ""
+
+    def rotations_popup(self):
+        """
+        Vraag aantal verdelingen, soort rotatie en seed.
+        Returned: dict(count, mode, seed) of None bij annuleren.
+        """
+        top = tk.Toplevel(self.root)
+        top.title("Rotaties exporteren")
+        top.grab_set()
+
+        frm = tk.Frame(top)
+        frm.pack(fill="x", padx=8, pady=(8,4))
+        tk.Label(frm, text="Aantal verdelingen (pagina's):").grid(row=0, column=0, sticky="e")
+        var_count = tk.IntVar(value=4)
+        tk.Spinbox(frm, from_=1, to=52, width=6, textvariable=var_count).grid(row=0, column=1, sticky="w", padx=6)
+        tk.Label(frm, text="Seed:").grid(row=1, column=0, sticky="e")
+        var_seed = tk.StringVar(value=str(random.randint(1, 99999)))
+        tk.Entry(frm, textvariable=var_seed, width=10).grid(row=1, column=1, sticky="w", padx=6, pady=4)
+
+        tk.Label(top, text="Soort verdeling:").pack(anchor="w", padx=8, pady=(4,0))
+        var_mode = tk.StringVar(value="constrained")
+        for key, label in ROTATION_MODES.items():
+            tk.Radiobutton(top, text=label, variable=var_mode, value=key).pack(anchor="w", padx=8)
+
+        result = {"value": None}
+        def on_ok():
+            try:
+                count = int(var_count.get())
+                if count <= 0:
+                    raise ValueError("Aantal moet > 0 zijn")
+                result["value"] = {"count": count, "mode": var_mode.get(), "seed": parse_seed(var_seed.get())}
+                top.destroy()
+            except Exception as e:
+                messagebox.showerror("Fout", f"Ongeldige invoer:\n{e}")
+
+        btns = tk.Frame(top)
+        btns.pack(pady=6)
+        ttk.Button(btns, text="OK", command=on_ok).pack(side=tk.LEFT, padx=6)
+        ttk.Button(btns, text="Annuleer", command=top.destroy).pack(side=tk.LEFT, padx=6)
+        top.wait_window()
+        return result["value"]
+
+    def export_rotations_pdf(self):
+        """
+        Genereer in één keer meerdere (geseede) verdelingen van de huidige klas
+        en schrijf ze als pagina's van één PDF. De opstelling en de foto's worden
+        maar één keer ingebed en op elke pagina hergebruikt.
+        """
+        if not self.students:
+            messagebox.showwarning("Geen leerlingen", "Er zijn geen leerlingen om te exporteren.")
+            return
+        opts = self.rotations_popup()
+        if not opts:
+            return
+        fpath = filedialog.asksaveasfilename(defaultextension=".pdf",
+                                             filetypes=[("PDF", "*.pdf")],
+                                             title="Bewaar rotaties als PDF",
+                                             initialfile=f"{self.var_class.get()}_{self.var_room.get()}_rotaties.pdf")
+        if not fpath:
+            return
+
+        arrangements = generate_arrangements([s["slot"] for s in self.students],
+                                             [slot["bank"] for slot in self.base_slots],
+                                             opts["count"], mode=opts["mode"], seed=opts["seed"])
+        title = plan_title(self.var_class.get(), self.var_room.get())
+        labels = [f"Verdeling {k+1}/{len(arrangements)}" for k in range(len(arrangements))]
+        self.images.ensure_all(self.students)
+        try:
+            from zitcore.pdfexport import write_pdf
+            write_pdf(fpath, self.geometry, title, [list(zip(self.students, a)) for a in arrangements],
+                      self.export_cache(), page_labels=labels)
+        except Exception as e:
+            messagebox.showerror("Fout", f"Kon PDF niet schrijven:\n{e}")
+            return
+        self.enforce_memory()
+        messagebox.showinfo("Export", f"{len(arrangements)} verdelingen opgeslagen in:\n{fpath}\n(seed {opts['seed']}){self.paper_note()}")
+
+    # ---------------- Export als afbeelding (zitcore.rasterexport) ----------------
+    def raster_cache(self):
+        if self.raster_images is None:
+            from zitcore.rasterexport import RasterCache
+            self.raster_images = RasterCache()
+        return self.raster_images
+
+    def raster_popup(self):
+        """
+        Vraag resolutie en wat er geëxporteerd wordt.
+        Returned: dict(size, folder) of None bij annuleren.
+        """
+        top = tk.Toplevel(self.root)
+        top.title("Exporteren als afbeelding")
+        top.grab_set()
+
+        tk.Label(top, text="Resolutie (om te projecteren of in de ELO te zetten):").pack(anchor="w", padx=8, pady=(8,0))
+        var_size = tk.StringVar(value=next(iter(RASTER_SIZES)))
+        for name, (w, h) in RASTER_SIZES.items():
+            tk.Radiobutton(top, text=f"{name} ({w} × {h})", variable=var_size, value=name).pack(anchor="w", padx=8)
+
+        result = {"value": None}
+        def choose(folder):
+            result["value"] = {"size": RASTER_SIZES[var_size.get()], "folder": folder}
+            top.destroy()
+
+        btns = tk.Frame(top)
+        btns.pack(pady=6)
+        board = ttk.Button(btns, text="Dit bord...", command=lambda: choose(False))
+        board.pack(side=tk.LEFT, padx=6)
+        if not self.students:
+            board.state(["disabled"])
+        ttk.Button(btns, text="Hele map verdelingen...", command=lambda: choose(True)).pack(side=tk.LEFT, padx=6)
+        ttk.Button(btns, text="Annuleer", command=top.destroy).pack(side=tk.LEFT, padx=6)
+        top.wait_window()
+        return result["value"]
+
+    def export_image(self):
+        """Het bord als PNG of WebP op 1080p/4K, of alle verdelingen in een map in één keer."""
+        opts = self.raster_popup()
+        if not opts:
+            return
+        if opts["folder"]:
+            self.batch_export_images(opts["size"])
+            return
+        fpath = filedialog.asksaveasfilename(defaultextension=".png",
+                                             filetypes=[("PNG", "*.png"), ("WebP", "*.webp")],
+                                             title="Bewaar als afbeelding",
+                                             initialfile=f"{self.var_class.get()}_{self.var_room.get()}.png")
+        if not fpath:
+            return
+
+        from zitcore.rasterexport import write_raster
+        title = plan_title(self.var_class.get(), self.var_room.get())
+        self.images.ensure_all(self.students)
+        try:
+            write_raster(fpath, self.geometry, title, [(s, s["slot"]) for s in self.students], opts["size"],
+                         self.raster_cache())
+        except Exception as e:
+            messagebox.showerror("Fout", f"Kon afbeelding niet schrijven:\n{e}")
+            return
+        self.enforce_memory()
+        messagebox.showinfo("Export", f"Afbeelding opgeslagen:\n{fpath}")
+
+    def batch_export_images(self, size):
+        """Alle opgeslagen verdelingen in een map als afbeelding, parallel (zie zitcore.batch)."""
+        from zitcore.batch import find_seating_files, batch_export
+        src = filedialog.askdirectory(title="Map met verdelingen")
+        if not src:
+            return
+        skipped = []
+        paths = find_seating_files([src], skipped)
+        if not paths:
+            messagebox.showwarning("Exporteren", "Geen opgeslagen verdelingen gevonden in deze map.")
+            return
+        out_dir = filedialog.askdirectory(title="Map voor de afbeeldingen", initialdir=src)
+        if not out_dir:
+            return
+        ext = ".webp" if messagebox.askyesno("Exporteren", "Als WebP bewaren (kleinere bestanden)?\n\nNee = PNG") else ".png"
+
+        top = tk.Toplevel(self.root)
+        top.title("Verdelingen exporteren")
+        top.transient(self.root)
+        top.protocol("WM_DELETE_WINDOW", lambda: None)
+        status = tk.Label(top, text=f"0 / {len(paths)} verdelingen", anchor="w")
+        status.pack(fill=tk.X, padx=10, pady=(10, 4))
+        bar = ttk.Progressbar(top, maximum=len(paths), length=420)
+        bar.pack(fill=tk.X, padx=10, pady=(0, 10))
+
+        done = queue.Queue()
+        def work():
+            try:
+                results = batch_export(paths, out_dir=out_dir, report=done.put, ext=ext, size=size)
+            except Exception as e:
+                results = [{"path": p, "out": None, "error": str(e)} for p in paths]
+            done.put(results)
+        threading.Thread(target=work, name="batch-export", daemon=True).start()
+
+        def poll():
+            while True:
+                try:
+                    item = done.get_nowait()
+                except queue.Empty:
+                    break
+                if isinstance(item, list):
+                    top.destroy()
+                    failed = [r for r in item if r["error"]]
+                    msg = f"{len(item) - len(failed)} afbeelding(en) opgeslagen in:\n{out_dir}"
+                    if skipped:
+                        msg += f"\n\n{len(skipped)} oude .json-verdeling(en) overgeslagen (er staat een .zit met dezelfde naam naast)."
+                    if failed:
+                        msg += f"\n\nMislukt ({len(failed)}):\n" + "\n".join(
+                            f"{os.path.basename(r['path'])}: {r['error']}" for r in failed[:20])
+                    (messagebox.showwarning if failed else messagebox.showinfo)("Exporteren", msg)
+                    return
+                bar["value"] += 1
+                status.config(text=f"{int(bar['value'])} / {len(paths)} verdelingen")
+            self.root.after(100, poll)
+        self.root.after(100, poll)
 
     # ---------------- Zoom helpers ----------------
+    @traced("zoom")
     def zoom(self, factor):
         new_z = self.zoom_level * factor
         new_z = max(0.5, min(2.0, new_z))
@@ -1412,12 +1681,224 @@ class SeatPlanner:
         self.build_tk_thumbs()
         self.draw_students()
 
+    @traced("zoom")
     def reset_zoom(self):
         self.zoom_level = 1.0
         self.compute_geometry_and_draw_static()
         self.build_tk_thumbs()
         self.draw_students()
 
+    # ---------------- Klassen (tabbladen, zie zitcore.workspace) ----------------
+    def store_tab(self):
+        """Bewaar de toestand van de actieve klas in haar tabblad."""
+        if self.tab is None:
+            return
+        self.reactive.flush()   # bv. een autosave die nog op het einde van het typen wacht
+        self.tab.update({
+            "students": self.students, "class": self.var_class.get(), "room": self.var_room.get(),
+            "layout": self.var_layout.get(), "custom_layout": LAYOUTS.get("Eigen opstelling"),
+            "zoom_level": self.zoom_level, "history": self.history, "layout_state": self._layout_state,
+            "pdf_multiline_rows": self._last_pdf_multiline_rows, "journal": self.journal,
+        })
+
+    def show_tab(self, tab):
+        """Maak tab de actieve klas en teken ze; geometrie en thumbnails komen uit de cache van het tabblad."""
+        # gebufferde autosave van de vorige klas meteen wegschrijven
+        if self._journal_job is not None:
+            self.root.after_cancel(self._journal_job)
+        self.flush_journal()
+        self.images.forget()
+        self.drag["student"] = None
+        self.selected_student = None
+
+        self.tab = tab
+        self.students = tab["students"]
+        self.history = tab["history"]
+        self.zoom_level = tab["zoom_level"]
+        self._layout_state = tab["layout_state"]
+        self._last_pdf_multiline_rows = tab["pdf_multiline_rows"]
+        if tab["custom_layout"] is not None:
+            LAYOUTS["Eigen opstelling"] = tab["custom_layout"]
+        layout = tab["layout"] if tab["layout"] in LAYOUTS else next(iter(LAYOUTS))
+        self.journal = None   # de velden horen al bij deze klas: niet journaliseren tijdens het invullen
+        self.var_class.set(tab["class"])
+        self.var_room.set(tab["room"])
+        self.var_layout.set(layout)
+        self.journal = tab["journal"]
+
+        self.page_size = page_size_for(LAYOUTS[layout])
+        self.compute_geometry_and_draw_static()
+        self.build_tk_thumbs()
+        self.auto_assign_students()
+        self.draw_students()
+        self.workspace.activate(tab, {id(self._placeholder_tk)})
+        self.autosave()
+
+    def switch_tab(self, tab):
+        if tab is self.tab:
+            return
+        self.store_tab()
+        self.show_tab(tab)
+
+    def select_tab(self, tab):
+        """Wissel naar tab, ook in de tabbalk."""
+        self.switch_tab(tab)
+        self.tabbar.select(self.workspace.tabs.index(tab))
+
+    def on_tab_changed(self):
+        index = self.tabbar.index("current")
+        if 0 <= index < len(self.workspace.tabs):
+            self.switch_tab(self.workspace.tabs[index])
+
+    def update_tab_title(self):
+        if self.tab in self.workspace.tabs:
+            self.tabbar.tab(self.workspace.tabs.index(self.tab), text=self.var_class.get() or "klas")
+
+    def new_class_tab(self, autosave=True):
+        """Open een lege klas in een nieuw tabblad (zelfde opstelling als de huidige)."""
+        tab = self.workspace.add(new_tab(layout=self.var_layout.get()))
+        tab["custom_layout"] = LAYOUTS.get("Eigen opstelling")
+        if autosave and self.journal is not None:
+            try:
+                tab["journal"] = Journal(new_journal_dir())
+            except Exception:
+                tab["journal"] = None   # autosave enkel voor deze klas uit
+        self.tabbar.add(tk.Frame(self.tabbar, height=0), text=tab["class"])
+        self.select_tab(tab)
+        return tab
+
+    def close_class_tab(self):
+        if len(self.workspace.tabs) == 1:
+            messagebox.showinfo("Klas sluiten", "Dit is de enige open klas. Gebruik Reset om het bord leeg te maken.")
+            return
+        if self.students:
+            resp = messagebox.askyesnocancel("Klas sluiten",
+                                             f"Klas {self.var_class.get()} opslaan vóór sluiten?\n\nJa = opslaan en sluiten\nNee = sluiten zonder opslaan\nAnnuleer = terug")
+            if resp is None:
+                return
+            if resp is True:
+                self.save_seating()
+        tab = self.tab
+        index = self.workspace.tabs.index(tab)
+        if self._journal_job is not None:
+            self.root.after_cancel(self._journal_job)
+            self._journal_job = None
+        self.reactive.cancel()
+        if self.journal is not None:
+            self.journal.clear()
+            self.journal = None
+        self.workspace.remove(tab)
+        self.tab = None   # niet meer bewaren bij het wisselen
+        self.tabbar.forget(index)
+        self.select_tab(self.workspace.tabs[min(index, len(self.workspace.tabs) - 1)])
+
+    # ---------------- Geheugen (zitcore.memory) ----------------
+    def memory_usage(self):
+        return memory_report(self.students, self.history.held_students(),
+                             caches={"PDF-export": self.export_images, "Beeld-export": self.raster_images,
+                                     "opstellingen (scherm)": self.static_layers_nbytes(),
+                                     "andere klassen": self.workspace.inactive_nbytes({id(self._placeholder_tk)})},
+                             shared={"placeholder": self._placeholder_tk})
+
+    def enforce_memory(self):
+        """
+        Boven het budget: exportcaches leegmaken en grote originelen verkleinen.
+        Thumbnails en export blijven er hetzelfde uitzien, dus hertekenen is niet nodig.
+        """
+        if not self.memory_budget:
+            return None
+        with span("memory.enforce"):
+            return enforce_budget(self.students, self.memory_budget, list(self.history.held_students()),
+                                  caches={"PDF-export": self.export_images, "Beeld-export": self.raster_images},
+                                  shared={"placeholder": self._placeholder_tk})
+
+    def show_memory(self):
+        report = self.memory_usage()
+        totals = report["totals"]
+        budget = f"{self.memory_budget / MB:.0f} MB" if self.memory_budget else "geen limiet"
+        lines = [f"Totaal: {report['total'] / MB:.1f} MB (budget: {budget})", "",
+                 f"{'Originelen':<24}{totals['original'] / MB:>9.1f} MB",
+                 f"{'Gecodeerde bytes':<24}{totals['encoded'] / MB:>9.1f} MB",
+                 f"{'Thumbnails':<24}{totals['thumb'] / MB:>9.1f} MB",
+                 f"{'Ongedaan maken':<24}{totals['undo'] / MB:>9.1f} MB"]
+        for name, n in totals["caches"].items():
+            lines.append(f"{'Cache ' + name:<24}{n / MB:>9.1f} MB")
+        lines += ["", f"{'Leerling':<24}{'origineel':>10}{'gecodeerd':>10}{'thumb':>10}  (KB)"]
+        for row in report["students"]:
+            lines.append(f"{(row['name'] or '')[:23]:<24}{row['original'] // 1024:>10}"
+                         f"{row['encoded'] // 1024:>10}{row['thumb'] // 1024:>10}")
+
+        top = tk.Toplevel(self.root)
+        top.title("Geheugengebruik")
+        text = tk.Text(top, width=64, height=min(40, len(lines) + 1), font=("Courier", 9))
+        text.insert("1.0", "\n".join(lines))
+        text.config(state="disabled")
+        text.pack(fill=tk.BOTH, expand=True, padx=8, pady=8)
+        ttk.Button(top, text="Sluiten", command=top.destroy).pack(pady=(0, 8))
+
+    # ---------------- Metingen (zitcore.trace) ----------------
+    def show_trace_menu(self, event=None):
+        self.var_trace.set(trace.enabled())
+        x, y = (event.x_root, event.y_root) if event is not None else self.root.winfo_pointerxy()
+        try:
+            self.trace_menu.tk_popup(x, y)
+        finally:
+            self.trace_menu.grab_release()
+
+    def toggle_trace(self):
+        trace.enable(self.var_trace.get())
+        if not self.var_trace.get():
+            self.var_trace_overlay.set(False)
+        self.draw_trace_overlay()
+
+    def toggle_trace_overlay(self):
+        if self.var_trace_overlay.get() and not trace.enabled():
+            trace.enable()
+            self.var_trace.set(True)
+        self.draw_trace_overlay()
+
+    def clear_trace(self):
+        trace.clear()
+        self.draw_trace_overlay()
+
+    def export_trace(self):
+        if not trace.spans():
+            messagebox.showinfo("Metingen", "Er zijn nog geen metingen. Zet ze aan via Ctrl+Shift+T en werk even verder.")
+            return
+        fpath = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Chrome trace", "*.json")],
+                                             title="Bewaar metingen", initialfile="zitplaatsen_trace.json")
+        if not fpath:
+            return
+        try:
+            trace.write_chrome_trace(fpath)
+        except Exception as e:
+            messagebox.showerror("Fout", f"Kon metingen niet opslaan:\n{e}")
+            return
+        messagebox.showinfo("Metingen", f"Metingen opgeslagen in:\n{fpath}\n(openen in chrome://tracing of ui.perfetto.dev)")
+
+    def draw_trace_overlay(self):
+        """Kader linksboven in het zichtbare deel met per bewerking aantal, laatste en langste duur."""
+        if self._trace_job is not None:
+            self.root.after_cancel(self._trace_job)
+            self._trace_job = None
+        self.canvas.delete("trace_overlay")
+        if not self.var_trace_overlay.get():
+            return
+        lines = [f"{'bewerking':<16}{'aantal':>7}{'laatste':>10}{'max':>10}"]
+        for name, st in trace.summary().items():
+            lines.append(f"{name:<16}{st['count']:>7}{st['last']*1000:>8.1f}ms{st['max']*1000:>8.1f}ms")
+        if len(lines) == 1:
+            lines.append("(nog geen metingen)")
+        lines.append(f"geheugen: {self.memory_usage()['total'] / MB:.1f} MB")
+        x, y = self.canvas.canvasx(8), self.canvas.canvasy(8)
+        text_id = self.canvas.create_text(x + 6, y + 6, text="\n".join(lines), anchor="nw",
+                                          font=("Courier", 9), tags=("trace_overlay",))
+        x0, y0, x1, y1 = self.canvas.bbox(text_id)
+        box_id = self.canvas.create_rectangle(x0 - 6, y0 - 4, x1 + 6, y1 + 4, fill="#FFFFE0", outline="#999",
+                                              tags=("trace_overlay",))
+        self.canvas.tag_lower(box_id, text_id)
+        self._trace_job = self.root.after(TRACE_OVERLAY_MS, self.draw_trace_overlay)
+
     # ---------------- Mousewheel ----------------
     def _on_mousewheel(self, event):
         if hasattr(event, "delta") and event.delta:
@@ -1429,6 +1910,7 @@ class SeatPlanner:
         else:
             delta = 0
         self.canvas.yview_scroll(delta, "units")
+        self.request_visible_images()
 
 # ---------------- Run ----------------
 if __name__ == "__main__":
@@ -1438,5 +1920,15 @@ if __name__ == "__main__":
     except Exception:
         pass
     app = SeatPlanner(root)
+    if os.environ.get("ZITPLAATSEN_STARTUP"):
+        def report_startup():
+            seconds = time.perf_counter() - _STARTUP_T0
+            print(f"Opstarttijd: {seconds:.3f}s", file=sys.stderr)
+            try:
+                with open(os.path.join(user_data_dir(), "startup.log"), "a", encoding="utf-8") as f:
+                    f.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')}\t{seconds:.3f}\t{'exe' if getattr(sys, 'frozen', False) else 'py'}\n")
+            except OSError:
+                pass
+        root.after_idle(report_startup)
     root.mainloop()
 